@@ -43,10 +43,103 @@ class Config:
     REALESRGAN_MODEL = os.getenv("REALESRGAN_MODEL", "RealESRGAN_x4plus")
     REALESRGAN_SCALE = int(os.getenv("REALESRGAN_SCALE", 4))
     REALESRGAN_TILE_SIZE = int(os.getenv("REALESRGAN_TILE_SIZE", 512))
+    REALESRGAN_TILE_BATCH_SIZE = int(os.getenv("REALESRGAN_TILE_BATCH_SIZE", 1))
+    # Solapamiento mezclado entre tiles (0 = tiles sin mezcla) y contexto descartado por tile
+    REALESRGAN_TILE_OVERLAP = int(os.getenv("REALESRGAN_TILE_OVERLAP", 0))
+    REALESRGAN_TILE_PAD = int(os.getenv("REALESRGAN_TILE_PAD", 10))
+    # Salidas desde este tamaño (megapíxeles) se escriben por franjas a disco (0 = desactivado)
+    REALESRGAN_STREAMING_MIN_MP = float(os.getenv("REALESRGAN_STREAMING_MIN_MP", 16))
+    # Threads intra-op de torch por inferencia (0 = default de torch)
+    REALESRGAN_NUM_THREADS = int(os.getenv("REALESRGAN_NUM_THREADS", 0))
+    # Perfil de autotuning (tile, lote y threads por modelo); vacío = weights/autotune_profile.json
+    REALESRGAN_AUTOTUNE_PROFILE = os.getenv("REALESRGAN_AUTOTUNE_PROFILE", "")
+    # Calibrar al iniciar los modelos precargados que no tengan perfil para este host
+    REALESRGAN_AUTOTUNE_ON_STARTUP = os.getenv("REALESRGAN_AUTOTUNE_ON_STARTUP", "False").lower() == "true"
     REALESRGAN_USE_GPU = os.getenv("REALESRGAN_USE_GPU", "True").lower() == "true"
+    # Precisión por modelo sobre MODEL_CONFIG ("modelo:modo,...") y PSNR mínimo contra fp32
+    REALESRGAN_PRECISION = os.getenv("REALESRGAN_PRECISION", "")
+    REALESRGAN_MIN_PSNR = float(os.getenv("REALESRGAN_MIN_PSNR", 40.0))
+    # Compilación de modelos: none, torchscript o inductor (artefactos en weights/compiled por defecto)
+    REALESRGAN_COMPILE = os.getenv("REALESRGAN_COMPILE", "none").lower()
+    REALESRGAN_COMPILED_DIR = os.getenv("REALESRGAN_COMPILED_DIR", "")
+
+    # Registro de modelos: precarga al iniciar ("modelo[:escala],...") y presupuesto (0 = sin límite)
+    MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "general_x4")
+    MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", 0))
+
+    # Caché de resultados direccionada por contenido (píxeles + parámetros)
+    RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "True").lower() == "true"
+    RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", 1024))
+    RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "/image_history/cache")
+
+    # Executor de inferencia (fuera del event loop de Tornado)
+    INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread").lower()
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 1))
+    INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", 0))
+    # Modo pinned: cores por worker (0 = repartir todos los cores entre los workers)
+    INFERENCE_CORES_PER_WORKER = int(os.getenv("INFERENCE_CORES_PER_WORKER", 0))
+    # Cargar GFPGAN al iniciar cada worker de inferencia (modos process y pinned)
+    GFPGAN_PRELOAD = os.getenv("GFPGAN_PRELOAD", "False").lower() == "true"
+    # Rostros restaurados por forward de GFPGAN (lotes de recortes de 512x512)
+    GFPGAN_BATCH_SIZE = int(os.getenv("GFPGAN_BATCH_SIZE", 8))
+    # Detectar rostros en la imagen original (en paralelo con Real-ESRGAN) en lugar de la mejorada
+    FACE_DETECT_ON_INPUT = os.getenv("FACE_DETECT_ON_INPUT", "True").lower() == "true"
+    # Detector de rostros: haar o retinaface (weights/detection_Resnet50_Final.pth, en CPU; sin pesos usa haar)
+    FACE_DETECTOR = os.getenv("FACE_DETECTOR", "haar").lower()
+    # Lado máximo de la imagen donde se detecta (se baja de nivel en la pirámide; 0 = sin límite)
+    FACE_DETECT_MAX_SIDE = int(os.getenv("FACE_DETECT_MAX_SIDE", 0))
+    # Ampliar la imagen para buscar rostros más chicos que la ventana del detector
+    # (más recall sobre la entrada de un upscaling, al costo de detectar sobre una imagen hasta scale^2 más grande)
+    FACE_DETECT_UPSAMPLE = os.getenv("FACE_DETECT_UPSAMPLE", "False").lower() == "true"
+    # Confianza mínima de las detecciones de RetinaFace
+    FACE_DETECT_CONFIDENCE = float(os.getenv("FACE_DETECT_CONFIDENCE", 0.8))
+    # Videos: detectar rostros cada N frames o en cambios de escena y seguirlos entre detecciones
+    VIDEO_FACE_TRACKING = os.getenv("VIDEO_FACE_TRACKING", "True").lower() == "true"
+    VIDEO_FACE_DETECT_INTERVAL = int(os.getenv("VIDEO_FACE_DETECT_INTERVAL", 10))
+    # Diferencia media (0-255) entre frames consecutivos que se considera cambio de escena
+    VIDEO_SCENE_CHANGE_THRESHOLD = float(os.getenv("VIDEO_SCENE_CHANGE_THRESHOLD", 30.0))
+
+    # Cola persistente de trabajos de imagen
+    IMAGE_QUEUE_WORKERS = int(os.getenv("IMAGE_QUEUE_WORKERS", 1))
+    IMAGE_QUEUE_POLL_SECONDS = float(os.getenv("IMAGE_QUEUE_POLL_SECONDS", 1.0))
+    IMAGE_JOB_LEASE_SECONDS = int(os.getenv("IMAGE_JOB_LEASE_SECONDS", 300))
+    IMAGE_JOB_MAX_ATTEMPTS = int(os.getenv("IMAGE_JOB_MAX_ATTEMPTS", 3))
+    IMAGE_JOB_RETRY_DELAY_SECONDS = int(os.getenv("IMAGE_JOB_RETRY_DELAY_SECONDS", 10))
+
+    # Video: "streaming" (pipes de ffmpeg en memoria) o "frames" (PNG en disco)
+    VIDEO_PIPELINE = os.getenv("VIDEO_PIPELINE", "streaming").lower()
+    VIDEO_STREAM_BUFFER_FRAMES = int(os.getenv("VIDEO_STREAM_BUFFER_FRAMES", 8))
+    # Frames de video procesados en paralelo (0 = INFERENCE_WORKERS + 1)
+    VIDEO_PARALLEL_FRAMES = int(os.getenv("VIDEO_PARALLEL_FRAMES", 0))
+    # Slots del ring de memoria compartida para frames (modos process y pinned; 0 = frames en paralelo + 2)
+    VIDEO_FRAME_RING_SLOTS = int(os.getenv("VIDEO_FRAME_RING_SLOTS", 0))
+    # Frames iguales al anterior reutilizan su resultado (diferencia media maxima por bloque, 0-255;
+    # 0 = solo frames idénticos, sin pérdida; valores mayores reutilizan frames casi iguales)
+    VIDEO_DEDUP_FRAMES = os.getenv("VIDEO_DEDUP_FRAMES", "True").lower() == "true"
+    VIDEO_DEDUP_THRESHOLD = float(os.getenv("VIDEO_DEDUP_THRESHOLD", 0.0))
+    # Recalcular solo los tiles que cambiaron respecto del frame anterior (pipelines streaming y por segmentos).
+    # Con pérdida: las regiones se mejoran con solo tile_pad de contexto y se componen sin mezcla
+    VIDEO_INCREMENTAL_TILES = os.getenv("VIDEO_INCREMENTAL_TILES", "False").lower() == "true"
+    VIDEO_INCREMENTAL_TILE_SIZE = int(os.getenv("VIDEO_INCREMENTAL_TILE_SIZE", 64))
+    # Fraccion de tiles cambiados a partir de la cual se mejora el frame completo
+    VIDEO_INCREMENTAL_MAX_CHANGED = float(os.getenv("VIDEO_INCREMENTAL_MAX_CHANGED", 0.5))
+    # Videos de al menos 2 segmentos se dividen en keyframes y se procesan por segmento; los demás se
+    # codifican en chunks de esta duración que sirven de checkpoint (0 = desactivado)
+    VIDEO_SEGMENT_SECONDS = float(os.getenv("VIDEO_SEGMENT_SECONDS", 30))
+    # Segmentos procesados a la vez (0 = INFERENCE_WORKERS)
+    VIDEO_PARALLEL_SEGMENTS = int(os.getenv("VIDEO_PARALLEL_SEGMENTS", 0))
+    VIDEO_SEGMENT_MAX_ATTEMPTS = int(os.getenv("VIDEO_SEGMENT_MAX_ATTEMPTS", 2))
+
+    # Cola persistente de videos: los trabajos interrumpidos se retoman desde el último checkpoint
+    VIDEO_QUEUE_WORKERS = int(os.getenv("VIDEO_QUEUE_WORKERS", 1))
+    VIDEO_QUEUE_POLL_SECONDS = float(os.getenv("VIDEO_QUEUE_POLL_SECONDS", 2.0))
+    VIDEO_JOB_LEASE_SECONDS = int(os.getenv("VIDEO_JOB_LEASE_SECONDS", 120))
+    VIDEO_JOB_MAX_ATTEMPTS = int(os.getenv("VIDEO_JOB_MAX_ATTEMPTS", 3))
+    VIDEO_JOB_RETRY_DELAY_SECONDS = int(os.getenv("VIDEO_JOB_RETRY_DELAY_SECONDS", 30))
 
     # Storage
     MAX_IMAGE_SIZE_MB = int(os.getenv("MAX_IMAGE_SIZE_MB", 10))
+    MAX_VIDEO_SIZE_MB = int(os.getenv("MAX_VIDEO_SIZE_MB", 500))
     ALLOWED_IMAGE_FORMATS = os.getenv(
         "ALLOWED_IMAGE_FORMATS", "png,jpg,jpeg,webp"
     ).split(",")
@@ -7,13 +7,17 @@ from app.handlers.auth import (
 )
 from app.handlers.images import (
     ImageEnhanceHandler,
+    ImageUploadHandler,
     ImageListHandler,
     ImageDetailHandler,
+    ImageFileHandler,
 )
 from app.handlers.videos import (
     VideoEnhanceHandler,
+    VideoUploadHandler,
     VideoListHandler,
     VideoDetailHandler,
+    VideoFileHandler,
 )
 from app.handlers.health import HealthHandler, InfoHandler, ModelsHandler
 from app.handlers.swagger import SwaggerUIHandler, OpenAPISpecHandler
@@ -25,11 +29,15 @@ __all__ = [
     "LogoutHandler",
     "MeHandler",
     "ImageEnhanceHandler",
+    "ImageUploadHandler",
     "ImageListHandler",
     "ImageDetailHandler",
+    "ImageFileHandler",
     "VideoEnhanceHandler",
+    "VideoUploadHandler",
     "VideoListHandler",
     "VideoDetailHandler",
+    "VideoFileHandler",
     "HealthHandler",
     "InfoHandler",
     "ModelsHandler",
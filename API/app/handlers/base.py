@@ -1,7 +1,10 @@
 import json
-from typing import Optional, Any
+import os
+from typing import Dict, Optional, Any, Tuple
+from urllib.parse import quote
 import tornado.web
 from app.utils.security import decode_access_token
+from app.utils.uploads import MultipartStreamParser, UploadError, parse_boundary
 from app.models.user import TokenData
 
 
@@ -72,3 +75,199 @@ class AuthenticatedHandler(BaseHandler):
     def get_current_user_id(self) -> str:
         """Retorna el ID del usuario autenticado."""
         return self.current_user_data.user_id if self.current_user_data else None
+
+
+@tornado.web.stream_request_body
+class StreamingUploadHandler(AuthenticatedHandler):
+    """Handler autenticado que recibe un archivo binario por streaming.
+
+    Acepta multipart/form-data (un campo de archivo más campos de formulario)
+    o application/octet-stream (cuerpo crudo con los parámetros en el query
+    string). El archivo se escribe a disco a medida que llegan los chunks, sin
+    mantener el cuerpo completo en memoria.
+
+    Las subclases definen max_upload_bytes(), create_upload_path(filename)
+    y discard_upload(path).
+    """
+
+    # Margen para los headers y campos del formulario multipart
+    FORM_OVERHEAD_BYTES = 1024 * 1024
+
+    def prepare(self):
+        """Autentica y prepara la recepción del cuerpo."""
+        self.upload_path: Optional[str] = None
+        self.upload_filename: Optional[str] = None
+        self.upload_consumed = False
+        self._upload_file = None
+        self._upload_parser: Optional[MultipartStreamParser] = None
+        self._upload_error: Optional[str] = None
+        self._upload_error_status = 400
+        self._received_bytes = 0
+
+        super().prepare()
+        if self._finished or self.request.method != "POST":
+            return
+
+        max_body = self.max_upload_bytes() + self.FORM_OVERHEAD_BYTES
+        content_length = int(self.request.headers.get("Content-Length", 0) or 0)
+        if content_length > max_body:
+            self.write_error_json(self._too_large_message(), 413)
+            self.finish()
+            return
+        self.request.connection.set_max_body_size(max_body)
+
+        content_type = self.request.headers.get("Content-Type", "")
+        try:
+            if content_type.startswith("multipart/form-data"):
+                boundary = parse_boundary(content_type)
+                if not boundary:
+                    raise UploadError("Falta el boundary en Content-Type")
+                self._upload_parser = MultipartStreamParser(boundary, self._open_upload)
+            elif content_type.startswith("application/octet-stream"):
+                self._upload_file = self._open_upload(self.get_argument("filename", ""))
+            else:
+                self.write_error_json(
+                    "Content-Type debe ser multipart/form-data o application/octet-stream", 415
+                )
+                self.finish()
+        except UploadError as e:
+            self.write_error_json(str(e), 400)
+            self.finish()
+
+    def max_upload_bytes(self) -> int:
+        raise NotImplementedError
+
+    def create_upload_path(self, filename: str) -> str:
+        raise NotImplementedError
+
+    def discard_upload(self, path: str):
+        raise NotImplementedError
+
+    def _too_large_message(self) -> str:
+        return f"El archivo excede el tamaño máximo de {self.max_upload_bytes() // (1024 * 1024)}MB"
+
+    def _open_upload(self, filename: str):
+        """Crea el archivo destino para la subida."""
+        self.upload_filename = filename
+        self.upload_path = self.create_upload_path(filename)
+        return open(self.upload_path, "wb")
+
+    def data_received(self, chunk: bytes):
+        """Escribe cada chunk del cuerpo en disco."""
+        if self._finished or self._upload_error:
+            return
+        self._received_bytes += len(chunk)
+        try:
+            if self._received_bytes > self.max_upload_bytes() + self.FORM_OVERHEAD_BYTES:
+                self._upload_error_status = 413
+                raise UploadError(self._too_large_message())
+            if self._upload_parser is not None:
+                self._upload_parser.feed(chunk)
+            else:
+                self._upload_file.write(chunk)
+        except UploadError as e:
+            # Se sigue consumiendo el cuerpo pero sin escribirlo; post() responde el error
+            self._upload_error = str(e)
+            self._close_upload_file()
+
+    def _close_upload_file(self):
+        if self._upload_file is not None:
+            self._upload_file.close()
+            self._upload_file = None
+        if self._upload_parser is not None:
+            self._upload_parser.abort()
+
+    def finish_upload(self) -> Optional[Dict[str, str]]:
+        """Cierra la subida y retorna los parámetros del request.
+
+        Los campos del formulario tienen prioridad sobre el query string.
+        Retorna None (y escribe el error) si la subida no es válida.
+        """
+        if not self._upload_error and self._upload_parser is not None:
+            try:
+                self._upload_parser.close()
+            except UploadError as e:
+                self._upload_error = str(e)
+        self._close_upload_file()
+        if not self._upload_error and self.upload_path is None:
+            self._upload_error = "No se recibió ningún archivo"
+
+        if self._upload_error:
+            self.write_error_json(self._upload_error, self._upload_error_status)
+            return None
+
+        params = {name: self.get_argument(name) for name in self.request.query_arguments}
+        if self._upload_parser is not None:
+            params.update(self._upload_parser.fields)
+        if self.upload_filename and not params.get("filename"):
+            params["filename"] = self.upload_filename
+        return params
+
+    def on_finish(self):
+        """Elimina la subida si el servicio no la tomó."""
+        self._release_upload()
+
+    def on_connection_close(self):
+        self._release_upload()
+
+    def _release_upload(self):
+        self._close_upload_file()
+        if self.upload_path and not self.upload_consumed:
+            self.discard_upload(self.upload_path)
+            self.upload_path = None
+
+
+class MediaFileHandler(AuthenticatedHandler, tornado.web.StaticFileHandler):
+    """Descarga autenticada de archivos de /image_history.
+
+    Reutiliza StaticFileHandler para servir el archivo por chunks con
+    Content-Length, ETag, Range (206) y GET condicional (304). Las subclases
+    implementan get_file_info(media_id, kind) validando el dueño del archivo.
+    """
+
+    def initialize(self):
+        # El root real se fija por request a partir de la ruta del archivo
+        super().initialize(path="/")
+
+    async def get_file_info(self, media_id: str, kind: str) -> Optional[Tuple[str, str]]:
+        """Retorna (ruta en disco, nombre de descarga) o None si no existe."""
+        raise NotImplementedError
+
+    async def get(self, media_id: str, kind: str, include_body: bool = True):
+        """GET /api/{images|videos}/{id}/{original|enhanced} - Descarga el archivo."""
+        file_info = await self.get_file_info(media_id, kind)
+        if not file_info or not os.path.isfile(file_info[0]):
+            self.write_error_json("Archivo no encontrado", 404)
+            return
+
+        file_path, download_name = file_info
+        self.root = os.path.dirname(os.path.abspath(file_path))
+        self.set_header(
+            "Content-Disposition",
+            f"inline; filename*=UTF-8''{quote(download_name)}"
+        )
+        await super().get(os.path.basename(file_path), include_body)
+
+    async def head(self, media_id: str, kind: str):
+        await self.get(media_id, kind, include_body=False)
+
+    def set_default_headers(self):
+        super().set_default_headers()
+        self.set_header(
+            "Access-Control-Allow-Headers",
+            "Content-Type, Authorization, Range, If-None-Match, If-Modified-Since"
+        )
+        self.set_header("Access-Control-Allow-Methods", "GET, HEAD, OPTIONS")
+        self.set_header(
+            "Access-Control-Expose-Headers",
+            "Content-Length, Content-Range, Content-Disposition, Accept-Ranges, ETag"
+        )
+
+    def compute_etag(self) -> Optional[str]:
+        # mtime + tamaño: evita leer archivos grandes completos para calcular un hash
+        stat = os.stat(self.absolute_path)
+        return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    def set_extra_headers(self, path: str):
+        # Contenido privado: el navegador puede guardarlo pero debe revalidar con ETag
+        self.set_header("Cache-Control", "private, no-cache")
@@ -1,7 +1,12 @@
+import asyncio
 import torch
 from app.handlers.base import BaseHandler
 from app.database import db
 from app.models.image import ModelType, MODEL_CONFIG
+from app.services.image_service import image_service
+from app.services.inference_executor import inference_executor
+from app.services.job_queue import image_job_queue, video_job_queue
+from app.services.result_cache import result_cache
 
 
 class HealthHandler(BaseHandler):
@@ -32,6 +37,22 @@ class HealthHandler(BaseHandler):
         else:
             health_status["services"]["gpu"] = "not available (using CPU)"
 
+        # Estado del pool de inferencia y de las colas de imágenes y videos
+        health_status["inference"] = inference_executor.stats()
+        # En modos process y pinned cada worker tiene su propio registro de modelos
+        if inference_executor.mode == "thread":
+            health_status["models"] = image_service.model_registry.stats()
+        # La caché de resultados se consulta en el proceso del API (el primer stats escanea el disco)
+        health_status["result_cache"] = await asyncio.to_thread(result_cache.stats)
+        try:
+            health_status["image_queue"] = await image_job_queue.stats()
+        except Exception as e:
+            health_status["image_queue"] = f"error: {str(e)}"
+        try:
+            health_status["video_queue"] = await video_job_queue.stats()
+        except Exception as e:
+            health_status["video_queue"] = f"error: {str(e)}"
+
         self.write_json(health_status)
 
 
@@ -1,6 +1,7 @@
 from pydantic import ValidationError
-from app.handlers.base import AuthenticatedHandler
-from app.models.image import ImageEnhanceRequest
+from app.config import config
+from app.handlers.base import AuthenticatedHandler, MediaFileHandler, StreamingUploadHandler
+from app.models.image import ImageEnhanceParams, ImageEnhanceRequest
 from app.services.image_service import image_service
 
 
@@ -17,6 +18,19 @@ class ImageEnhanceHandler(AuthenticatedHandler):
             return
 
         user_id = self.get_current_user_id()
+
+        if request_data.async_processing:
+            result, error = await image_service.enqueue_image(user_id, request_data)
+            if error:
+                self.write_error_json(error, 400)
+                return
+
+            self.write_json({
+                "message": "Imagen recibida, procesamiento en cola. Consulte el estado con GET /api/images/{id}",
+                "image": result.model_dump()
+            }, 202)
+            return
+
         result, error = await image_service.enhance_image(user_id, request_data)
 
         if error:
@@ -29,6 +43,59 @@ class ImageEnhanceHandler(AuthenticatedHandler):
         }, 201)
 
 
+class ImageUploadHandler(StreamingUploadHandler):
+    """Handler para mejorar imágenes subidas en binario (multipart u octet-stream)."""
+
+    def max_upload_bytes(self) -> int:
+        return config.MAX_IMAGE_SIZE_MB * 1024 * 1024
+
+    def create_upload_path(self, filename: str) -> str:
+        return image_service.create_upload_path()
+
+    def discard_upload(self, path: str):
+        image_service._delete_file(path)
+
+    async def post(self):
+        """POST /api/images/upload - Mejora una imagen enviada como archivo binario."""
+        params = self.finish_upload()
+        if params is None:
+            return
+
+        try:
+            request_data = ImageEnhanceParams(**params)
+        except ValidationError as e:
+            self.write_error_json("Datos de imagen inválidos", 400, e.errors())
+            return
+
+        user_id = self.get_current_user_id()
+
+        # A partir de aquí el servicio es dueño del archivo subido
+        self.upload_consumed = True
+
+        if request_data.async_processing:
+            result, error = await image_service.enqueue_image(user_id, request_data, self.upload_path)
+            if error:
+                self.write_error_json(error, 400)
+                return
+
+            self.write_json({
+                "message": "Imagen recibida, procesamiento en cola. Consulte el estado con GET /api/images/{id}",
+                "image": result.model_dump()
+            }, 202)
+            return
+
+        result, error = await image_service.enhance_image(user_id, request_data, self.upload_path)
+
+        if error:
+            self.write_error_json(error, 400)
+            return
+
+        self.write_json({
+            "message": "Imagen procesada exitosamente",
+            "image": result.model_dump()
+        }, 201)
+
+
 class ImageListHandler(AuthenticatedHandler):
     """Handler para listar imágenes."""
 
@@ -56,9 +123,13 @@ class ImageDetailHandler(AuthenticatedHandler):
     """Handler para obtener/eliminar una imagen específica."""
 
     async def get(self, image_id: str):
-        """GET /api/images/{id} - Obtiene una imagen por ID."""
+        """GET /api/images/{id} - Obtiene una imagen por ID.
+
+        Con ?include_media=false omite el contenido base64 (solo metadata y URLs).
+        """
         user_id = self.get_current_user_id()
-        result = await image_service.get_image(image_id, user_id)
+        include_media = self.get_argument("include_media", "true").lower() != "false"
+        result = await image_service.get_image(image_id, user_id, include_media)
 
         if not result:
             self.write_error_json("Imagen no encontrada", 404)
@@ -76,3 +147,10 @@ class ImageDetailHandler(AuthenticatedHandler):
             return
 
         self.write_json({"message": "Imagen eliminada exitosamente"})
+
+
+class ImageFileHandler(MediaFileHandler):
+    """Handler para descargar el archivo original o mejorado de una imagen."""
+
+    async def get_file_info(self, media_id: str, kind: str):
+        return await image_service.get_image_file(media_id, self.get_current_user_id(), kind)
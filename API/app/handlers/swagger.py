@@ -113,7 +113,7 @@ OPENAPI_SPEC = {
             "post": {
                 "tags": ["Images"],
                 "summary": "Mejorar una imagen",
-                "description": "Procesa una imagen con Real-ESRGAN usando el modelo especificado",
+                "description": "Procesa una imagen con Real-ESRGAN usando el modelo especificado. Con async_processing=true la imagen se encola y se responde 202 inmediatamente",
                 "security": [{"bearerAuth": []}],
                 "requestBody": {
                     "required": True,
@@ -132,11 +132,60 @@ OPENAPI_SPEC = {
                             }
                         }
                     },
+                    "202": {"description": "Imagen encolada (async_processing=true), consultar estado con GET /api/images/{id}"},
                     "400": {"description": "Datos inválidos"},
                     "401": {"description": "No autorizado"}
                 }
             }
         },
+        "/api/images/upload": {
+            "post": {
+                "tags": ["Images"],
+                "summary": "Mejorar una imagen subida en binario",
+                "description": "Igual que /api/images/enhance pero recibe el archivo sin base64: multipart/form-data (campo de archivo + campos del formulario) o application/octet-stream (parámetros en el query string). El cuerpo se escribe a disco por streaming",
+                "security": [{"bearerAuth": []}],
+                "parameters": [
+                    {"name": "filename", "in": "query", "schema": {"type": "string"}},
+                    {"name": "model_type", "in": "query", "schema": {"type": "string"}},
+                    {"name": "scale", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "face_enhance", "in": "query", "schema": {"type": "boolean"}},
+                    {"name": "async_processing", "in": "query", "schema": {"type": "boolean"}},
+                    {"name": "priority", "in": "query", "schema": {"type": "integer"}}
+                ],
+                "requestBody": {
+                    "required": True,
+                    "content": {
+                        "multipart/form-data": {
+                            "schema": {
+                                "type": "object",
+                                "properties": {
+                                    "file": {"type": "string", "format": "binary"},
+                                    "description": {"type": "string"},
+                                    "model_type": {"type": "string"},
+                                    "scale": {"type": "integer"},
+                                    "face_enhance": {"type": "boolean"},
+                                    "output_width": {"type": "integer"},
+                                    "output_height": {"type": "integer"},
+                                    "async_processing": {"type": "boolean"},
+                                    "priority": {"type": "integer"}
+                                }
+                            }
+                        },
+                        "application/octet-stream": {
+                            "schema": {"type": "string", "format": "binary"}
+                        }
+                    }
+                },
+                "responses": {
+                    "201": {"description": "Imagen procesada exitosamente"},
+                    "202": {"description": "Imagen encolada (async_processing=true)"},
+                    "400": {"description": "Datos inválidos"},
+                    "401": {"description": "No autorizado"},
+                    "413": {"description": "El archivo excede MAX_IMAGE_SIZE_MB"},
+                    "415": {"description": "Content-Type no soportado"}
+                }
+            }
+        },
         "/api/images": {
             "get": {
                 "tags": ["Images"],
@@ -182,6 +231,12 @@ OPENAPI_SPEC = {
                         "in": "path",
                         "required": True,
                         "schema": {"type": "string"}
+                    },
+                    {
+                        "name": "include_media",
+                        "in": "query",
+                        "description": "false: solo metadata y URLs de descarga, sin base64",
+                        "schema": {"type": "boolean", "default": True}
                     }
                 ],
                 "responses": {
@@ -215,6 +270,27 @@ OPENAPI_SPEC = {
                 }
             }
         },
+        "/api/images/{id}/{kind}": {
+            "get": {
+                "tags": ["Images"],
+                "summary": "Descargar imagen original o mejorado",
+                "description": "Descarga el archivo por streaming con Content-Length, ETag, soporte de Range y GET condicional",
+                "security": [{"bearerAuth": []}],
+                "parameters": [
+                    {"name": "id", "in": "path", "required": True, "schema": {"type": "string"}},
+                    {"name": "kind", "in": "path", "required": True, "schema": {"type": "string", "enum": ["original", "enhanced"]}},
+                    {"name": "Range", "in": "header", "schema": {"type": "string"}, "description": "Rango de bytes, ej. bytes=0-1023"},
+                    {"name": "If-None-Match", "in": "header", "schema": {"type": "string"}}
+                ],
+                "responses": {
+                    "200": {"description": "Archivo binario"},
+                    "206": {"description": "Contenido parcial (Range)"},
+                    "304": {"description": "No modificado (ETag / If-Modified-Since)"},
+                    "404": {"description": "Imagen o archivo no encontrado"},
+                    "416": {"description": "Rango no satisfacible"}
+                }
+            }
+        },
         "/api/videos/enhance": {
             "post": {
                 "tags": ["Videos"],
@@ -243,6 +319,47 @@ OPENAPI_SPEC = {
                 }
             }
         },
+        "/api/videos/upload": {
+            "post": {
+                "tags": ["Videos"],
+                "summary": "Mejorar un video subido en binario",
+                "description": "Igual que /api/videos/enhance pero recibe el archivo sin base64 (multipart/form-data o application/octet-stream con ?filename=). El video se escribe directamente en la carpeta de procesamiento",
+                "security": [{"bearerAuth": []}],
+                "parameters": [
+                    {"name": "filename", "in": "query", "schema": {"type": "string"}},
+                    {"name": "model_type", "in": "query", "schema": {"type": "string"}},
+                    {"name": "scale", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "face_enhance", "in": "query", "schema": {"type": "boolean"}}
+                ],
+                "requestBody": {
+                    "required": True,
+                    "content": {
+                        "multipart/form-data": {
+                            "schema": {
+                                "type": "object",
+                                "properties": {
+                                    "file": {"type": "string", "format": "binary"},
+                                    "description": {"type": "string"},
+                                    "model_type": {"type": "string"},
+                                    "scale": {"type": "integer"},
+                                    "face_enhance": {"type": "boolean"}
+                                }
+                            }
+                        },
+                        "application/octet-stream": {
+                            "schema": {"type": "string", "format": "binary"}
+                        }
+                    }
+                },
+                "responses": {
+                    "202": {"description": "Video recibido, procesamiento iniciado"},
+                    "400": {"description": "Datos invalidos"},
+                    "401": {"description": "No autorizado"},
+                    "413": {"description": "El archivo excede MAX_VIDEO_SIZE_MB"},
+                    "415": {"description": "Content-Type no soportado"}
+                }
+            }
+        },
         "/api/videos": {
             "get": {
                 "tags": ["Videos"],
@@ -289,6 +406,12 @@ OPENAPI_SPEC = {
                         "in": "path",
                         "required": True,
                         "schema": {"type": "string"}
+                    },
+                    {
+                        "name": "include_media",
+                        "in": "query",
+                        "description": "false: solo metadata y URLs de descarga, sin base64",
+                        "schema": {"type": "boolean", "default": True}
                     }
                 ],
                 "responses": {
@@ -322,6 +445,27 @@ OPENAPI_SPEC = {
                 }
             }
         },
+        "/api/videos/{id}/{kind}": {
+            "get": {
+                "tags": ["Videos"],
+                "summary": "Descargar video original o mejorado",
+                "description": "Descarga el video completado por streaming con Content-Length, ETag, soporte de Range (reproducción con seek) y GET condicional",
+                "security": [{"bearerAuth": []}],
+                "parameters": [
+                    {"name": "id", "in": "path", "required": True, "schema": {"type": "string"}},
+                    {"name": "kind", "in": "path", "required": True, "schema": {"type": "string", "enum": ["original", "enhanced"]}},
+                    {"name": "Range", "in": "header", "schema": {"type": "string"}, "description": "Rango de bytes, ej. bytes=0-1023"},
+                    {"name": "If-None-Match", "in": "header", "schema": {"type": "string"}}
+                ],
+                "responses": {
+                    "200": {"description": "Archivo binario"},
+                    "206": {"description": "Contenido parcial (Range)"},
+                    "304": {"description": "No modificado (ETag / If-Modified-Since)"},
+                    "404": {"description": "Video no encontrado o no completado"},
+                    "416": {"description": "Rango no satisfacible"}
+                }
+            }
+        },
         "/api/health": {
             "get": {
                 "tags": ["System"],
@@ -460,6 +604,18 @@ OPENAPI_SPEC = {
                     "output_height": {
                         "type": "integer",
                         "description": "Alto de salida deseado"
+                    },
+                    "async_processing": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Encolar el procesamiento y responder 202 inmediatamente"
+                    },
+                    "priority": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "maximum": 10,
+                        "default": 0,
+                        "description": "Prioridad en la cola (mayor se procesa primero)"
                     }
                 }
             },
@@ -479,6 +635,9 @@ OPENAPI_SPEC = {
                     "status": {"type": "string"},
                     "processing_time_ms": {"type": "integer"},
                     "gpu_used": {"type": "boolean"},
+                    "cache_hit": {"type": "boolean", "description": "Resultado reutilizado de la caché"},
+                    "faces_detected": {"type": "integer", "description": "Rostros restaurados con GFPGAN (solo con face_enhance)"},
+                    "gfpgan_time_ms": {"type": "integer", "description": "Tiempo de GFPGAN en milisegundos (solo con face_enhance)"},
                     "created_at": {"type": "string", "format": "date-time"},
                     "completed_at": {"type": "string", "format": "date-time"}
                 }
@@ -491,6 +650,8 @@ OPENAPI_SPEC = {
                         "properties": {
                             "original_base64": {"type": "string"},
                             "enhanced_base64": {"type": "string"},
+                            "original_url": {"type": "string"},
+                            "enhanced_url": {"type": "string"},
                             "error_message": {"type": "string"}
                         }
                     }
@@ -564,6 +725,11 @@ OPENAPI_SPEC = {
                     "processing_time_ms": {"type": "integer"},
                     "gpu_used": {"type": "boolean"},
                     "frames_processed": {"type": "integer"},
+                    "processing_fps": {"type": "number", "description": "Frames mejorados por segundo"},
+                    "frames_skipped": {"type": "integer", "description": "Frames repetidos que reutilizaron el frame mejorado anterior"},
+                    "tiles_recomputed_pct": {"type": "number", "description": "Porcentaje de tiles recalculados (mejora incremental)"},
+                    "faces_detected": {"type": "integer", "description": "Rostros restaurados con GFPGAN en todos los frames (solo con face_enhance)"},
+                    "gfpgan_time_ms": {"type": "integer", "description": "Tiempo total de GFPGAN en milisegundos (solo con face_enhance)"},
                     "created_at": {"type": "string", "format": "date-time"},
                     "completed_at": {"type": "string", "format": "date-time"}
                 }
@@ -575,7 +741,9 @@ OPENAPI_SPEC = {
                         "type": "object",
                         "properties": {
                             "original_base64": {"type": "string"},
-                            "enhanced_base64": {"type": "string"}
+                            "enhanced_base64": {"type": "string"},
+                            "original_url": {"type": "string"},
+                            "enhanced_url": {"type": "string"}
                         }
                     }
                 ]
@@ -1,7 +1,10 @@
+import os
 from pydantic import ValidationError
-from app.handlers.base import AuthenticatedHandler
-from app.models.video import VideoEnhanceRequest
+from app.config import config
+from app.handlers.base import AuthenticatedHandler, MediaFileHandler, StreamingUploadHandler
+from app.models.video import VIDEO_EXTENSIONS, VideoEnhanceParams, VideoEnhanceRequest
 from app.services.video_service import video_service
+from app.utils.uploads import UploadError
 
 
 class VideoEnhanceHandler(AuthenticatedHandler):
@@ -29,6 +32,54 @@ class VideoEnhanceHandler(AuthenticatedHandler):
         }, 202)
 
 
+class VideoUploadHandler(StreamingUploadHandler):
+    """Handler para mejorar videos subidos en binario (multipart u octet-stream).
+
+    El video se escribe directamente en la carpeta de procesamiento.
+    """
+
+    def max_upload_bytes(self) -> int:
+        return config.MAX_VIDEO_SIZE_MB * 1024 * 1024
+
+    def create_upload_path(self, filename: str) -> str:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in VIDEO_EXTENSIONS:
+            raise UploadError(
+                f"Extension de video no soportada: '{extension}'. "
+                f"Permitidas: {', '.join(sorted(VIDEO_EXTENSIONS))}"
+            )
+        return video_service.create_upload_path(filename)
+
+    def discard_upload(self, path: str):
+        video_service.discard_upload(path)
+
+    async def post(self):
+        """POST /api/videos/upload - Inicia el procesamiento de un video binario."""
+        params = self.finish_upload()
+        if params is None:
+            return
+
+        try:
+            request_data = VideoEnhanceParams(**params)
+        except ValidationError as e:
+            self.write_error_json("Datos de video invalidos", 400, e.errors())
+            return
+
+        user_id = self.get_current_user_id()
+        self.upload_consumed = True
+        result, error = await video_service.enhance_video(user_id, request_data, self.upload_path)
+
+        if error:
+            video_service.discard_upload(self.upload_path)
+            self.write_error_json(error, 400)
+            return
+
+        self.write_json({
+            "message": "Video recibido, procesamiento iniciado. Consulte el estado con GET /api/videos/{id}",
+            "video": result.model_dump()
+        }, 202)
+
+
 class VideoListHandler(AuthenticatedHandler):
     """Handler para listar videos."""
 
@@ -56,9 +107,13 @@ class VideoDetailHandler(AuthenticatedHandler):
     """Handler para obtener/eliminar un video especifico."""
 
     async def get(self, video_id: str):
-        """GET /api/videos/{id} - Obtiene un video por ID."""
+        """GET /api/videos/{id} - Obtiene un video por ID.
+
+        Con ?include_media=false omite el contenido base64 (solo metadata y URLs).
+        """
         user_id = self.get_current_user_id()
-        result = await video_service.get_video(video_id, user_id)
+        include_media = self.get_argument("include_media", "true").lower() != "false"
+        result = await video_service.get_video(video_id, user_id, include_media)
 
         if not result:
             self.write_error_json("Video no encontrado", 404)
@@ -76,3 +131,10 @@ class VideoDetailHandler(AuthenticatedHandler):
             return
 
         self.write_json({"message": "Video eliminado exitosamente"})
+
+
+class VideoFileHandler(MediaFileHandler):
+    """Handler para descargar el video original o mejorado (solo completados)."""
+
+    async def get_file_info(self, media_id: str, kind: str):
+        return await video_service.get_video_file(media_id, self.get_current_user_id(), kind)
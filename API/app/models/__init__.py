@@ -11,6 +11,7 @@ from app.models.image import (
     ImageStatus,
     ModelType,
     MODEL_CONFIG,
+    ImageEnhanceParams,
     ImageEnhanceRequest,
     ImageRecord,
     ImageResponse,
@@ -21,6 +22,7 @@ from app.models.video import (
     VideoStatus,
     VIDEO_EXTENSIONS,
     IMAGE_EXTENSIONS,
+    VideoEnhanceParams,
     VideoEnhanceRequest,
     VideoRecord,
     VideoResponse,
@@ -39,6 +41,7 @@ __all__ = [
     "ImageStatus",
     "ModelType",
     "MODEL_CONFIG",
+    "ImageEnhanceParams",
     "ImageEnhanceRequest",
     "ImageRecord",
     "ImageResponse",
@@ -47,6 +50,7 @@ __all__ = [
     "VideoStatus",
     "VIDEO_EXTENSIONS",
     "IMAGE_EXTENSIONS",
+    "VideoEnhanceParams",
     "VideoEnhanceRequest",
     "VideoRecord",
     "VideoResponse",
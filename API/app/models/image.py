@@ -28,7 +28,9 @@ class ModelType(str, Enum):
     GENERAL_V3 = "general_v3"      # realesr-general-x4v3 - General compacto
 
 
-# Configuración de cada modelo
+# Configuración de cada modelo.
+# precision: fp32, bf16, fp16 (solo GPU) o int8 (solo SRVGGNetCompact en CPU);
+# channels_last: ejecutar las convoluciones en formato de memoria NHWC.
 MODEL_CONFIG = {
     ModelType.GENERAL_X4: {
         "filename": "RealESRGAN_x4plus.pth",
@@ -37,6 +39,8 @@ MODEL_CONFIG = {
         "num_feat": 64,
         "num_grow_ch": 32,
         "description": "Modelo general para fotos reales - Alta calidad, escala 4x",
+        "precision": "fp32",
+        "channels_last": True,
     },
     ModelType.GENERAL_X2: {
         "filename": "RealESRGAN_x2plus.pth",
@@ -45,6 +49,8 @@ MODEL_CONFIG = {
         "num_feat": 64,
         "num_grow_ch": 32,
         "description": "Modelo general para fotos reales - Escala 2x",
+        "precision": "fp32",
+        "channels_last": True,
     },
     ModelType.ANIME: {
         "filename": "RealESRGAN_x4plus_anime_6B.pth",
@@ -53,6 +59,8 @@ MODEL_CONFIG = {
         "num_feat": 64,
         "num_grow_ch": 32,
         "description": "Optimizado para anime e ilustraciones - Más rápido",
+        "precision": "fp32",
+        "channels_last": True,
     },
     ModelType.ANIME_VIDEO: {
         "filename": "realesr-animevideov3.pth",
@@ -62,6 +70,8 @@ MODEL_CONFIG = {
         "num_grow_ch": 32,
         "num_conv": 16,  # Arquitectura VGG-style
         "description": "Modelo para video anime - También funciona con imágenes",
+        "precision": "fp32",
+        "channels_last": True,
     },
     ModelType.GENERAL_V3: {
         "filename": "realesr-general-x4v3.pth",
@@ -71,13 +81,14 @@ MODEL_CONFIG = {
         "num_grow_ch": 32,
         "num_conv": 32,  # Arquitectura VGG-style
         "description": "Modelo general compacto v3 - Rápido y eficiente",
+        "precision": "fp32",
+        "channels_last": True,
     },
 }
 
 
-class ImageEnhanceRequest(BaseModel):
-    """Request para mejorar una imagen."""
-    image_base64: str = Field(..., description="Imagen codificada en base64")
+class ImageEnhanceParams(BaseModel):
+    """Parámetros de mejora de una imagen (comunes a JSON y subida binaria)."""
     filename: Optional[str] = Field(None, description="Nombre del archivo original")
     description: Optional[str] = Field(
         None,
@@ -99,6 +110,21 @@ class ImageEnhanceRequest(BaseModel):
     )
     output_width: Optional[int] = Field(None, ge=1, description="Ancho de salida deseado (opcional)")
     output_height: Optional[int] = Field(None, ge=1, description="Alto de salida deseado (opcional)")
+    async_processing: Optional[bool] = Field(
+        False,
+        description="Encolar el procesamiento y responder inmediatamente (202) sin esperar el resultado"
+    )
+    priority: Optional[int] = Field(
+        0,
+        ge=0,
+        le=10,
+        description="Prioridad en la cola (0-10, mayor se procesa primero). Solo con async_processing"
+    )
+
+
+class ImageEnhanceRequest(ImageEnhanceParams):
+    """Request JSON para mejorar una imagen codificada en base64."""
+    image_base64: str = Field(..., description="Imagen codificada en base64")
 
 
 class ImageRecord(BaseModel):
@@ -122,6 +148,11 @@ class ImageRecord(BaseModel):
     error_message: Optional[str] = None
     processing_time_ms: Optional[int] = None
     gpu_used: Optional[bool] = None
+    # True si el resultado se reutilizó de la caché de resultados
+    cache_hit: Optional[bool] = None
+    # Rostros restaurados con GFPGAN y tiempo de GFPGAN (None sin face enhancement)
+    faces_detected: Optional[int] = None
+    gfpgan_time_ms: Optional[int] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
 
@@ -145,6 +176,9 @@ class ImageResponse(BaseModel):
     status: str
     processing_time_ms: Optional[int]
     gpu_used: Optional[bool]
+    cache_hit: Optional[bool] = None
+    faces_detected: Optional[int] = None
+    gfpgan_time_ms: Optional[int] = None
     created_at: datetime
     completed_at: Optional[datetime]
 
@@ -153,9 +187,11 @@ class ImageResponse(BaseModel):
 
 
 class ImageDetailResponse(ImageResponse):
-    """Respuesta detallada con las imágenes en base64."""
+    """Respuesta detallada con las imágenes en base64 (omitidas con include_media=false)."""
     original_base64: Optional[str] = None
     enhanced_base64: Optional[str] = None
+    original_url: Optional[str] = None
+    enhanced_url: Optional[str] = None
     error_message: Optional[str] = None
 
 
@@ -21,9 +21,8 @@ VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp', '.gif'}
 
 
-class VideoEnhanceRequest(BaseModel):
-    """Request para mejorar un video."""
-    video_base64: str = Field(..., description="Video codificado en base64")
+class VideoEnhanceParams(BaseModel):
+    """Parametros de mejora de un video (comunes a JSON y subida binaria)."""
     filename: str = Field(..., description="Nombre del archivo original con extension")
     description: Optional[str] = Field(
         None,
@@ -45,6 +44,11 @@ class VideoEnhanceRequest(BaseModel):
     )
 
 
+class VideoEnhanceRequest(VideoEnhanceParams):
+    """Request JSON para mejorar un video codificado en base64."""
+    video_base64: str = Field(..., description="Video codificado en base64")
+
+
 class VideoRecord(BaseModel):
     """Modelo para el registro de video en MongoDB."""
     id: Optional[str] = Field(default=None, alias="_id")
@@ -72,6 +76,12 @@ class VideoRecord(BaseModel):
     processing_time_ms: Optional[int] = None
     gpu_used: Optional[bool] = None
     frames_processed: Optional[int] = None
+    processing_fps: Optional[float] = None
+    frames_skipped: Optional[int] = None
+    tiles_recomputed_pct: Optional[float] = None
+    # Rostros restaurados con GFPGAN en todos los frames y tiempo total de GFPGAN
+    faces_detected: Optional[int] = None
+    gfpgan_time_ms: Optional[int] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
 
@@ -100,6 +110,11 @@ class VideoResponse(BaseModel):
     processing_time_ms: Optional[int]
     gpu_used: Optional[bool]
     frames_processed: Optional[int]
+    processing_fps: Optional[float] = None
+    frames_skipped: Optional[int] = None
+    tiles_recomputed_pct: Optional[float] = None
+    faces_detected: Optional[int] = None
+    gfpgan_time_ms: Optional[int] = None
     created_at: datetime
     completed_at: Optional[datetime]
 
@@ -108,9 +123,11 @@ class VideoResponse(BaseModel):
 
 
 class VideoDetailResponse(VideoResponse):
-    """Respuesta detallada con los videos en base64."""
+    """Respuesta detallada con los videos en base64 (omitidos con include_media=false)."""
     original_base64: Optional[str] = None
     enhanced_base64: Optional[str] = None
+    original_url: Optional[str] = None
+    enhanced_url: Optional[str] = None
 
 
 class VideoListResponse(BaseModel):
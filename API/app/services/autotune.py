@@ -0,0 +1,214 @@
+import json
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import torch
+
+from app.services.precision import input_dtype
+
+# Candidatos por defecto de la calibración
+DEFAULT_TILE_SIZES = (128, 192, 256, 384, 512)
+DEFAULT_BATCH_SIZES = (1, 2, 4)
+
+
+@contextmanager
+def intra_op_threads(num_threads: int):
+    """Fija los threads intra-op de torch durante el bloque (0 = sin cambios).
+
+    El valor se aplica en el hilo que ejecuta la inferencia y se restaura al
+    salir, de modo que cada modelo corre con sus propios threads.
+    """
+    previous = torch.get_num_threads()
+    if num_threads <= 0 or num_threads == previous:
+        yield
+        return
+    torch.set_num_threads(num_threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+def available_cores() -> int:
+    """Cores disponibles para este proceso (respeta la afinidad de CPU)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def thread_candidates(workers: int = 1) -> List[int]:
+    """Threads a probar: fracciones de los cores que le corresponden a cada worker."""
+    budget = max(1, available_cores() // max(1, workers))
+    return sorted({max(1, budget // divisor) for divisor in (4, 2, 1)})
+
+
+def _cpu_model() -> str:
+    """Nombre del procesador (en Linux desde /proc/cpuinfo)."""
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def host_signature(device: torch.device) -> dict:
+    """Identifica el host: un perfil calibrado en otra máquina no se reutiliza."""
+    signature = {
+        "cpu": _cpu_model(),
+        "cores": available_cores(),
+        "torch_version": torch.__version__,
+    }
+    if device.type == "cuda":
+        signature["gpu"] = torch.cuda.get_device_name(device)
+    return signature
+
+
+class TuningProfile:
+    """Perfil persistido con los parámetros calibrados por modelo para este host.
+
+    El archivo JSON guarda la firma del host y, por modelo, el tamaño de tile,
+    los tiles por forward y los threads ganadores junto con el dispositivo y
+    la precisión con que se midieron. Se recarga si el archivo cambia (otro
+    proceso pudo haberlo recalibrado).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: dict = {}
+        self._mtime_ns: Optional[int] = None
+
+    def _refresh(self):
+        """Relee el archivo si cambió desde la última lectura."""
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self._data, self._mtime_ns = {}, None
+            return
+        if mtime_ns == self._mtime_ns:
+            return
+        try:
+            with open(self.path) as profile_file:
+                self._data = json.load(profile_file)
+        except (OSError, ValueError) as e:
+            print(f"Perfil de autotuning inválido ({self.path}): {e}")
+            self._data = {}
+        self._mtime_ns = mtime_ns
+
+    def get(self, model_type: str, device: torch.device, precision: str) -> Optional[dict]:
+        """Parámetros calibrados para el modelo o None si no hay o no corresponden."""
+        with self._lock:
+            self._refresh()
+            entry = self._data.get("models", {}).get(model_type)
+            hosts = self._data.get("hosts", {})
+            if entry is None or hosts.get(device.type) != host_signature(device):
+                return None
+            if entry.get("device") != device.type or entry.get("precision") != precision:
+                return None
+            return entry
+
+    def update(self, model_type: str, device: torch.device, entry: dict):
+        """Guarda los parámetros de un modelo (escritura atómica)."""
+        with self._lock:
+            self._refresh()
+            data = dict(self._data)
+            data.setdefault("hosts", {})[device.type] = host_signature(device)
+            data.setdefault("models", {})[model_type] = entry
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as profile_file:
+                json.dump(data, profile_file, indent=2)
+            os.replace(tmp_path, self.path)
+            self._data = data
+            self._mtime_ns = os.stat(self.path).st_mtime_ns
+
+
+def _synchronize(device: torch.device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def measure_throughput(upscaler, tile_size: int, batch_size: int, num_threads: int,
+                       repeat: int = 3) -> Optional[float]:
+    """Píxeles de entrada útiles por segundo con un tile, lote y threads dados.
+
+    Mide forwards de lotes de tiles con su contexto (tile + 2 * pad), que es lo
+    que ejecuta el tiling: el contexto descartado cuenta como costo. Retorna
+    None si la combinación no cabe en memoria.
+    """
+    window = tile_size + 2 * upscaler.tile_pad
+    memory_format = torch.channels_last if upscaler.channels_last else torch.contiguous_format
+    tiles = torch.rand(batch_size, 3, window, window, device=upscaler.device)
+    tiles = tiles.to(dtype=input_dtype(upscaler.precision), memory_format=memory_format)
+    try:
+        with torch.no_grad(), intra_op_threads(num_threads):
+            upscaler.model(tiles)  # calentamiento
+            _synchronize(upscaler.device)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                upscaler.model(tiles)
+            _synchronize(upscaler.device)
+            elapsed = (time.perf_counter() - start) / repeat
+    except RuntimeError as e:
+        if "out of memory" not in str(e).lower():
+            raise
+        if upscaler.device.type == "cuda":
+            torch.cuda.empty_cache()
+        return None
+    return batch_size * tile_size * tile_size / elapsed
+
+
+def autotune_upscaler(upscaler, tile_sizes=DEFAULT_TILE_SIZES, batch_sizes=DEFAULT_BATCH_SIZES,
+                      threads: Optional[List[int]] = None, repeat: int = 3) -> Optional[dict]:
+    """Busca el tile, lote y threads más rápidos para el modelo cargado.
+
+    La búsqueda es por coordenadas para acotar el tiempo de calibración:
+    primero el tamaño de tile (lote 1, máximo de threads), luego el lote con
+    ese tile y por último los threads. En GPU no se calibran threads.
+    Retorna la entrada del perfil o None si el modelo no está cargado.
+    """
+    if not upscaler._model_loaded or upscaler.model is None:
+        return None
+    if upscaler.device.type == "cuda":
+        threads = [0]
+    else:
+        threads = sorted(set(threads or thread_candidates()))
+
+    results: Dict[tuple, Optional[float]] = {}
+
+    def throughput(tile_size: int, batch_size: int, num_threads: int) -> float:
+        key = (tile_size, batch_size, num_threads)
+        if key not in results:
+            results[key] = measure_throughput(upscaler, tile_size, batch_size, num_threads, repeat)
+            if results[key] is not None:
+                print(f"  tile={tile_size} batch={batch_size} threads={num_threads or '-'}: "
+                      f"{results[key] / 1e6:.3f} MP/s")
+        return results[key] or 0.0
+
+    max_threads = threads[-1]
+    best_tile = max(tile_sizes, key=lambda t: throughput(t, 1, max_threads))
+    best_batch = max(batch_sizes, key=lambda b: throughput(best_tile, b, max_threads))
+    best_threads = max(threads, key=lambda n: throughput(best_tile, best_batch, n))
+    best = throughput(best_tile, best_batch, best_threads)
+    if best == 0.0:
+        return None
+
+    return {
+        "tile_size": best_tile,
+        "tile_batch_size": best_batch,
+        "num_threads": best_threads,
+        "mp_per_s": round(best / 1e6, 4),
+        "device": upscaler.device.type,
+        "precision": upscaler.requested_precision,
+        "tuned_at": datetime.utcnow().isoformat(),
+    }
@@ -0,0 +1,85 @@
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Optional
+
+import torch
+import torch.nn as nn
+
+# Modos de compilación: none (eager), torchscript (artefacto trazado) o inductor (torch.compile)
+COMPILE_MODES = ("none", "torchscript", "inductor")
+
+_METADATA_FILE = "metadata.json"
+
+
+def artifact_path(compiled_dir: str, weights_filename: str, net_scale: int,
+                  precision: str, channels_last: bool, device: torch.device) -> str:
+    """Ruta del artefacto TorchScript para una combinación de modelo y modo de ejecución."""
+    stem = Path(weights_filename).stem
+    layout = "_cl" if channels_last else ""
+    return os.path.join(compiled_dir, f"{stem}_x{net_scale}_{precision}{layout}_{device.type}.ts")
+
+
+def artifact_metadata(weights_path: str, precision: str) -> dict:
+    """Metadata que debe coincidir para reutilizar un artefacto (pesos y versión de torch)."""
+    stat = os.stat(weights_path)
+    return {
+        "weights_mtime_ns": stat.st_mtime_ns,
+        "weights_size": stat.st_size,
+        "torch_version": torch.__version__,
+        "precision": precision,
+    }
+
+
+def load_torchscript(path: str, device: torch.device, weights_path: str) -> Optional[tuple]:
+    """Carga un artefacto TorchScript si existe y corresponde a los pesos actuales.
+
+    Retorna (módulo, precisión efectiva) o None si hay que regenerarlo.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        extra_files = {_METADATA_FILE: ""}
+        with warnings.catch_warnings():
+            # torch.jit emite avisos de deprecación en versiones recientes
+            warnings.simplefilter("ignore")
+            module = torch.jit.load(path, map_location=device, _extra_files=extra_files)
+        metadata = json.loads(extra_files[_METADATA_FILE])
+    except Exception as e:
+        print(f"Artefacto compilado inválido ({path}): {e}")
+        return None
+
+    expected = artifact_metadata(weights_path, metadata.get("precision", "fp32"))
+    if metadata != expected:
+        print(f"Artefacto compilado desactualizado: {os.path.basename(path)}")
+        return None
+    return module.eval(), metadata["precision"]
+
+
+def save_torchscript(model: nn.Module, example: torch.Tensor, path: str,
+                     weights_path: str, precision: str) -> nn.Module:
+    """Traza el modelo con una entrada de ejemplo y guarda el artefacto.
+
+    El grafo trazado no depende del tamaño de la entrada, por lo que sirve
+    también para los tiles del borde y para imágenes menores que un tile.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    metadata = artifact_metadata(weights_path, precision)
+    with warnings.catch_warnings(), torch.no_grad():
+        warnings.simplefilter("ignore")
+        traced = torch.jit.trace(model, example)
+        torch.jit.save(traced, tmp_path, _extra_files={_METADATA_FILE: json.dumps(metadata)})
+    os.replace(tmp_path, path)
+    return traced
+
+
+def compile_inductor(model: nn.Module, cache_dir: str) -> nn.Module:
+    """Compila el modelo con torch.compile persistiendo los kernels en cache_dir.
+
+    Los procesos siguientes reutilizan los kernels de la caché de inductor y
+    evitan la compilación completa.
+    """
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.join(cache_dir, "inductor"))
+    return torch.compile(model)
@@ -0,0 +1,351 @@
+import math
+import os
+import threading
+from itertools import product
+from typing import List, Optional
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from app.config import config
+
+WEIGHTS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'weights')
+
+# Backends disponibles para FACE_DETECTOR
+FACE_DETECTOR_BACKENDS = ("haar", "retinaface")
+
+
+def pyramid_level(width: int, height: int, min_size: int, native_min_size: int,
+                  max_side: int = 0) -> int:
+    """Nivel de la pirámide gaussiana (cada nivel es la mitad del anterior) donde detectar.
+
+    Se baja mientras el rostro más chico buscado (min_size) siga siendo al
+    menos el mínimo que el detector encuentra (native_min_size); si min_size
+    es menor que ese mínimo el nivel es negativo (la imagen se amplía). Con
+    max_side se sigue bajando hasta que el lado mayor no lo supere.
+    """
+    level = int(math.floor(math.log2(max(min_size, 1) / native_min_size)))
+    if max_side > 0:
+        while max(width, height) / 2 ** level > max_side:
+            level += 1
+    return level
+
+
+class FaceDetector:
+    """Base de los detectores de rostros.
+
+    detect() reduce (o amplía) la imagen al nivel de la pirámide que
+    corresponde al tamaño mínimo de rostro buscado (y a max_side), detecta
+    ahí y escala las cajas a la imagen original. Sin upsample el rostro
+    mínimo se limita a native_min_size, por lo que nunca se amplía la imagen:
+    al detectar sobre la entrada de un upscaling el costo es el de la entrada
+    y no el de la imagen mejorada. Las llamadas se serializan con un lock,
+    por lo que una misma instancia puede compartirse entre hilos.
+    """
+
+    name = "base"
+    # Menor rostro (pixeles) que el detector encuentra en su resolución de trabajo
+    native_min_size = 24
+
+    def __init__(self, max_side: int = 0, upsample: bool = False):
+        self.max_side = max_side
+        self.upsample = upsample
+        self._lock = threading.Lock()
+
+    def min_face_size(self, min_size: int) -> int:
+        """Rostro mínimo que detect() busca para min_size (sin upsample, al menos native_min_size)."""
+        return max(1, min_size) if self.upsample else max(min_size, self.native_min_size)
+
+    def detect(self, img: np.ndarray, min_size: int = 30, rgb: bool = False) -> np.ndarray:
+        """Retorna las cajas (x, y, ancho, alto) de los rostros de img (BGR, o RGB con rgb=True)."""
+        if img is None:
+            return np.zeros((0, 4), dtype=np.int32)
+
+        height, width = img.shape[:2]
+        min_size = self.min_face_size(min_size)
+        level = pyramid_level(width, height, min_size, self.native_min_size, self.max_side)
+        small = img
+        for _ in range(level):
+            small = cv2.pyrDown(small)
+        for _ in range(-level):
+            small = cv2.pyrUp(small)
+        factor = 2.0 ** level
+
+        with self._lock:
+            boxes = self._detect(small, max(1, int(round(min_size / factor))), rgb)
+        return np.round(np.asarray(boxes, dtype=np.float32).reshape(-1, 4) * factor).astype(np.int32)
+
+    def _detect(self, img: np.ndarray, min_size: int, rgb: bool) -> np.ndarray:
+        """Detecta sobre img ya escalada al nivel; retorna cajas (x, y, ancho, alto) en sus pixeles."""
+        raise NotImplementedError
+
+
+class HaarFaceDetector(FaceDetector):
+    """Detector de rostros con el clasificador Haar de OpenCV."""
+
+    name = "haar"
+    # Ventana de entrenamiento del cascade frontal
+    native_min_size = 24
+
+    def __init__(self, max_side: int = 0, upsample: bool = False):
+        super().__init__(max_side, upsample)
+        self.face_cascade = None
+        try:
+            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+            self.face_cascade = cv2.CascadeClassifier(cascade_path)
+        except Exception as e:
+            print(f"Error cargando detector de rostros: {e}")
+            self.face_cascade = None
+
+    def _detect(self, img: np.ndarray, min_size: int, rgb: bool) -> np.ndarray:
+        if self.face_cascade is None:
+            return np.zeros((0, 4), dtype=np.int32)
+
+        # Convertir a escala de grises para detección
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY)
+
+        faces = self.face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=(min_size, min_size)
+        )
+        return np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+
+
+def _conv_bn(inp: int, oup: int, kernel: int = 3, leaky: Optional[float] = 0.0) -> nn.Sequential:
+    """Conv + BatchNorm (+ LeakyReLU si leaky no es None), como en facexlib."""
+    layers = [nn.Conv2d(inp, oup, kernel, 1, kernel // 2, bias=False), nn.BatchNorm2d(oup)]
+    if leaky is not None:
+        layers.append(nn.LeakyReLU(negative_slope=leaky, inplace=True))
+    return nn.Sequential(*layers)
+
+
+class Bottleneck(nn.Module):
+    """Bloque bottleneck de ResNet50 (stride en la conv 3x3)."""
+
+    def __init__(self, inplanes: int, planes: int, stride: int = 1):
+        super().__init__()
+        self.conv1 = nn.Conv2d(inplanes, planes, 1, bias=False)
+        self.bn1 = nn.BatchNorm2d(planes)
+        self.conv2 = nn.Conv2d(planes, planes, 3, stride, 1, bias=False)
+        self.bn2 = nn.BatchNorm2d(planes)
+        self.conv3 = nn.Conv2d(planes, planes * 4, 1, bias=False)
+        self.bn3 = nn.BatchNorm2d(planes * 4)
+        self.relu = nn.ReLU(inplace=True)
+        self.downsample = None
+        if stride != 1 or inplanes != planes * 4:
+            self.downsample = nn.Sequential(
+                nn.Conv2d(inplanes, planes * 4, 1, stride, bias=False),
+                nn.BatchNorm2d(planes * 4)
+            )
+
+    def forward(self, x):
+        identity = x if self.downsample is None else self.downsample(x)
+        out = self.relu(self.bn1(self.conv1(x)))
+        out = self.relu(self.bn2(self.conv2(out)))
+        out = self.bn3(self.conv3(out))
+        return self.relu(out + identity)
+
+
+class ResNet50Body(nn.Module):
+    """ResNet50 sin clasificador; retorna las salidas de layer2, layer3 y layer4."""
+
+    def __init__(self):
+        super().__init__()
+        self.conv1 = nn.Conv2d(3, 64, 7, 2, 3, bias=False)
+        self.bn1 = nn.BatchNorm2d(64)
+        self.relu = nn.ReLU(inplace=True)
+        self.maxpool = nn.MaxPool2d(3, 2, 1)
+        inplanes = 64
+        for index, (planes, blocks, stride) in enumerate(
+                [(64, 3, 1), (128, 4, 2), (256, 6, 2), (512, 3, 2)], start=1):
+            layer = [Bottleneck(inplanes, planes, stride)]
+            layer += [Bottleneck(planes * 4, planes) for _ in range(blocks - 1)]
+            setattr(self, f"layer{index}", nn.Sequential(*layer))
+            inplanes = planes * 4
+
+    def forward(self, x):
+        x = self.maxpool(self.relu(self.bn1(self.conv1(x))))
+        c2 = self.layer2(self.layer1(x))
+        c3 = self.layer3(c2)
+        c4 = self.layer4(c3)
+        return [c2, c3, c4]
+
+
+class FPN(nn.Module):
+    """Feature pyramid de RetinaFace sobre las tres salidas del backbone."""
+
+    def __init__(self, in_channels: List[int], out_channels: int):
+        super().__init__()
+        self.output1 = _conv_bn(in_channels[0], out_channels, kernel=1)
+        self.output2 = _conv_bn(in_channels[1], out_channels, kernel=1)
+        self.output3 = _conv_bn(in_channels[2], out_channels, kernel=1)
+        self.merge1 = _conv_bn(out_channels, out_channels)
+        self.merge2 = _conv_bn(out_channels, out_channels)
+
+    def forward(self, features):
+        output1 = self.output1(features[0])
+        output2 = self.output2(features[1])
+        output3 = self.output3(features[2])
+        output2 = self.merge2(output2 + F.interpolate(output3, size=output2.shape[2:], mode='nearest'))
+        output1 = self.merge1(output1 + F.interpolate(output2, size=output1.shape[2:], mode='nearest'))
+        return [output1, output2, output3]
+
+
+class SSH(nn.Module):
+    """Módulo de contexto de RetinaFace (ramas 3x3, 5x5 y 7x7)."""
+
+    def __init__(self, in_channel: int, out_channel: int):
+        super().__init__()
+        self.conv3X3 = _conv_bn(in_channel, out_channel // 2, leaky=None)
+        self.conv5X5_1 = _conv_bn(in_channel, out_channel // 4)
+        self.conv5X5_2 = _conv_bn(out_channel // 4, out_channel // 4, leaky=None)
+        self.conv7X7_2 = _conv_bn(out_channel // 4, out_channel // 4)
+        self.conv7x7_3 = _conv_bn(out_channel // 4, out_channel // 4, leaky=None)
+
+    def forward(self, x):
+        conv5x5_1 = self.conv5X5_1(x)
+        conv7x7_2 = self.conv7X7_2(conv5x5_1)
+        return F.relu(torch.cat([self.conv3X3(x), self.conv5X5_2(conv5x5_1), self.conv7x7_3(conv7x7_2)], dim=1))
+
+
+class _Head(nn.Module):
+    """Cabeza 1x1 por nivel: `values` valores por anchor."""
+
+    def __init__(self, in_channels: int, values: int, num_anchors: int = 2):
+        super().__init__()
+        self.values = values
+        self.conv1x1 = nn.Conv2d(in_channels, num_anchors * values, 1)
+
+    def forward(self, x):
+        out = self.conv1x1(x).permute(0, 2, 3, 1).contiguous()
+        return out.view(out.shape[0], -1, self.values)
+
+
+class RetinaFace(nn.Module):
+    """RetinaFace ResNet50 (arquitectura y nombres de pesos de facexlib)."""
+
+    def __init__(self):
+        super().__init__()
+        self.body = ResNet50Body()
+        self.fpn = FPN([512, 1024, 2048], 256)
+        self.ssh1 = SSH(256, 256)
+        self.ssh2 = SSH(256, 256)
+        self.ssh3 = SSH(256, 256)
+        self.ClassHead = nn.ModuleList([_Head(256, 2) for _ in range(3)])
+        self.BboxHead = nn.ModuleList([_Head(256, 4) for _ in range(3)])
+        self.LandmarkHead = nn.ModuleList([_Head(256, 10) for _ in range(3)])
+
+    def forward(self, x):
+        fpn = self.fpn(self.body(x))
+        features = [self.ssh1(fpn[0]), self.ssh2(fpn[1]), self.ssh3(fpn[2])]
+        loc = torch.cat([head(f) for head, f in zip(self.BboxHead, features)], dim=1)
+        conf = torch.cat([head(f) for head, f in zip(self.ClassHead, features)], dim=1)
+        return loc, F.softmax(conf, dim=-1)
+
+
+class RetinaFaceDetector(FaceDetector):
+    """Detector RetinaFace ResNet50 en CPU con los pesos de facexlib.
+
+    Los anchors de una resolución se calculan una vez y se reutilizan (los
+    frames de un video tienen todos el mismo tamaño).
+    """
+
+    name = "retinaface"
+    # Anchor más chico de RetinaFace
+    native_min_size = 16
+    _MEAN = np.array([104.0, 117.0, 123.0], dtype=np.float32)  # BGR
+    _MIN_SIZES = [[16, 32], [64, 128], [256, 512]]
+    _STEPS = [8, 16, 32]
+    _VARIANCE = (0.1, 0.2)
+
+    def __init__(self, model_path: str, max_side: int = 0, upsample: bool = False, confidence: float = 0.8,
+                 nms_threshold: float = 0.4):
+        super().__init__(max_side, upsample)
+        self.confidence = confidence
+        self.nms_threshold = nms_threshold
+        self.device = torch.device('cpu')
+        self._priors = {}
+        self.net = RetinaFace()
+        state_dict = torch.load(model_path, map_location=self.device, weights_only=True)
+        state_dict = {k[7:] if k.startswith('module.') else k: v for k, v in state_dict.items()}
+        missing, unexpected = self.net.load_state_dict(state_dict, strict=False)
+        missing = [k for k in missing if not k.endswith('num_batches_tracked')]
+        if missing or unexpected:
+            raise ValueError(f"pesos incompatibles ({len(missing)} faltantes, {len(unexpected)} inesperados)")
+        self.net.eval()
+
+    def _prior_boxes(self, height: int, width: int) -> torch.Tensor:
+        """Anchors (cx, cy, ancho, alto) normalizados para una entrada de height x width."""
+        key = (height, width)
+        if key not in self._priors:
+            anchors = []
+            for step, min_sizes in zip(self._STEPS, self._MIN_SIZES):
+                rows, cols = math.ceil(height / step), math.ceil(width / step)
+                for i, j in product(range(rows), range(cols)):
+                    for size in min_sizes:
+                        anchors.append([(j + 0.5) * step / width, (i + 0.5) * step / height,
+                                        size / width, size / height])
+            self._priors[key] = torch.tensor(anchors, dtype=torch.float32)
+        return self._priors[key]
+
+    def _detect(self, img: np.ndarray, min_size: int, rgb: bool) -> np.ndarray:
+        height, width = img.shape[:2]
+        bgr = img[..., ::-1] if rgb else img
+        tensor = torch.from_numpy((bgr.astype(np.float32) - self._MEAN).transpose(2, 0, 1).copy())
+        with torch.inference_mode():
+            loc, conf = self.net(tensor.unsqueeze(0))
+
+        scores = conf[0, :, 1]
+        keep = scores > self.confidence
+        if not keep.any():
+            return np.zeros((0, 4), dtype=np.float32)
+        priors = self._prior_boxes(height, width)[keep]
+        loc = loc[0][keep]
+        # Decodificar: centro y tamaño relativos al anchor
+        centers = priors[:, :2] + loc[:, :2] * self._VARIANCE[0] * priors[:, 2:]
+        sizes = priors[:, 2:] * torch.exp(loc[:, 2:] * self._VARIANCE[1])
+        boxes = torch.cat([centers - sizes / 2, sizes], dim=1) * torch.tensor([width, height, width, height])
+        boxes, scores = boxes.numpy(), scores[keep].numpy()
+
+        indices = cv2.dnn.NMSBoxes(boxes.tolist(), scores.tolist(), self.confidence, self.nms_threshold)
+        boxes = boxes[np.asarray(indices, dtype=np.int64).reshape(-1)]
+        return boxes[(boxes[:, 2] >= min_size) & (boxes[:, 3] >= min_size)]
+
+
+def create_face_detector(backend: str, max_side: int = 0, upsample: bool = False) -> FaceDetector:
+    """Crea el detector del backend pedido; sin sus pesos usa Haar."""
+    if backend == "retinaface":
+        model_path = os.path.join(WEIGHTS_DIR, 'detection_Resnet50_Final.pth')
+        if os.path.exists(model_path):
+            try:
+                return RetinaFaceDetector(model_path, max_side, upsample,
+                                          confidence=config.FACE_DETECT_CONFIDENCE)
+            except Exception as e:
+                print(f"Error cargando RetinaFace: {e}")
+        else:
+            print(f"Advertencia: No se encontró {model_path}")
+        print("Usando detector Haar")
+    elif backend != "haar":
+        print(f"Advertencia: detector de rostros desconocido '{backend}', usando Haar")
+    return HaarFaceDetector(max_side, upsample)
+
+
+_shared_detector: Optional[FaceDetector] = None
+_shared_lock = threading.Lock()
+
+
+def get_face_detector() -> FaceDetector:
+    """Detector de rostros del proceso (FACE_DETECTOR), cargado una sola vez."""
+    global _shared_detector
+    with _shared_lock:
+        if _shared_detector is None:
+            _shared_detector = create_face_detector(
+                config.FACE_DETECTOR, config.FACE_DETECT_MAX_SIDE, config.FACE_DETECT_UPSAMPLE
+            )
+            print(f"Detector de rostros: {_shared_detector.name} (lado máximo {config.FACE_DETECT_MAX_SIDE or '-'})")
+    return _shared_detector
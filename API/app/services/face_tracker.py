@@ -0,0 +1,139 @@
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+# Ancho de la miniatura con que se detectan los cambios de escena
+_SCENE_THUMB_WIDTH = 64
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> float:
+    """Intersección sobre unión de dos cajas (x, y, ancho, alto)."""
+    left, top = max(a[0], b[0]), max(a[1], b[1])
+    right, bottom = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0.0, right - left) * max(0.0, bottom - top)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTracker:
+    """Sigue las cajas de rostros a lo largo de los frames de un video.
+
+    El detector completo corre cada `interval` frames o cuando cambia la
+    escena; entre detecciones cada caja se desplaza con el flujo óptico
+    (Lucas-Kanade) de puntos dentro de ella. Al detectar, las cajas que
+    coinciden con un rostro seguido se promedian con su posición seguida,
+    por lo que los landmarks y las matrices afines de cada rostro no saltan
+    de un frame a otro. Un rostro seguido que el detector no encuentra se
+    conserva hasta `max_missed` detecciones.
+
+    update() debe llamarse con los frames en orden; no es seguro usar una
+    misma instancia desde varios hilos a la vez.
+    """
+
+    def __init__(self, detector, interval: int = 10, scene_threshold: float = 30.0,
+                 min_size: int = 30, smoothing: float = 0.5, max_missed: int = 1):
+        self.detector = detector
+        self.interval = max(1, interval)
+        self.scene_threshold = scene_threshold
+        self.min_size = min_size
+        self.smoothing = min(max(smoothing, 0.0), 1.0)
+        self.max_missed = max_missed
+        # Rostros seguidos: caja (x, y, ancho, alto) y detecciones sin encontrarlo
+        self._tracks: List[dict] = []
+        self._prev_gray: Optional[np.ndarray] = None
+        self._prev_thumb: Optional[np.ndarray] = None
+        self._since_detection = 0
+        self.frames = 0
+        self.detections = 0
+
+    def update(self, frame: np.ndarray) -> np.ndarray:
+        """Procesa el siguiente frame (RGB) y retorna las cajas de sus rostros (N x 4, float32)."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        height, width = gray.shape
+        thumb = cv2.resize(
+            gray, (_SCENE_THUMB_WIDTH, max(1, height * _SCENE_THUMB_WIDTH // width)),
+            interpolation=cv2.INTER_AREA
+        ).astype(np.int16)
+        scene_change = (self._prev_thumb is not None
+                        and np.abs(thumb - self._prev_thumb).mean() > self.scene_threshold)
+
+        if self._prev_gray is None or scene_change or self._since_detection >= self.interval:
+            self._detect(frame, reset=self._prev_gray is None or scene_change)
+        else:
+            self._track(gray)
+            self._since_detection += 1
+
+        # Descartar los rostros que salieron del frame
+        self._tracks = [
+            t for t in self._tracks
+            if t["box"][0] < width and t["box"][1] < height
+            and t["box"][0] + t["box"][2] > 0 and t["box"][1] + t["box"][3] > 0
+        ]
+        self._prev_gray = gray
+        self._prev_thumb = thumb
+        self.frames += 1
+        return self.boxes()
+
+    def boxes(self) -> np.ndarray:
+        """Cajas actuales (x, y, ancho, alto) de los rostros seguidos."""
+        return np.array([t["box"] for t in self._tracks], dtype=np.float32).reshape(-1, 4)
+
+    def _detect(self, frame: np.ndarray, reset: bool):
+        """Detección completa; en un cambio de escena se descartan los rostros seguidos."""
+        detected = self.detector.detect(frame, min_size=self.min_size, rgb=True).astype(np.float32)
+        self.detections += 1
+        self._since_detection = 0
+        previous = [] if reset else self._tracks
+        tracks = []
+        matched = set()
+        for box in detected:
+            best, best_iou = None, 0.3
+            for index, track in enumerate(previous):
+                iou = box_iou(box, track["box"])
+                if index not in matched and iou >= best_iou:
+                    best, best_iou = index, iou
+            if best is not None:
+                # Promediar con la posición seguida para estabilizar el rostro
+                matched.add(best)
+                box = self.smoothing * previous[best]["box"] + (1 - self.smoothing) * box
+            tracks.append({"box": box, "missed": 0})
+        for index, track in enumerate(previous):
+            if index not in matched and track["missed"] < self.max_missed:
+                tracks.append({"box": track["box"], "missed": track["missed"] + 1})
+        self._tracks = tracks
+
+    def _track(self, gray: np.ndarray):
+        """Desplaza cada caja con la mediana del flujo óptico de sus puntos."""
+        if not self._tracks:
+            return
+        points, owners = [], []
+        for index, track in enumerate(self._tracks):
+            x, y, w, h = track["box"]
+            left, top = max(int(x), 0), max(int(y), 0)
+            right, bottom = int(x + w), int(y + h)
+            roi = self._prev_gray[top:bottom, left:right]
+            if roi.shape[0] < 8 or roi.shape[1] < 8:
+                continue
+            corners = cv2.goodFeaturesToTrack(roi, maxCorners=30, qualityLevel=0.01, minDistance=3)
+            if corners is None:
+                continue
+            corners = corners.reshape(-1, 2) + (left, top)
+            points.append(corners)
+            owners.extend([index] * len(corners))
+        if not points:
+            return
+
+        previous = np.concatenate(points).astype(np.float32).reshape(-1, 1, 2)
+        current, status, _ = cv2.calcOpticalFlowPyrLK(
+            self._prev_gray, gray, previous, None, winSize=(15, 15), maxLevel=2
+        )
+        shifts = (current - previous).reshape(-1, 2)
+        status = status.reshape(-1).astype(bool)
+        owners = np.array(owners)
+        for index, track in enumerate(self._tracks):
+            valid = (owners == index) & status
+            # Con pocos puntos seguidos la caja se mantiene donde estaba
+            if valid.sum() >= 3:
+                dx, dy = np.median(shifts[valid], axis=0)
+                track["box"] = track["box"] + np.array([dx, dy, 0, 0], dtype=np.float32)
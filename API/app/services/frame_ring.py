@@ -0,0 +1,137 @@
+import asyncio
+import os
+import queue
+import threading
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Rings creados en este proceso: sus slots se resuelven sin abrir otra vez el bloque
+_local_rings: Dict[str, "FrameRing"] = {}
+# Bloques de otros procesos abiertos por este worker (se cierran los más antiguos)
+_attached: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+_attached_lock = threading.Lock()
+_MAX_ATTACHED = 8
+
+
+def _detach(shm: shared_memory.SharedMemory):
+    try:
+        shm.close()
+    except BufferError:
+        # Todavía hay vistas vivas; el mapeo se libera con ellas
+        pass
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Abre (una vez por proceso) el bloque compartido de un ring."""
+    with _attached_lock:
+        shm = _attached.get(name)
+        if shm is not None:
+            _attached.move_to_end(name)
+            return shm
+        # Al abrir un ring nuevo se cierran los que su dueño ya eliminó (Linux: /dev/shm)
+        if os.path.isdir("/dev/shm"):
+            for old_name in [n for n in _attached if not os.path.exists(f"/dev/shm/{n.lstrip('/')}")]:
+                _detach(_attached.pop(old_name))
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+        while len(_attached) > _MAX_ATTACHED:
+            _detach(_attached.popitem(last=False)[1])
+        return shm
+
+
+class SlotRef:
+    """Referencia serializable a un slot: nombre del bloque, offsets y formas.
+
+    Es lo único que viaja hasta el worker; la entrada y la salida se leen y
+    escriben directamente en la memoria compartida.
+    """
+
+    def __init__(self, name: str, offset: int, input_shape: Tuple[int, int, int],
+                 output_shape: Tuple[int, int, int]):
+        self.name = name
+        self.offset = offset
+        self.input_shape = input_shape
+        self.output_shape = output_shape
+
+    def _buffer(self):
+        ring = _local_rings.get(self.name)
+        return ring._shm.buf if ring is not None else _attach(self.name).buf
+
+    def input(self) -> np.ndarray:
+        """Vista uint8 HWC del frame de entrada."""
+        return np.ndarray(self.input_shape, dtype=np.uint8, buffer=self._buffer(), offset=self.offset)
+
+    def output(self) -> np.ndarray:
+        """Vista uint8 HWC donde se escribe el frame mejorado."""
+        return np.ndarray(self.output_shape, dtype=np.uint8, buffer=self._buffer(),
+                          offset=self.offset + int(np.prod(self.input_shape)))
+
+
+class FrameSlot:
+    """Slot adquirido de un ring; se devuelve con release() al terminar de usar la salida."""
+
+    def __init__(self, ring: "FrameRing", index: int):
+        self.ring = ring
+        self.index = index
+        self.ref = SlotRef(ring.name, index * ring.slot_bytes, ring.input_shape, ring.output_shape)
+        self.input = self.ref.input()
+        self.output = self.ref.output()
+
+    def release(self):
+        self.ring.release(self.index)
+
+
+class FrameRing:
+    """Ring de slots preasignados en memoria compartida para frames de un tamaño fijo.
+
+    Cada slot tiene espacio para un frame de entrada (alto x ancho x 3) y su
+    salida escalada, de modo que los frames se entregan a los workers de
+    inferencia y se reciben de vuelta sin serializarlos. El número de slots
+    acota los frames en vuelo: acquire() bloquea si no hay slots libres.
+    """
+
+    def __init__(self, num_slots: int, height: int, width: int, scale: int):
+        self.input_shape = (height, width, 3)
+        self.output_shape = (height * scale, width * scale, 3)
+        self.slot_bytes = height * width * 3 * (1 + scale * scale)
+        self.num_slots = max(1, num_slots)
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.num_slots)
+        self.name = self._shm.name
+        self._free: queue.Queue = queue.Queue()
+        for index in range(self.num_slots):
+            self._free.put(index)
+        self._slots = [FrameSlot(self, index) for index in range(self.num_slots)]
+        _local_rings[self.name] = self
+
+    @property
+    def size_mb(self) -> float:
+        return self.slot_bytes * self.num_slots / (1024 * 1024)
+
+    def acquire(self, timeout: Optional[float] = None) -> FrameSlot:
+        """Toma un slot libre (bloqueante)."""
+        return self._slots[self._free.get(timeout=timeout)]
+
+    async def acquire_async(self) -> FrameSlot:
+        """Toma un slot libre sin bloquear el event loop."""
+        try:
+            return self._slots[self._free.get_nowait()]
+        except queue.Empty:
+            return await asyncio.to_thread(self.acquire)
+
+    def release(self, index: int):
+        """Devuelve un slot al ring."""
+        self._free.put(index)
+
+    def close(self):
+        """Libera el bloque compartido (los slots dejan de ser válidos)."""
+        _local_rings.pop(self.name, None)
+        self._slots = []
+        try:
+            self._shm.close()
+        except BufferError:
+            # Quedan vistas vivas: el mapeo se libera cuando se recolectan
+            pass
+        self._shm.unlink()
@@ -1,12 +1,18 @@
+import asyncio
 import base64
+import copy
 import io
+import math
 import os
+import socket
+import threading
 import time
 import uuid
 import cv2
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple, Dict, List
+from typing import Callable, Dict, Optional, Tuple, List
 from PIL import Image
 from bson import ObjectId
 import torch
@@ -18,7 +24,7 @@ from scipy.ndimage import gaussian_filter
 from app.database import get_collection
 from app.models.image import (
     ImageStatus,
-    ImageEnhanceRequest,
+    ImageEnhanceParams,
     ImageResponse,
     ImageDetailResponse,
     ImageListResponse,
@@ -26,6 +32,28 @@ from app.models.image import (
     MODEL_CONFIG,
 )
 from app.config import config
+from app.services.inference_executor import inference_executor
+from app.services.job_queue import image_job_queue
+from app.services.autotune import TuningProfile, autotune_upscaler, intra_op_threads, thread_candidates
+from app.services.compiled_models import (
+    COMPILE_MODES,
+    artifact_path,
+    compile_inductor,
+    load_torchscript,
+    save_torchscript,
+)
+from app.services.model_registry import ModelRegistry, parse_model_list
+from app.services.precision import (
+    apply_precision,
+    input_dtype,
+    parse_precision_overrides,
+    resolve_precision,
+)
+from app.services.face_detector import get_face_detector
+from app.services.frame_ring import FrameRing, FrameSlot, SlotRef
+from app.services.result_cache import result_cache
+from app.services.worker_pool import current_worker_cores
+from app.utils.strip_writer import open_strip_writer
 
 # Directorio base para almacenar imágenes
 IMAGE_STORAGE_PATH = "/image_history"
@@ -156,16 +184,35 @@ class RealESRGANUpscaler:
     Soporta múltiples arquitecturas:
     - RRDBNet: para modelos x2plus, x4plus, anime_6B
     - SRVGGNetCompact: para modelos v3 (animevideov3, general-x4v3)
+
+    La precisión (fp32, bf16, fp16, int8) y el formato channels_last se toman
+    de MODEL_CONFIG salvo que se indiquen explícitamente. Con compile_mode
+    "torchscript" el modelo trazado se guarda en compiled_dir y se carga
+    directamente en los inicios siguientes; con "inductor" se usa torch.compile.
     """
 
     def __init__(self, model_type: ModelType = ModelType.GENERAL_X4, scale: Optional[int] = None,
-                 tile_size: int = 512, device=None, use_gpu: bool = True):
+                 tile_size: int = 512, device=None, use_gpu: bool = True, tile_batch_size: int = 1,
+                 precision: Optional[str] = None, channels_last: Optional[bool] = None,
+                 min_psnr: Optional[float] = None, compile_mode: str = "none",
+                 compiled_dir: Optional[str] = None, tile_overlap: int = 0, tile_pad: int = 10,
+                 num_threads: int = 0):
         self.model_type = model_type
         self.model_config = MODEL_CONFIG[model_type]
         # Usar escala proporcionada o la default del modelo
         self.scale = scale if scale is not None else self.model_config["scale"]
+        # Escala a la que corre la red; si difiere de scale la salida se redimensiona
+        self.net_scale = self.network_scale(model_type, self.scale)
         self.tile_size = tile_size
-        self.tile_pad = 10
+        # Contexto descartado alrededor de cada tile
+        self.tile_pad = max(0, tile_pad)
+        # Solapamiento entre tiles vecinos mezclado con rampas (0 = tiles sin mezcla)
+        self.requested_tile_overlap = max(0, tile_overlap)
+        self.tile_overlap = min(self.requested_tile_overlap, tile_size // 2)
+        # Tiles por forward; con valores > 1 se usa el tiling por lotes
+        self.tile_batch_size = max(1, tile_batch_size)
+        # Threads intra-op de torch durante la inferencia (0 = default del proceso)
+        self.num_threads = max(0, num_threads)
         self.use_gpu = use_gpu
 
         # Determinar dispositivo
@@ -180,9 +227,50 @@ class RealESRGANUpscaler:
             self.device = device
             self.gpu_available = device.type == 'cuda'
 
+        # Precisión pedida y efectiva (se resuelve al cargar según el dispositivo)
+        self.requested_precision = precision or self.model_config.get("precision", "fp32")
+        self.precision = "fp32"
+        self.channels_last = (channels_last if channels_last is not None
+                              else self.model_config.get("channels_last", False))
+        # PSNR mínimo contra fp32 para aceptar una precisión reducida (None = sin verificar)
+        self.min_psnr = min_psnr
+        self.compile_mode = compile_mode if compile_mode in COMPILE_MODES else "none"
+        self.compiled_dir = compiled_dir or os.path.join(WEIGHTS_DIR, 'compiled')
+
         self.model = None
         self._model_loaded = False
 
+    @staticmethod
+    def network_scale(model_type: ModelType, scale: int) -> int:
+        """Escala de la red para producir la escala pedida.
+
+        RRDBNet soporta x2 y x4 con los mismos pesos; SRVGGNetCompact solo su
+        escala nativa. Las demás escalas se obtienen redimensionando la salida.
+        """
+        if model_type in [ModelType.ANIME_VIDEO, ModelType.GENERAL_V3]:
+            return MODEL_CONFIG[model_type]["scale"]
+        return scale if scale in (2, 4) else MODEL_CONFIG[model_type]["scale"]
+
+    def share_weights_from(self, other: "RealESRGANUpscaler") -> bool:
+        """Reutiliza los pesos ya cargados de otro upscaler del mismo modelo."""
+        if other.model_type != self.model_type or other.model is None or other.device != self.device:
+            return False
+        if ((other.requested_precision, other.channels_last, other.compile_mode)
+                != (self.requested_precision, self.channels_last, self.compile_mode)):
+            return False
+        if other.net_scale == self.net_scale:
+            self.model = other.model
+        elif self.compile_mode != "none":
+            # El grafo compilado fija la escala de la red
+            return False
+        else:
+            # Copia superficial: comparte submódulos y parámetros, solo cambia la escala
+            self.model = copy.copy(other.model)
+            self.model.scale = self.net_scale
+        self.precision = other.precision
+        self._model_loaded = other._model_loaded
+        return True
+
     def _create_model(self) -> nn.Module:
         """Crea el modelo según el tipo seleccionado."""
         cfg = self.model_config
@@ -194,7 +282,7 @@ class RealESRGANUpscaler:
                 num_out_ch=3,
                 num_feat=cfg["num_feat"],
                 num_conv=cfg["num_conv"],
-                upscale=self.scale,
+                upscale=self.net_scale,
                 act_type='prelu'
             )
         else:
@@ -202,7 +290,7 @@ class RealESRGANUpscaler:
             return RRDBNet(
                 num_in_ch=3,
                 num_out_ch=3,
-                scale=self.scale,
+                scale=self.net_scale,
                 num_feat=cfg["num_feat"],
                 num_block=cfg["num_block"],
                 num_grow_ch=cfg["num_grow_ch"]
@@ -211,6 +299,10 @@ class RealESRGANUpscaler:
     def load_model(self, model_path: Optional[str] = None):
         """Carga el modelo. Si no hay modelo, usa modo simulación."""
         try:
+            has_weights = bool(model_path) and os.path.exists(model_path)
+            if self.compile_mode == "torchscript" and has_weights and self._load_compiled(model_path):
+                return
+
             self.model = self._create_model()
 
             if model_path and os.path.exists(model_path):
@@ -228,17 +320,73 @@ class RealESRGANUpscaler:
 
             self.model.eval()
             self.model = self.model.to(self.device)
+            self._apply_precision()
+            if self._model_loaded and self.compile_mode != "none":
+                self._compile(model_path)
 
         except Exception as e:
             print(f"Error cargando modelo {self.model_type.value}: {e}")
             self._model_loaded = False
             self.model = None
 
+    def _apply_precision(self):
+        """Convierte el modelo cargado a la precisión y formato de memoria configurados."""
+        precision = resolve_precision(
+            self.requested_precision, self.device,
+            quantizable=self.model_type in [ModelType.ANIME_VIDEO, ModelType.GENERAL_V3]
+        )
+        self.model, self.precision, psnr = apply_precision(
+            self.model, precision, self.channels_last, self.device, self.min_psnr
+        )
+        if self.precision != "fp32":
+            psnr_info = f", PSNR {psnr:.1f}dB" if psnr is not None else ""
+            print(f"Modelo {self.model_type.value} en precisión {self.precision}{psnr_info}")
+
+    def _compiled_path(self) -> str:
+        return artifact_path(self.compiled_dir, self.model_config["filename"], self.net_scale,
+                             self.requested_precision, self.channels_last, self.device)
+
+    def _load_compiled(self, model_path: str) -> bool:
+        """Carga el artefacto TorchScript si corresponde a los pesos actuales."""
+        loaded = load_torchscript(self._compiled_path(), self.device, model_path)
+        if loaded is None:
+            return False
+        self.model, self.precision = loaded
+        self._model_loaded = True
+        print(f"Modelo {self.model_type.value} cargado desde {self._compiled_path()}")
+        return True
+
+    def _compile(self, model_path: str):
+        """Compila el modelo para el tamaño de tile configurado.
+
+        Si la compilación falla se sigue usando el modelo en modo eager.
+        """
+        size = self.tile_size + 2 * self.tile_pad
+        memory_format = torch.channels_last if self.channels_last else torch.contiguous_format
+        example = torch.rand(self.tile_batch_size, 3, size, size, device=self.device).to(
+            dtype=input_dtype(self.precision), memory_format=memory_format
+        )
+        eager_model = self.model
+        try:
+            if self.compile_mode == "torchscript":
+                path = self._compiled_path()
+                self.model = save_torchscript(eager_model, example, path, model_path, self.precision)
+                print(f"Modelo {self.model_type.value} trazado y guardado en {path}")
+            elif self.compile_mode == "inductor":
+                self.model = compile_inductor(eager_model, self.compiled_dir)
+                # Compilar ahora (o leer la caché de kernels) en lugar de en el primer request
+                with torch.no_grad():
+                    self.model(example)
+                print(f"Modelo {self.model_type.value} compilado con torch.compile")
+        except Exception as e:
+            print(f"Error compilando modelo {self.model_type.value} ({self.compile_mode}), usando eager: {e}")
+            self.model = eager_model
+
     def _tile_process(self, img: torch.Tensor) -> torch.Tensor:
         """Procesa la imagen por tiles para manejar imágenes grandes."""
         batch, channel, height, width = img.shape
-        output_height = height * self.scale
-        output_width = width * self.scale
+        output_height = height * self.net_scale
+        output_width = width * self.net_scale
 
         output = img.new_zeros((batch, channel, output_height, output_width))
         tiles_x = (width + self.tile_size - 1) // self.tile_size
@@ -261,13 +409,13 @@ class RealESRGANUpscaler:
                 with torch.no_grad():
                     tile_output = self.model(tile)
 
-                out_x_start = x_start * self.scale
-                out_y_start = y_start * self.scale
-                out_x_end = x_end * self.scale
-                out_y_end = y_end * self.scale
+                out_x_start = x_start * self.net_scale
+                out_y_start = y_start * self.net_scale
+                out_x_end = x_end * self.net_scale
+                out_y_end = y_end * self.net_scale
 
-                pad_left = (x_start - x_start_pad) * self.scale
-                pad_top = (y_start - y_start_pad) * self.scale
+                pad_left = (x_start - x_start_pad) * self.net_scale
+                pad_top = (y_start - y_start_pad) * self.net_scale
 
                 output[:, :, out_y_start:out_y_end, out_x_start:out_x_end] = \
                     tile_output[:, :, pad_top:pad_top + (out_y_end - out_y_start),
@@ -275,24 +423,372 @@ class RealESRGANUpscaler:
 
         return output
 
+    @staticmethod
+    def _tile_starts(length: int, tile: int) -> List[int]:
+        """Posiciones de inicio de tiles de tamaño uniforme que cubren length.
+
+        El último tile se desplaza hacia atrás para quedar dentro de la imagen,
+        solapándose con el anterior en lugar de quedar más pequeño.
+        """
+        starts = list(range(0, length - tile + 1, tile))
+        if starts[-1] + tile < length:
+            starts.append(length - tile)
+        return starts
+
+    def _tile_process_batched(self, img: torch.Tensor) -> torch.Tensor:
+        """Procesa la imagen por lotes de tiles del mismo tamaño.
+
+        Como en _tile_process_blended, el contexto de tile_pad se toma de la
+        imagen desplazando la ventana hacia adentro en los bordes: todas las
+        ventanas tienen la misma forma y pueden apilarse en un tensor
+        (N, C, H, W) para un único forward por lote, sin rellenar la imagen, y
+        los bordes se tratan igual que sin tiles.
+        """
+        batch, channel, height, width = img.shape
+        scale = self.net_scale
+        # Tiles balanceados: el mismo número de tiles que el modo tile a tile,
+        # repartiendo el tamaño para minimizar el solapamiento del último tile
+        tile_h = math.ceil(height / math.ceil(height / self.tile_size))
+        tile_w = math.ceil(width / math.ceil(width / self.tile_size))
+        window_h = min(tile_h + 2 * self.tile_pad, height)
+        window_w = min(tile_w + 2 * self.tile_pad, width)
+
+        output = img.new_zeros((batch, channel, height * scale, width * scale))
+
+        positions = [
+            (y, x)
+            for y in self._tile_starts(height, tile_h)
+            for x in self._tile_starts(width, tile_w)
+        ]
+        out_tile_h = tile_h * scale
+        out_tile_w = tile_w * scale
+
+        for i in range(0, len(positions), self.tile_batch_size):
+            chunk = positions[i:i + self.tile_batch_size]
+            windows = [(min(max(y - self.tile_pad, 0), height - window_h),
+                        min(max(x - self.tile_pad, 0), width - window_w)) for y, x in chunk]
+            tiles = torch.cat([
+                img[:, :, wy:wy + window_h, wx:wx + window_w] for wy, wx in windows
+            ], dim=0)
+
+            with torch.no_grad():
+                tiles_output = self.model(tiles)
+
+            for j, ((y, x), (wy, wx)) in enumerate(zip(chunk, windows)):
+                offset_y = (y - wy) * scale
+                offset_x = (x - wx) * scale
+                output[:, :, y * scale:y * scale + out_tile_h, x * scale:x * scale + out_tile_w] = \
+                    tiles_output[j * batch:(j + 1) * batch, :,
+                                 offset_y:offset_y + out_tile_h, offset_x:offset_x + out_tile_w]
+
+        return output
+
+    @staticmethod
+    def _blend_starts(length: int, tile: int, overlap: int) -> List[int]:
+        """Inicios de tiles de tamaño tile que se solapan al menos overlap píxeles.
+
+        Los tiles se reparten uniformemente, así el solapamiento es parejo y
+        todos tienen la misma forma.
+        """
+        if length <= tile:
+            return [0]
+        count = math.ceil((length - overlap) / (tile - overlap))
+        return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+    @staticmethod
+    def _blend_weights(starts: List[int], tile: int, scale: int) -> List[torch.Tensor]:
+        """Pesos 1D de cada tile (en píxeles de salida) para una dirección.
+
+        Cada tile sube linealmente en la zona que comparte con el anterior y baja
+        en la que comparte con el siguiente. Los pesos se normalizan para que
+        sumen 1 en cada posición, de modo que el producto de los pesos de filas y
+        columnas también suma 1 sin necesidad de un buffer de normalización 2D.
+        """
+        out_tile = tile * scale
+        weights = []
+        for i, start in enumerate(starts):
+            weight = torch.ones(out_tile)
+            if i > 0:
+                ramp = (starts[i - 1] + tile - start) * scale
+                weight[:ramp] *= (torch.arange(ramp) + 0.5) / ramp
+            if i < len(starts) - 1:
+                ramp = (start + tile - starts[i + 1]) * scale
+                weight[out_tile - ramp:] *= (ramp - 0.5 - torch.arange(ramp)) / ramp
+            weights.append(weight)
+
+        total = torch.zeros((starts[-1] + tile) * scale)
+        for start, weight in zip(starts, weights):
+            total[start * scale:start * scale + out_tile] += weight
+        return [weight / total[start * scale:start * scale + out_tile]
+                for start, weight in zip(starts, weights)]
+
+    def configure_tiling(self, tile_size: int, tile_batch_size: int, num_threads: int):
+        """Aplica parámetros de tiling y threads (por ejemplo, los de un perfil calibrado)."""
+        self.tile_size = tile_size
+        self.tile_overlap = min(self.requested_tile_overlap, tile_size // 2)
+        self.tile_batch_size = max(1, tile_batch_size)
+        self.num_threads = max(0, num_threads)
+
+    def _tile_process_blended(self, img: torch.Tensor) -> torch.Tensor:
+        """Procesa la imagen por tiles solapados mezclando las zonas comunes.
+
+        Los tiles vecinos se solapan tile_overlap píxeles y su salida se combina
+        con rampas lineales, lo que evita costuras incluso con tiles pequeños.
+        El contexto de tile_pad se toma de la imagen desplazando la ventana hacia
+        adentro en los bordes, así todas las ventanas tienen la misma forma (se
+        procesan en lotes de tile_batch_size) y los bordes de la imagen se tratan
+        igual que sin tiles.
+        """
+        batch, channel, height, width = img.shape
+        scale = self.net_scale
+        tile_h = min(self.tile_size, height)
+        tile_w = min(self.tile_size, width)
+        window_h = min(tile_h + 2 * self.tile_pad, height)
+        window_w = min(tile_w + 2 * self.tile_pad, width)
+
+        output = torch.zeros((batch, channel, height * scale, width * scale),
+                             dtype=torch.float32, device=img.device)
+
+        starts_y = self._blend_starts(height, tile_h, self.tile_overlap)
+        starts_x = self._blend_starts(width, tile_w, self.tile_overlap)
+        weights_y = [w.to(img.device) for w in self._blend_weights(starts_y, tile_h, scale)]
+        weights_x = [w.to(img.device) for w in self._blend_weights(starts_x, tile_w, scale)]
+
+        # Inicio de la ventana con contexto de cada tile, dentro de la imagen
+        windows_y = [min(max(y - self.tile_pad, 0), height - window_h) for y in starts_y]
+        windows_x = [min(max(x - self.tile_pad, 0), width - window_w) for x in starts_x]
+
+        positions = [(iy, ix) for iy in range(len(starts_y)) for ix in range(len(starts_x))]
+        out_tile_h = tile_h * scale
+        out_tile_w = tile_w * scale
+
+        for i in range(0, len(positions), self.tile_batch_size):
+            chunk = positions[i:i + self.tile_batch_size]
+            tiles = torch.cat([
+                img[:, :, windows_y[iy]:windows_y[iy] + window_h, windows_x[ix]:windows_x[ix] + window_w]
+                for iy, ix in chunk
+            ], dim=0)
+
+            with torch.no_grad():
+                tiles_output = self.model(tiles).float()
+
+            for j, (iy, ix) in enumerate(chunk):
+                y, x = starts_y[iy], starts_x[ix]
+                offset_y = (y - windows_y[iy]) * scale
+                offset_x = (x - windows_x[ix]) * scale
+                weight = weights_y[iy][:, None] * weights_x[ix][None, :]
+                output[:, :, y * scale:y * scale + out_tile_h, x * scale:x * scale + out_tile_w] += \
+                    tiles_output[j * batch:(j + 1) * batch, :,
+                                 offset_y:offset_y + out_tile_h, offset_x:offset_x + out_tile_w] * weight
+
+        return output
+
+    def _to_uint8(self, output: torch.Tensor) -> np.ndarray:
+        """Convierte una salida (1, C, H, W) en [0, 1] a un array HWC uint8."""
+        output = output.squeeze(0).cpu().clamp(0, 1).numpy()
+        return (output.transpose(1, 2, 0) * 255).astype(np.uint8)
+
+    def can_stream(self) -> bool:
+        """Indica si el modelo puede generar la salida por franjas (sin redimensionar)."""
+        return self._model_loaded and self.model is not None and self.net_scale == self.scale
+
+    def _input_window(self, img: np.ndarray, rows, cols) -> torch.Tensor:
+        """Ventana img[rows, cols] (slices o arrays de índices) como tensor (1, C, H, W) del modelo."""
+        window = img[rows][:, cols]
+        tensor = torch.from_numpy(np.ascontiguousarray(window.transpose(2, 0, 1))).unsqueeze(0)
+        tensor = tensor.to(self.device).float().div_(255.0)
+        memory_format = torch.channels_last if self.channels_last else torch.contiguous_format
+        return tensor.to(dtype=input_dtype(self.precision), memory_format=memory_format)
+
+    def enhance_streaming(self, img: np.ndarray, write_rows: Callable[[np.ndarray], None]):
+        """Mejora una imagen entregando la salida por franjas de filas uint8, en orden.
+
+        Se procesa una fila de tiles a la vez con la misma grilla que usaría
+        enhance() (tiles mezclados, por lotes o tile a tile), por lo que el
+        resultado es idéntico al de procesar la imagen completa. Solo se
+        mantiene en float la franja actual y la entrada se convierte por
+        ventana, de modo que el pico de memoria depende del tamaño de tile y
+        no del de la imagen.
+        """
+        height, width = img.shape[:2]
+        if height <= self.tile_size and width <= self.tile_size:
+            # enhance() procesa la imagen completa sin tiles
+            with torch.no_grad(), intra_op_threads(self.num_threads):
+                output = self.model(self._input_window(img, slice(None), slice(None))).float()
+            write_rows(self._to_uint8(output))
+        elif self.tile_overlap > 0:
+            self._stream_blended(img, write_rows)
+        elif self.tile_batch_size > 1:
+            self._stream_batched(img, write_rows)
+        else:
+            self._stream_tiles(img, write_rows)
+
+    def _stream_tiles(self, img: np.ndarray, write_rows: Callable[[np.ndarray], None]):
+        """Grilla de _tile_process por filas: tiles con corte duro y contexto recortado en los bordes."""
+        height, width = img.shape[:2]
+        scale = self.net_scale
+        for y_start in range(0, height, self.tile_size):
+            y_end = min(y_start + self.tile_size, height)
+            y_start_pad = max(y_start - self.tile_pad, 0)
+            y_end_pad = min(y_end + self.tile_pad, height)
+            strip = torch.zeros((1, 3, (y_end - y_start) * scale, width * scale),
+                                dtype=torch.float32, device=self.device)
+            for x_start in range(0, width, self.tile_size):
+                x_end = min(x_start + self.tile_size, width)
+                x_start_pad = max(x_start - self.tile_pad, 0)
+                x_end_pad = min(x_end + self.tile_pad, width)
+                tile = self._input_window(img, slice(y_start_pad, y_end_pad), slice(x_start_pad, x_end_pad))
+
+                with torch.no_grad(), intra_op_threads(self.num_threads):
+                    tile_output = self.model(tile).float()
+
+                pad_top = (y_start - y_start_pad) * scale
+                pad_left = (x_start - x_start_pad) * scale
+                strip[:, :, :, x_start * scale:x_end * scale] = \
+                    tile_output[:, :, pad_top:pad_top + (y_end - y_start) * scale,
+                                pad_left:pad_left + (x_end - x_start) * scale]
+            write_rows(self._to_uint8(strip))
+            del strip
+
+    def _stream_batched(self, img: np.ndarray, write_rows: Callable[[np.ndarray], None]):
+        """Grilla de _tile_process_batched por filas: tiles balanceados con ventanas desplazadas hacia adentro."""
+        height, width = img.shape[:2]
+        scale = self.net_scale
+        tile_h = math.ceil(height / math.ceil(height / self.tile_size))
+        tile_w = math.ceil(width / math.ceil(width / self.tile_size))
+        window_h = min(tile_h + 2 * self.tile_pad, height)
+        window_w = min(tile_w + 2 * self.tile_pad, width)
+        starts_y = self._tile_starts(height, tile_h)
+        starts_x = self._tile_starts(width, tile_w)
+        windows_x = [min(max(x - self.tile_pad, 0), width - window_w) for x in starts_x]
+        out_tile_h = tile_h * scale
+        out_tile_w = tile_w * scale
+
+        for iy, y in enumerate(starts_y):
+            window_y = min(max(y - self.tile_pad, 0), height - window_h)
+            offset_y = (y - window_y) * scale
+            strip = torch.zeros((1, 3, out_tile_h, width * scale), dtype=torch.float32, device=self.device)
+            for i in range(0, len(starts_x), self.tile_batch_size):
+                chunk = list(range(i, min(i + self.tile_batch_size, len(starts_x))))
+                tiles = torch.cat([
+                    self._input_window(img, slice(window_y, window_y + window_h),
+                                       slice(windows_x[ix], windows_x[ix] + window_w))
+                    for ix in chunk
+                ], dim=0)
+
+                with torch.no_grad(), intra_op_threads(self.num_threads):
+                    tiles_output = self.model(tiles).float()
+
+                # Como en _tile_process_batched, cada tile sobrescribe lo que solapa del anterior
+                for j, ix in enumerate(chunk):
+                    x = starts_x[ix] * scale
+                    offset_x = (starts_x[ix] - windows_x[ix]) * scale
+                    strip[:, :, :, x:x + out_tile_w] = \
+                        tiles_output[j:j + 1, :, offset_y:offset_y + out_tile_h,
+                                     offset_x:offset_x + out_tile_w]
+
+            # La fila siguiente sobrescribe las filas que comparte con esta
+            done = (starts_y[iy + 1] - y) * scale if iy + 1 < len(starts_y) else out_tile_h
+            write_rows(self._to_uint8(strip[:, :, :done]))
+            del strip
+
+    def _stream_blended(self, img: np.ndarray, write_rows: Callable[[np.ndarray], None]):
+        """Grilla de _tile_process_blended por filas: tiles solapados con mezcla por rampas."""
+        height, width = img.shape[:2]
+        scale = self.net_scale
+        tile_h = min(self.tile_size, height)
+        tile_w = min(self.tile_size, width)
+        window_h = min(tile_h + 2 * self.tile_pad, height)
+        window_w = min(tile_w + 2 * self.tile_pad, width)
+
+        starts_y = self._blend_starts(height, tile_h, self.tile_overlap)
+        starts_x = self._blend_starts(width, tile_w, self.tile_overlap)
+        weights_y = [w.to(self.device) for w in self._blend_weights(starts_y, tile_h, scale)]
+        weights_x = [w.to(self.device) for w in self._blend_weights(starts_x, tile_w, scale)]
+        windows_y = [min(max(y - self.tile_pad, 0), height - window_h) for y in starts_y]
+        windows_x = [min(max(x - self.tile_pad, 0), width - window_w) for x in starts_x]
+        out_tile_h = tile_h * scale
+        out_tile_w = tile_w * scale
+
+        # Filas ya acumuladas por la fila de tiles anterior que el tile actual completa
+        pending: Optional[torch.Tensor] = None
+        for iy, y in enumerate(starts_y):
+            strip = torch.zeros((1, 3, out_tile_h, width * scale), dtype=torch.float32, device=self.device)
+            if pending is not None:
+                strip[:, :, :pending.shape[2]] = pending
+
+            xs = list(range(len(starts_x)))
+            for i in range(0, len(xs), self.tile_batch_size):
+                chunk = xs[i:i + self.tile_batch_size]
+                tiles = torch.cat([
+                    self._input_window(img, slice(windows_y[iy], windows_y[iy] + window_h),
+                                       slice(windows_x[ix], windows_x[ix] + window_w))
+                    for ix in chunk
+                ], dim=0)
+
+                with torch.no_grad(), intra_op_threads(self.num_threads):
+                    tiles_output = self.model(tiles).float()
+
+                offset_y = (y - windows_y[iy]) * scale
+                for j, ix in enumerate(chunk):
+                    x = starts_x[ix] * scale
+                    offset_x = (starts_x[ix] - windows_x[ix]) * scale
+                    weight = weights_y[iy][:, None] * weights_x[ix][None, :]
+                    strip[:, :, :, x:x + out_tile_w] += \
+                        tiles_output[j:j + 1, :, offset_y:offset_y + out_tile_h,
+                                     offset_x:offset_x + out_tile_w] * weight
+
+            # Filas terminadas: las que la siguiente fila de tiles ya no cubre
+            done = (starts_y[iy + 1] - y) * scale if iy + 1 < len(starts_y) else out_tile_h
+            write_rows(self._to_uint8(strip[:, :, :done]))
+            pending = strip[:, :, done:].clone()
+            del strip
+
     def enhance(self, img: np.ndarray) -> np.ndarray:
         """Mejora una imagen."""
         img_tensor = torch.from_numpy(img.transpose(2, 0, 1)).float().unsqueeze(0) / 255.0
         img_tensor = img_tensor.to(self.device)
 
         if self._model_loaded and self.model is not None:
-            with torch.no_grad():
+            memory_format = torch.channels_last if self.channels_last else torch.contiguous_format
+            img_tensor = img_tensor.to(dtype=input_dtype(self.precision), memory_format=memory_format)
+            with torch.no_grad(), intra_op_threads(self.num_threads):
                 if img_tensor.shape[2] > self.tile_size or img_tensor.shape[3] > self.tile_size:
-                    output = self._tile_process(img_tensor)
+                    if self.tile_overlap > 0:
+                        output = self._tile_process_blended(img_tensor)
+                    elif self.tile_batch_size > 1:
+                        output = self._tile_process_batched(img_tensor)
+                    else:
+                        output = self._tile_process(img_tensor)
                 else:
                     output = self.model(img_tensor)
+            output = output.float()
+            if self.net_scale != self.scale:
+                output = F.interpolate(
+                    output,
+                    size=(img_tensor.shape[2] * self.scale, img_tensor.shape[3] * self.scale),
+                    mode='bicubic', align_corners=False, antialias=self.scale < self.net_scale
+                )
         else:
             output = F.interpolate(img_tensor, scale_factor=self.scale, mode='bicubic', align_corners=False)
 
-        output = output.squeeze(0).cpu().clamp(0, 1).numpy()
-        output = (output.transpose(1, 2, 0) * 255).astype(np.uint8)
+        return self._to_uint8(output)
 
-        return output
+    def enhance_region(self, img: np.ndarray, top: int, left: int, bottom: int, right: int) -> np.ndarray:
+        """Mejora solo la region [top:bottom, left:right] de una imagen.
+
+        Como en _tile_process, la region se procesa con tile_pad pixeles de
+        contexto (dentro de la imagen) que luego se descartan. Retorna la salida
+        de la region, de (bottom - top) * scale x (right - left) * scale.
+        """
+        height, width = img.shape[:2]
+        window_top = max(top - self.tile_pad, 0)
+        window_left = max(left - self.tile_pad, 0)
+        window_bottom = min(bottom + self.tile_pad, height)
+        window_right = min(right + self.tile_pad, width)
+        output = self.enhance(np.ascontiguousarray(img[window_top:window_bottom, window_left:window_right]))
+        return output[(top - window_top) * self.scale:(bottom - window_top) * self.scale,
+                      (left - window_left) * self.scale:(right - window_left) * self.scale]
 
 
 # =============================================================================
@@ -431,8 +927,8 @@ class GFPGANBilinear(nn.Module):
 class FaceRestoreHelper:
     """Ayudante para detectar, alinear y restaurar rostros.
 
-    Implementación simplificada que usa detección de rostros con OpenCV
-    y aplica GFPGAN a cada rostro detectado.
+    Implementación simplificada que usa el detector de rostros del proceso
+    (Haar o RetinaFace, ver face_detector) y aplica GFPGAN a cada rostro detectado.
     """
 
     def __init__(self, upscale_factor, face_size=512, crop_ratio=(1, 1),
@@ -445,9 +941,8 @@ class FaceRestoreHelper:
         # Parámetros para el crop del rostro
         self.center_face_size = int(face_size * 0.7)
 
-        # Cargar detector de rostros de OpenCV (Haar Cascade)
-        self.face_cascade = None
-        self._load_face_detector()
+        # Detector de rostros compartido del proceso (FACE_DETECTOR)
+        self.face_detector = get_face_detector()
 
         # Lista para almacenar rostros detectados
         self.all_landmarks_5 = []
@@ -458,16 +953,6 @@ class FaceRestoreHelper:
         self.restored_faces = []
         self.pad_input_imgs = []
 
-    def _load_face_detector(self):
-        """Carga el detector de rostros."""
-        try:
-            # Usar clasificador Haar de OpenCV
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
-        except Exception as e:
-            print(f"Error cargando detector de rostros: {e}")
-            self.face_cascade = None
-
     def clean_all(self):
         """Limpia todas las listas."""
         self.all_landmarks_5 = []
@@ -484,26 +969,22 @@ class FaceRestoreHelper:
         if img is not None:
             self.pad_input_imgs.append(img)
 
-    def get_face_landmarks_5(self, **_kwargs):
-        """Detecta rostros y obtiene landmarks aproximados."""
-        if self.face_cascade is None or self.input_img is None:
-            return 0
-
-        img = self.input_img
-        h, w = img.shape[:2]
-
-        # Convertir a escala de grises para detección
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-        # Detectar rostros
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
+    def get_face_landmarks_5(self, face_boxes: Optional[np.ndarray] = None,
+                             box_scale: float = 1.0, **_kwargs):
+        """Detecta rostros y obtiene landmarks aproximados.
 
-        for (x, y, fw, fh) in faces:
+        Con face_boxes se usan esas cajas (x, y, ancho, alto) en lugar de
+        detectar sobre input_img; p. ej. las detectadas en la imagen de baja
+        resolución, que se escalan por box_scale a la imagen de entrada.
+        """
+        if face_boxes is None:
+            if self.input_img is None:
+                return 0
+            face_boxes = self.face_detector.detect(self.input_img)
+
+        for box in face_boxes:
+            # Caja en pixeles de la imagen de entrada
+            x, y, fw, fh = (v * box_scale for v in box) if box_scale != 1 else box
             # Crear bounding box
             bbox = [x, y, x + fw, y + fh]
             self.det_faces.append(bbox)
@@ -582,54 +1063,112 @@ class FaceRestoreHelper:
         return self.inverse_affine_matrices
 
     def paste_faces_to_input_image(self, upsample_img=None):
-        """Pega los rostros restaurados en la imagen original."""
+        """Pega los rostros restaurados en la imagen original.
+
+        Cada rostro se deforma y mezcla solo dentro de su región (ROI) en la
+        imagen de salida, con la máscara suave cacheada por face_size y un
+        único buffer float reutilizado, de modo que el costo depende del
+        tamaño de los rostros y no del frame completo. upsample_img se
+        modifica en el lugar.
+        """
         if upsample_img is None:
             upsample_img = self.input_img.copy()
+        else:
+            upsample_img = np.ascontiguousarray(upsample_img)
 
         h, w = upsample_img.shape[:2]
+        mask = feather_mask(self.face_size)
 
-        for idx, (restored_face, inverse_affine) in enumerate(
-                zip(self.restored_faces, self.inverse_affine_matrices)):
-
-            # Escalar la matriz inversa al factor de upscale
+        # Escalar las matrices inversas al factor de upscale y calcular la ROI de cada rostro
+        pastes = []
+        for restored_face, inverse_affine in zip(self.restored_faces, self.inverse_affine_matrices):
             inv_soft = inverse_affine.copy()
             inv_soft[:, 2] *= self.upscale_factor
-
-            # Crear máscara suave para blending
-            mask = np.ones((self.face_size, self.face_size), dtype=np.float32)
-            # Aplicar gradiente en los bordes
-            border = int(self.face_size * 0.1)
-            mask[:border, :] *= np.linspace(0, 1, border).reshape(-1, 1)
-            mask[-border:, :] *= np.linspace(1, 0, border).reshape(-1, 1)
-            mask[:, :border] *= np.linspace(0, 1, border).reshape(1, -1)
-            mask[:, -border:] *= np.linspace(1, 0, border).reshape(1, -1)
-            mask = gaussian_filter(mask, sigma=3)
-            mask = np.stack([mask] * 3, axis=-1)
-
-            # Aplicar transformación inversa al rostro restaurado
+            roi = face_roi(inv_soft, self.face_size, w, h)
+            if roi is not None:
+                pastes.append((restored_face, inv_soft, roi))
+        if not pastes:
+            return upsample_img
+
+        # Buffer float del tamaño de la ROI más grande, compartido por todos los rostros
+        buffer = np.empty(max((bottom - top) * (right - left) for _, _, (top, left, bottom, right) in pastes) * 3,
+                          dtype=np.float32)
+
+        for restored_face, inv_soft, (top, left, bottom, right) in pastes:
+            roi_w, roi_h = right - left, bottom - top
+            # Transformación inversa relativa a la esquina de la ROI
+            inv_roi = inv_soft.copy()
+            inv_roi[0, 2] -= left
+            inv_roi[1, 2] -= top
             inv_restored = cv2.warpAffine(
-                restored_face, inv_soft, (w, h),
+                restored_face, inv_roi, (roi_w, roi_h),
                 borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0)
             )
             inv_mask = cv2.warpAffine(
-                mask, inv_soft, (w, h),
-                borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0)
+                mask, inv_roi, (roi_w, roi_h),
+                borderMode=cv2.BORDER_CONSTANT, borderValue=0
             )
 
-            # Blending
-            upsample_img = upsample_img.astype(np.float32)
-            upsample_img = inv_mask * inv_restored + (1 - inv_mask) * upsample_img
-            upsample_img = np.clip(upsample_img, 0, 255).astype(np.uint8)
+            # Blending en la ROI: fondo + máscara * (rostro - fondo)
+            background = upsample_img[top:bottom, left:right]
+            blended = buffer[:roi_h * roi_w * 3].reshape(roi_h, roi_w, 3)
+            np.subtract(inv_restored, background, out=blended, dtype=np.float32)
+            blended *= inv_mask[..., None]
+            blended += background
+            np.clip(blended, 0, 255, out=blended)
+            background[...] = blended
 
         return upsample_img
 
 
+# Máscaras suaves de blending por face_size (se construyen una sola vez)
+_feather_masks: Dict[int, np.ndarray] = {}
+
+
+def feather_mask(face_size: int) -> np.ndarray:
+    """Máscara float32 (face_size x face_size) con bordes suavizados para pegar rostros."""
+    mask = _feather_masks.get(face_size)
+    if mask is None:
+        mask = np.ones((face_size, face_size), dtype=np.float32)
+        # Aplicar gradiente en los bordes
+        border = int(face_size * 0.1)
+        mask[:border, :] *= np.linspace(0, 1, border).reshape(-1, 1)
+        mask[-border:, :] *= np.linspace(1, 0, border).reshape(-1, 1)
+        mask[:, :border] *= np.linspace(0, 1, border).reshape(1, -1)
+        mask[:, -border:] *= np.linspace(1, 0, border).reshape(1, -1)
+        mask = gaussian_filter(mask, sigma=3)
+        mask.flags.writeable = False
+        _feather_masks[face_size] = mask
+    return mask
+
+
+def face_roi(inverse_affine: np.ndarray, face_size: int, width: int,
+             height: int) -> Optional[Tuple[int, int, int, int]]:
+    """Región (top, left, bottom, right) que cubre un rostro pegado con inverse_affine.
+
+    Retorna None si el rostro queda fuera de la imagen.
+    """
+    corners = np.array([[0, 0, 1], [face_size, 0, 1], [0, face_size, 1], [face_size, face_size, 1]],
+                       dtype=np.float64)
+    points = corners @ inverse_affine.T
+    # Un pixel de margen para la interpolación bilineal en los bordes
+    left = max(int(np.floor(points[:, 0].min())) - 1, 0)
+    top = max(int(np.floor(points[:, 1].min())) - 1, 0)
+    right = min(int(np.ceil(points[:, 0].max())) + 2, width)
+    bottom = min(int(np.ceil(points[:, 1].max())) + 2, height)
+    if right <= left or bottom <= top:
+        return None
+    return top, left, bottom, right
+
+
 class GFPGANer:
     """Clase principal para face enhancement usando GFPGAN."""
 
     def __init__(self, model_path, upscale=2, arch='clean', channel_multiplier=2,
-                 device=None):
+                 device=None, batch_size=1):
         self.upscale = upscale
+        # Rostros alineados por forward del modelo
+        self.batch_size = max(1, batch_size)
         self.device = device or torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self._model_loaded = False
 
@@ -692,8 +1231,44 @@ class GFPGANer:
             print("GFPGAN: modelo complejo detectado, usando modo simplificado")
             self._model_loaded = False
 
+    def _restore_batch(self, cropped_faces: List[np.ndarray]) -> List[np.ndarray]:
+        """Restaura un lote de rostros alineados con un único forward del modelo."""
+        # Preparar input para el modelo (N x 3 x face_size x face_size)
+        cropped_faces_t = torch.from_numpy(
+            np.stack(cropped_faces).transpose(0, 3, 1, 2)).float() / 255.0
+        cropped_faces_t = cropped_faces_t.to(self.device)
+
+        # Normalizar a [-1, 1]
+        cropped_faces_t = (cropped_faces_t - 0.5) / 0.5
+
+        # Aplicar modelo
+        if self._model_loaded:
+            try:
+                output, _ = self.gfpgan(cropped_faces_t, return_rgb=True)
+            except Exception as e:
+                print(f"Error en GFPGAN forward: {e}")
+                output = cropped_faces_t
+        else:
+            # Modo fallback: aplicar sharpening y ajuste de contraste
+            output = cropped_faces_t
+            # Aplicar un poco de sharpening usando convolución
+            kernel = torch.tensor([
+                [0, -0.5, 0],
+                [-0.5, 3, -0.5],
+                [0, -0.5, 0]
+            ], device=self.device).float().view(1, 1, 3, 3).repeat(3, 1, 1, 1)
+            sharpened = F.conv2d(output, kernel, padding=1, groups=3)
+            output = 0.7 * output + 0.3 * sharpened
+
+        # Desnormalizar
+        output = output * 0.5 + 0.5
+        output = output.clamp(0, 1).cpu().numpy()
+        output = (output.transpose(0, 2, 3, 1) * 255).astype(np.uint8)
+        return list(output)
+
     @torch.no_grad()
-    def enhance(self, img, has_aligned=False, only_center_face=False, paste_back=True):
+    def enhance(self, img, has_aligned=False, only_center_face=False, paste_back=True,
+                face_boxes=None, box_scale=1.0):
         """Mejora los rostros en una imagen.
 
         Args:
@@ -701,6 +1276,8 @@ class GFPGANer:
             has_aligned: Si la imagen ya está alineada (un solo rostro)
             only_center_face: Solo procesar el rostro central
             paste_back: Pegar los rostros restaurados en la imagen original
+            face_boxes: Cajas (x, y, ancho, alto) ya detectadas (se omite la detección)
+            box_scale: Factor de las cajas a los pixeles de img
 
         Returns:
             cropped_faces: Lista de rostros recortados
@@ -711,7 +1288,7 @@ class GFPGANer:
         self.face_helper.read_image(img)
 
         # Detectar y alinear rostros
-        num_faces = self.face_helper.get_face_landmarks_5()
+        num_faces = self.face_helper.get_face_landmarks_5(face_boxes=face_boxes, box_scale=box_scale)
 
         if num_faces == 0:
             # No se detectaron rostros, retornar imagen original escalada
@@ -724,41 +1301,11 @@ class GFPGANer:
         # Alinear rostros
         self.face_helper.align_warp_face()
 
-        # Procesar cada rostro
-        for cropped_face in self.face_helper.cropped_faces:
-            # Preparar input para el modelo
-            cropped_face_t = torch.from_numpy(
-                cropped_face.transpose(2, 0, 1)).float().unsqueeze(0) / 255.0
-            cropped_face_t = cropped_face_t.to(self.device)
-
-            # Normalizar a [-1, 1]
-            cropped_face_t = (cropped_face_t - 0.5) / 0.5
-
-            # Aplicar modelo
-            if self._model_loaded:
-                try:
-                    output, _ = self.gfpgan(cropped_face_t, return_rgb=True)
-                except Exception as e:
-                    print(f"Error en GFPGAN forward: {e}")
-                    output = cropped_face_t
-            else:
-                # Modo fallback: aplicar sharpening y ajuste de contraste
-                output = cropped_face_t
-                # Aplicar un poco de sharpening usando convolución
-                kernel = torch.tensor([
-                    [0, -0.5, 0],
-                    [-0.5, 3, -0.5],
-                    [0, -0.5, 0]
-                ], device=self.device).float().view(1, 1, 3, 3).repeat(3, 1, 1, 1)
-                sharpened = F.conv2d(output, kernel, padding=1, groups=3)
-                output = 0.7 * output + 0.3 * sharpened
-
-            # Desnormalizar
-            output = output * 0.5 + 0.5
-            output = output.squeeze(0).clamp(0, 1).cpu().numpy()
-            output = (output.transpose(1, 2, 0) * 255).astype(np.uint8)
-
-            self.face_helper.add_restored_face(output)
+        # Procesar los rostros en lotes de batch_size (un forward por lote)
+        cropped_faces = self.face_helper.cropped_faces
+        for start in range(0, len(cropped_faces), self.batch_size):
+            for output in self._restore_batch(cropped_faces[start:start + self.batch_size]):
+                self.face_helper.add_restored_face(output)
 
         # Pegar rostros en la imagen
         if paste_back:
@@ -781,9 +1328,22 @@ class ImageService:
 
     def __init__(self):
         self.images_collection = None
-        self._upscalers: Dict[str, RealESRGANUpscaler] = {}
+        # Upscalers residentes por (modelo, escala) con presupuesto de memoria
+        self.model_registry = ModelRegistry(
+            self._create_upscaler, memory_budget_mb=config.MODEL_MEMORY_BUDGET_MB
+        )
         self._face_enhancer: Optional[GFPGANer] = None
-        self._gpu_used = False
+        # Detección de rostros sobre la entrada, en un hilo propio en paralelo con el upscaling
+        self._face_detect_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="face-detect")
+        # Los workers de inferencia comparten el face helper; el lock evita su uso concurrente
+        self._face_lock = threading.Lock()
+        self._job_workers: List[asyncio.Task] = []
+        # Precisión por modelo configurada por entorno (sobre MODEL_CONFIG)
+        self._precision_overrides = parse_precision_overrides(config.REALESRGAN_PRECISION)
+        # Tile, lote y threads calibrados por modelo para este host
+        self.tuning_profile = TuningProfile(
+            config.REALESRGAN_AUTOTUNE_PROFILE or os.path.join(WEIGHTS_DIR, 'autotune_profile.json')
+        )
         self._ensure_storage_dir()
 
     def _ensure_storage_dir(self):
@@ -794,48 +1354,144 @@ class ImageService:
         if self.images_collection is None:
             self.images_collection = get_collection("images")
 
-    def _get_upscaler_key(self, model_type: ModelType, scale: int) -> str:
-        """Genera una clave única para el upscaler."""
-        return f"{model_type.value}_{scale}"
-
     def _init_upscaler(self, model_type: ModelType = ModelType.GENERAL_X4, scale: Optional[int] = None):
-        """Inicializa el upscaler para el modelo y escala especificados."""
+        """Obtiene del registro el upscaler para el modelo y escala especificados."""
         model_cfg = MODEL_CONFIG[model_type]
         effective_scale = scale if scale is not None else model_cfg["scale"]
+        return self.model_registry.get(model_type, effective_scale)
 
-        cache_key = self._get_upscaler_key(model_type, effective_scale)
-        if cache_key in self._upscalers:
-            return self._upscalers[cache_key]
+    def preload_models(self, model_list: str):
+        """Precarga los modelos configurados ("modelo[:escala],...")."""
+        models = parse_model_list(model_list)
+        if not models:
+            return
+        start_time = time.time()
+        self.model_registry.preload(models)
+        print(f"Modelos precargados: {', '.join(f'{m.value}:{s}' for m, s in models)} "
+              f"({time.time() - start_time:.1f}s)")
+
+    def _model_precision(self, model_type: ModelType) -> str:
+        """Precisión configurada para un modelo."""
+        return self._precision_overrides.get(
+            model_type.value, MODEL_CONFIG[model_type].get("precision", "fp32")
+        )
 
+    def _inference_device(self) -> torch.device:
+        """Dispositivo en que corren los upscalers según la configuración."""
+        use_gpu = config.REALESRGAN_USE_GPU and torch.cuda.is_available()
+        return torch.device('cuda' if use_gpu else 'cpu')
+
+    def uses_gpu(self) -> bool:
+        """Indica si la inferencia de este proceso corre en GPU."""
+        return self._inference_device().type == 'cuda'
+
+    def _tiling_settings(self, model_type: ModelType, device: torch.device) -> dict:
+        """Tile, lote y threads del perfil calibrado o, si no hay, de la configuración."""
+        settings = {
+            "tile_size": config.REALESRGAN_TILE_SIZE,
+            "tile_batch_size": config.REALESRGAN_TILE_BATCH_SIZE,
+            "num_threads": config.REALESRGAN_NUM_THREADS,
+        }
+        tuned = self.tuning_profile.get(model_type.value, device, self._model_precision(model_type))
+        if tuned is not None:
+            settings.update({key: tuned[key] for key in settings})
+        return settings
+
+    def apply_tuning_profile(self):
+        """Aplica el perfil calibrado (posiblemente actualizado) a los upscalers residentes."""
+        for (model_type, _), upscaler in self.model_registry.entries():
+            upscaler.configure_tiling(**self._tiling_settings(model_type, upscaler.device))
+
+    def autotune_models(self, models: List[Tuple[ModelType, int]], only_missing: bool = False,
+                        tile_sizes: Optional[List[int]] = None, batch_sizes: Optional[List[int]] = None,
+                        threads: Optional[List[int]] = None, repeat: int = 3) -> dict:
+        """Calibra tile, lote y threads de cada modelo y guarda los ganadores en el perfil.
+
+        Con only_missing se omiten los modelos que ya tienen un perfil válido
+        para este host. Retorna las entradas calibradas por modelo.
+        """
+        candidates = {}
+        if tile_sizes:
+            candidates["tile_sizes"] = tile_sizes
+        if batch_sizes:
+            candidates["batch_sizes"] = batch_sizes
+
+        tuned = {}
+        for model_type in dict.fromkeys(model for model, _ in models):
+            scale = next(s for m, s in models if m == model_type)
+            upscaler = self._init_upscaler(model_type, scale)
+            precision = self._model_precision(model_type)
+            if only_missing and self.tuning_profile.get(model_type.value, upscaler.device, precision):
+                continue
+            if not upscaler._model_loaded:
+                print(f"Calibración omitida para {model_type.value}: modelo no cargado")
+                continue
+
+            print(f"Calibrando {model_type.value} ({upscaler.device.type}, {upscaler.precision})...")
+            start_time = time.time()
+            entry = autotune_upscaler(
+                upscaler,
+                # En un worker fijado los cores disponibles ya son solo los suyos
+                threads=threads or thread_candidates(1 if current_worker_cores() else config.INFERENCE_WORKERS),
+                repeat=repeat,
+                **candidates
+            )
+            if entry is None:
+                print(f"  {model_type.value}: ninguna combinación cupo en memoria")
+                continue
+            self.tuning_profile.update(model_type.value, upscaler.device, entry)
+            tuned[model_type.value] = entry
+            print(f"  {model_type.value}: tile={entry['tile_size']} batch={entry['tile_batch_size']} "
+                  f"threads={entry['num_threads'] or '-'} ({entry['mp_per_s']:.3f} MP/s, "
+                  f"{time.time() - start_time:.1f}s)")
+
+        self.apply_tuning_profile()
+        return tuned
+
+    def _create_upscaler(self, model_type: ModelType, effective_scale: int,
+                         base: Optional[RealESRGANUpscaler] = None):
+        """Crea un nuevo upscaler, reutilizando los pesos de base si es posible."""
+        model_cfg = MODEL_CONFIG[model_type]
         use_gpu = config.REALESRGAN_USE_GPU
 
         if use_gpu and torch.cuda.is_available():
             device = torch.device('cuda')
-            self._gpu_used = True
             print(f"GPU detectada: {torch.cuda.get_device_name(0)}")
         else:
             device = torch.device('cpu')
-            self._gpu_used = False
             if use_gpu and not torch.cuda.is_available():
                 print("GPU solicitada pero no disponible, usando CPU")
 
+        tiling = self._tiling_settings(model_type, device)
         upscaler = RealESRGANUpscaler(
             model_type=model_type,
             scale=effective_scale,
-            tile_size=config.REALESRGAN_TILE_SIZE,
+            tile_size=tiling["tile_size"],
             device=device,
-            use_gpu=use_gpu
+            use_gpu=use_gpu,
+            tile_batch_size=tiling["tile_batch_size"],
+            num_threads=tiling["num_threads"],
+            tile_overlap=config.REALESRGAN_TILE_OVERLAP,
+            tile_pad=config.REALESRGAN_TILE_PAD,
+            precision=self._model_precision(model_type),
+            min_psnr=config.REALESRGAN_MIN_PSNR,
+            compile_mode=config.REALESRGAN_COMPILE,
+            compiled_dir=config.REALESRGAN_COMPILED_DIR or None
         )
 
+        if base is not None and upscaler.share_weights_from(base):
+            print(f"Upscaler inicializado con pesos compartidos (model={model_type.value}, "
+                  f"scale={effective_scale}, net_scale={upscaler.net_scale})")
+            return upscaler
+
         weights_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'weights')
         model_filename = model_cfg["filename"]
         model_path = os.path.join(weights_dir, model_filename)
 
         upscaler.load_model(model_path if os.path.exists(model_path) else None)
-        self._upscalers[cache_key] = upscaler
 
         print(f"Upscaler inicializado (model={model_type.value}, scale={effective_scale}, "
-              f"device={device}, gpu_used={self._gpu_used})")
+              f"device={device}, gpu_used={device.type == 'cuda'})")
 
         return upscaler
 
@@ -856,26 +1512,37 @@ class ImageService:
             self._face_enhancer = GFPGANer(
                 model_path=gfpgan_path if os.path.exists(gfpgan_path) else None,
                 upscale=upscale,
-                device=device
+                device=device,
+                batch_size=config.GFPGAN_BATCH_SIZE
             )
-            print(f"GFPGAN inicializado (upscale={upscale}, device={device})")
+            print(f"GFPGAN inicializado (upscale={upscale}, device={device}, "
+                  f"batch={self._face_enhancer.batch_size})")
         except Exception as e:
             print(f"Error inicializando GFPGAN: {e}")
             self._face_enhancer = None
 
         return self._face_enhancer
 
-    def _decode_base64_image(self, base64_string: str) -> Tuple[Optional[Image.Image], Optional[str]]:
-        """Decodifica una imagen desde base64."""
+    def _decode_base64_image(self, base64_string: str) -> Tuple[Optional[Image.Image], int, Optional[str]]:
+        """Decodifica una imagen desde base64. Retorna (imagen, tamaño en bytes, error)."""
         try:
             if ',' in base64_string:
                 base64_string = base64_string.split(',')[1]
 
             image_data = base64.b64decode(base64_string)
             image = Image.open(io.BytesIO(image_data))
-            return image, None
+            return image, len(image_data), None
+        except Exception as e:
+            return None, 0, f"Error decodificando imagen: {str(e)}"
+
+    def _open_image_file(self, file_path: str) -> Tuple[Optional[Image.Image], int, Optional[str]]:
+        """Abre una imagen subida en binario. Retorna (imagen, tamaño en bytes, error)."""
+        try:
+            return Image.open(file_path), os.path.getsize(file_path), None
+        except Image.UnidentifiedImageError:
+            return None, 0, "El archivo no es una imagen válida"
         except Exception as e:
-            return None, f"Error decodificando imagen: {str(e)}"
+            return None, 0, f"Error leyendo imagen: {str(e)}"
 
     def _encode_image_base64(self, image: Image.Image, img_format: str = "PNG") -> str:
         """Codifica una imagen a base64."""
@@ -896,10 +1563,21 @@ class ImageService:
             return None
 
     def _save_image_to_disk(self, image: Image.Image, file_path: str, img_format: str = "PNG"):
-        """Guarda una imagen en disco."""
+        """Guarda una imagen en disco.
+
+        Se escribe en una ruta temporal y se reemplaza el destino: si file_path
+        ya es un hardlink de una entrada de la caché de resultados, escribir
+        en el lugar sobrescribiría la entrada y los archivos de otros usuarios.
+        """
         if img_format.upper() == "JPG":
             img_format = "JPEG"
-        image.save(file_path, format=img_format)
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            image.save(tmp_path, format=img_format)
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
     def _delete_file(self, file_path: str) -> bool:
         """Elimina un archivo del disco."""
@@ -916,18 +1594,23 @@ class ImageService:
         filename = f"{image_id}_{suffix}.{extension.lower()}"
         return os.path.join(IMAGE_STORAGE_PATH, filename)
 
+    def create_upload_path(self) -> str:
+        """Ruta temporal para recibir una imagen subida en binario.
+
+        Se ubica en el directorio de almacenamiento para que la original
+        pueda moverse a su ruta final sin copiarla.
+        """
+        self._ensure_storage_dir()
+        return os.path.join(IMAGE_STORAGE_PATH, f"{uuid.uuid4()}_upload.tmp")
+
     def _generate_description(self, filename: str, width: int, height: int,
                               model_type: str, now: datetime) -> str:
         """Genera una descripción automática para la imagen."""
         date_str = now.strftime("%d/%m/%Y %H:%M")
         return f"Tratamiento de imagen {filename} de dimensiones {width}x{height} con el filtro {model_type}, hoy {date_str}"
 
-    def _get_image_info(self, image: Image.Image, base64_string: str) -> dict:
+    def _get_image_info(self, image: Image.Image, size_bytes: int) -> dict:
         """Obtiene información de una imagen."""
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-        size_bytes = len(base64.b64decode(base64_string))
-
         return {
             "width": image.width,
             "height": image.height,
@@ -962,18 +1645,25 @@ class ImageService:
         face_enhance: bool,
         output_width: Optional[int],
         output_height: Optional[int]
-    ) -> Image.Image:
-        """Procesa la imagen con Real-ESRGAN y opcionalmente GFPGAN."""
+    ) -> Tuple[Image.Image, Optional[Tuple[int, int]]]:
+        """Procesa la imagen con Real-ESRGAN y opcionalmente GFPGAN.
+
+        Retorna (imagen mejorada, (rostros, ms de GFPGAN) o None sin face enhancement).
+        """
         # Inicializar upscaler con el modelo seleccionado
         upscaler = self._init_upscaler(model_type, effective_scale)
 
         # Convertir a numpy array y procesar
         img_array = np.array(image_rgb)
+        input_faces = self._start_face_detection(img_array, face_enhance, effective_scale)
         enhanced_array = upscaler.enhance(img_array)
 
         # Aplicar face enhancement si se solicitó
+        face_stats = None
         if face_enhance:
-            enhanced_array = self._apply_face_enhancement(enhanced_array)
+            enhanced_array, face_stats = self._apply_face_enhancement(
+                enhanced_array, input_faces, img_array.shape[1]
+            )
 
         # Convertir de vuelta a PIL
         enhanced_image = Image.fromarray(enhanced_array)
@@ -982,34 +1672,201 @@ class ImageService:
         if output_width or output_height:
             enhanced_image = self._resize_to_output(enhanced_image, output_width, output_height)
 
-        return enhanced_image
+        return enhanced_image, face_stats
+
+    def _process_image_to_file(
+        self,
+        image_rgb: Image.Image,
+        model_type: ModelType,
+        effective_scale: int,
+        face_enhance: bool,
+        output_width: Optional[int],
+        output_height: Optional[int],
+        enhanced_path: str,
+        extension: str
+    ) -> Tuple[Tuple[int, int], Optional[Tuple[int, int]]]:
+        """Mejora la imagen y la guarda en enhanced_path.
+
+        Las salidas grandes (REALESRGAN_STREAMING_MIN_MP) sin face enhancement ni
+        redimensionado se generan por franjas directamente al archivo, sin
+        materializar la imagen completa en float.
+        Retorna ((ancho, alto), estadisticas de rostros de _restore_faces o None).
+        """
+        upscaler = self._init_upscaler(model_type, effective_scale)
+        width, height = image_rgb.size
+        out_width, out_height = width * effective_scale, height * effective_scale
+        min_pixels = config.REALESRGAN_STREAMING_MIN_MP * 1_000_000
+
+        if (min_pixels > 0 and out_width * out_height >= min_pixels and upscaler.can_stream()
+                and not face_enhance and not output_width and not output_height):
+            writer = open_strip_writer(enhanced_path, out_width, out_height, extension)
+            try:
+                upscaler.enhance_streaming(np.asarray(image_rgb), writer.write)
+                writer.close()
+            except Exception:
+                writer.abort()
+                raise
+            return (out_width, out_height), None
+
+        enhanced_image, face_stats = self._process_image_enhancement(
+            image_rgb, model_type, effective_scale, face_enhance, output_width, output_height
+        )
+        self._save_image_to_disk(enhanced_image, enhanced_path, extension.upper())
+        return enhanced_image.size, face_stats
 
-    def _apply_face_enhancement(self, enhanced_array: np.ndarray) -> np.ndarray:
+    def _apply_face_enhancement(self, enhanced_array: np.ndarray, input_faces: Optional[Future] = None,
+                                input_width: int = 0) -> Tuple[np.ndarray, Tuple[int, int]]:
         """Aplica mejora de rostros con GFPGAN."""
         print("Aplicando face enhancement con GFPGAN...")
-        face_enhancer = self._init_face_enhancer(upscale=1)
-        if face_enhancer is not None:
+        enhanced_array, face_stats = self._restore_faces(enhanced_array, input_faces, input_width)
+        print(f"Face enhancement completado ({face_stats[0]} rostros en {face_stats[1]}ms)")
+        return enhanced_array, face_stats
+
+    def _detect_input_faces(self, img_array: np.ndarray, min_size: int) -> np.ndarray:
+        """Detecta rostros en la imagen de entrada RGB (corre en el hilo face-detect)."""
+        return get_face_detector().detect(img_array, min_size=min_size, rgb=True)
+
+    def _start_face_detection(self, img_array: np.ndarray, face_enhance: bool,
+                              scale: int) -> Optional[Future]:
+        """Inicia la detección de rostros sobre la entrada mientras corre Real-ESRGAN.
+
+        Detectar en la resolución original es hasta scale^2 veces más barato que
+        en la imagen mejorada y se solapa con el upscaling. Los rostros más
+        chicos que la ventana del detector en la entrada (p. ej. menos de 96 px
+        de salida en x4 con Haar) solo se buscan con FACE_DETECT_UPSAMPLE, que
+        amplía la entrada. Retorna None si no aplica (sin face enhancement o
+        con FACE_DETECT_ON_INPUT desactivado: se detecta sobre la imagen mejorada).
+        """
+        if not face_enhance or not config.FACE_DETECT_ON_INPUT:
+            return None
+        # Tamaño mínimo equivalente al de la detección sobre la imagen mejorada
+        min_size = max(1, 30 // max(scale, 1))
+        return self._face_detect_pool.submit(self._detect_input_faces, img_array, min_size)
+
+    def _restore_faces(self, enhanced_array: np.ndarray, input_faces=None,
+                       input_width: int = 0) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """Restaura los rostros de un array RGB con GFPGAN.
+
+        input_faces son las cajas de los rostros en la entrada de input_width
+        pixeles de ancho (o el Future de la detección iniciada con
+        _start_face_detection); se escalan a la imagen mejorada. Sin ellas se
+        detecta sobre enhanced_array.
+        Retorna (array restaurado, (rostros detectados, ms de GFPGAN)); el
+        tiempo incluye la detección (o la espera de la que corre en paralelo),
+        la restauración por lotes y el pegado.
+        """
+        face_boxes, box_scale, wait_time = None, 1.0, 0.0
+        if input_faces is not None:
+            start = time.perf_counter()
+            face_boxes = input_faces.result() if isinstance(input_faces, Future) else input_faces
+            wait_time = time.perf_counter() - start
+            box_scale = enhanced_array.shape[1] / input_width
+        with self._face_lock:
+            face_enhancer = self._init_face_enhancer(upscale=1)
+            if face_enhancer is None:
+                return enhanced_array, (0, 0)
+            start = time.perf_counter()
             enhanced_bgr = cv2.cvtColor(enhanced_array, cv2.COLOR_RGB2BGR)
-            _, _, restored_img = face_enhancer.enhance(
+            _, restored_faces, restored_img = face_enhancer.enhance(
                 enhanced_bgr,
                 has_aligned=False,
                 only_center_face=False,
-                paste_back=True
+                paste_back=True,
+                face_boxes=face_boxes,
+                box_scale=box_scale
             )
-            enhanced_array = cv2.cvtColor(restored_img, cv2.COLOR_BGR2RGB)
-            print("Face enhancement completado")
-        return enhanced_array
+            elapsed_ms = int((time.perf_counter() - start + wait_time) * 1000)
+        return cv2.cvtColor(restored_img, cv2.COLOR_BGR2RGB), (len(restored_faces), elapsed_ms)
 
-    async def enhance_image(
+    def _enhance_frame(self, img_array: np.ndarray, model_type: ModelType, scale: int,
+                       face_enhance: bool, face_boxes: Optional[np.ndarray] = None
+                       ) -> Tuple[np.ndarray, Optional[Tuple[int, int]]]:
+        """Mejora un frame de video (RGB) sin logs por frame.
+
+        face_boxes son las cajas de rostros del frame ya conocidas (seguimiento
+        de rostros del video); sin ellas se detectan.
+        Retorna (frame mejorado, (rostros, ms de GFPGAN) o None sin face enhancement).
+        """
+        upscaler = self._init_upscaler(model_type, scale)
+        input_faces = face_boxes
+        if face_boxes is None:
+            input_faces = self._start_face_detection(img_array, face_enhance, scale)
+        enhanced_array = upscaler.enhance(img_array)
+        face_stats = None
+        if face_enhance:
+            enhanced_array, face_stats = self._restore_faces(enhanced_array, input_faces, img_array.shape[1])
+        return enhanced_array, face_stats
+
+    def _enhance_frame_regions(self, img_array: np.ndarray, model_type: ModelType, scale: int,
+                               regions: List[Tuple[int, int, int, int]]) -> List[np.ndarray]:
+        """Mejora solo las regiones (top, left, bottom, right) de un frame."""
+        upscaler = self._init_upscaler(model_type, scale)
+        return [upscaler.enhance_region(img_array, *region) for region in regions]
+
+    def create_frame_ring(self, height: int, width: int, scale: int,
+                          num_slots: int) -> Optional[FrameRing]:
+        """Crea un ring de memoria compartida para frames de height x width.
+
+        Solo aplica si la inferencia corre en otros procesos (modos process y
+        pinned); retorna None con el pool de hilos o si no hay memoria
+        compartida suficiente, en cuyo caso los frames se pasan como arrays.
+        """
+        if inference_executor.mode == "thread":
+            return None
+        try:
+            ring = FrameRing(num_slots, height, width, scale)
+        except OSError as e:
+            print(f"Sin memoria compartida para el ring de frames ({e}), se transfieren serializados")
+            return None
+        print(f"Ring de frames: {ring.num_slots} slots, {ring.size_mb:.0f}MB en memoria compartida")
+        return ring
+
+    async def enhance_frame_slot(self, slot: FrameSlot, model_type: ModelType,
+                                 scale: int, face_enhance: bool,
+                                 regions: Optional[List[Tuple[int, int, int, int]]] = None,
+                                 face_boxes: Optional[np.ndarray] = None
+                                 ) -> Optional[Tuple[int, int]]:
+        """Mejora el frame de slot.input en el pool de inferencia dejando el resultado en slot.output.
+
+        Con regions solo se calculan esas regiones de la salida (el resto del
+        slot queda con datos anteriores). Retorna (rostros, ms de GFPGAN) o None.
+        """
+        if regions is not None:
+            await inference_executor.run(run_frame_regions_slot, slot.ref, model_type, scale, regions)
+            return None
+        return await inference_executor.run(
+            run_frame_enhancement_slot, slot.ref, model_type, scale, face_enhance, face_boxes
+        )
+
+    async def _store_original(
         self,
         user_id: str,
-        request: ImageEnhanceRequest
-    ) -> Tuple[Optional[ImageDetailResponse], Optional[str]]:
-        """Procesa y mejora una imagen, guardando en disco."""
-        self._get_collection()
+        request: ImageEnhanceParams,
+        upload_path: Optional[str] = None
+    ) -> Tuple[Optional[dict], Optional[str]]:
+        """Decodifica, valida y guarda la imagen original en disco.
+
+        La imagen viene en request.image_base64 o, si se indica upload_path,
+        en un archivo subido en binario; el archivo subido se mueve o elimina
+        siempre antes de retornar.
+        """
+        try:
+            return await self._store_original_image(user_id, request, upload_path)
+        finally:
+            if upload_path:
+                self._delete_file(upload_path)
 
-        # Decodificar imagen
-        image, error = self._decode_base64_image(request.image_base64)
+    async def _store_original_image(
+        self,
+        user_id: str,
+        request: ImageEnhanceParams,
+        upload_path: Optional[str]
+    ) -> Tuple[Optional[dict], Optional[str]]:
+        # Decodificar imagen (el base64 se decodifica una sola vez)
+        if upload_path:
+            image, size_bytes, error = self._open_image_file(upload_path)
+        else:
+            image, size_bytes, error = self._decode_base64_image(request.image_base64)
         if error:
             return None, error
 
@@ -1019,7 +1876,7 @@ class ImageService:
             return None, f"Formato no soportado: {img_format}"
 
         # Obtener info de la imagen original
-        img_info = self._get_image_info(image, request.image_base64)
+        img_info = self._get_image_info(image, size_bytes)
 
         # Validar tamaño
         max_size = config.MAX_IMAGE_SIZE_MB * 1024 * 1024
@@ -1055,29 +1912,176 @@ class ImageService:
         # Guardar imagen original en disco
         if image.mode != 'RGB':
             image_rgb = image.convert('RGB')
+            self._save_image_to_disk(image_rgb, original_path, extension.upper())
+        elif upload_path:
+            # El archivo subido ya es la original: se mueve sin recodificar
+            image_rgb = image
+            image_rgb.load()
+            os.replace(upload_path, original_path)
         else:
             image_rgb = image
-        self._save_image_to_disk(image_rgb, original_path, extension.upper())
+            self._save_image_to_disk(image_rgb, original_path, extension.upper())
 
-        # Determinar si se aplicará face enhancement
-        face_enhance = request.face_enhance or False
-
-        # Crear registro en DB (sin datos binarios)
-        image_doc = {
-            "user_id": user_id,
+        return {
+            "image_rgb": image_rgb,
+            "img_info": img_info,
+            "model_type": model_type,
+            "scale": effective_scale,
+            "face_enhance": request.face_enhance or False,
             "original_filename": original_filename,
             "description": description,
-            "original_width": img_info["width"],
-            "original_height": img_info["height"],
-            "model_type": model_type.value,
-            "scale": effective_scale,
-            "face_enhance": face_enhance,
+            "extension": extension,
             "original_path": original_path,
+            "enhanced_path": enhanced_path,
+            "created_at": now
+        }, None
+
+    def _build_image_doc(self, user_id: str, ctx: dict, status: ImageStatus) -> dict:
+        """Construye el registro de DB (sin datos binarios) para una imagen."""
+        return {
+            "user_id": user_id,
+            "original_filename": ctx["original_filename"],
+            "description": ctx["description"],
+            "original_width": ctx["img_info"]["width"],
+            "original_height": ctx["img_info"]["height"],
+            "model_type": ctx["model_type"].value,
+            "scale": ctx["scale"],
+            "face_enhance": ctx["face_enhance"],
+            "original_path": ctx["original_path"],
             "enhanced_path": None,
-            "status": ImageStatus.PROCESSING.value,
-            "created_at": now,
+            "status": status.value,
+            "created_at": ctx["created_at"],
+        }
+
+    def _completed_update(self, enhanced_path: str, enhanced_size: Tuple[int, int],
+                          processing_time: int, completed_at: datetime,
+                          cache_hit: bool = False,
+                          face_stats: Optional[Tuple[int, int]] = None,
+                          gpu_used: bool = False) -> dict:
+        """Campos a actualizar cuando una imagen termina de procesarse.
+
+        face_stats es (rostros, ms de GFPGAN); None si no se ejecuto GFPGAN.
+        """
+        return {
+            "enhanced_path": enhanced_path,
+            "enhanced_width": enhanced_size[0],
+            "enhanced_height": enhanced_size[1],
+            "status": ImageStatus.COMPLETED.value,
+            "error_message": None,
+            "processing_time_ms": processing_time,
+            "gpu_used": gpu_used,
+            "cache_hit": cache_hit,
+            "faces_detected": face_stats[0] if face_stats else None,
+            "gfpgan_time_ms": face_stats[1] if face_stats else None,
+            "completed_at": completed_at,
         }
 
+    def _weights_signature(self, filename: str) -> Optional[Tuple[int, int]]:
+        """Identifica la versión de un archivo de pesos (None en modo simulación)."""
+        try:
+            stat = os.stat(os.path.join(WEIGHTS_DIR, filename))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _result_cache_key(self, image_rgb: Image.Image, model_type: ModelType,
+                          effective_scale: int, face_enhance: bool,
+                          output_width: Optional[int], output_height: Optional[int]) -> str:
+        """Clave de la caché de resultados: píxeles, parámetros y versión de los pesos."""
+        tiling = self._tiling_settings(model_type, self._inference_device())
+        params = (
+            model_type.value, effective_scale, bool(face_enhance), output_width, output_height,
+            self._model_precision(model_type),
+            # El modo de tiling (mezclado, por lotes o tile a tile) cambia los píxeles de salida
+            (tiling["tile_size"], tiling["tile_batch_size"], config.REALESRGAN_TILE_OVERLAP,
+             config.REALESRGAN_TILE_PAD),
+            (config.REALESRGAN_COMPILE, MODEL_CONFIG[model_type].get("channels_last")),
+            self._weights_signature(MODEL_CONFIG[model_type]["filename"]),
+            self._weights_signature('GFPGANv1.4.pth') if face_enhance else None,
+            # La detección de rostros cambia qué rostros se restauran
+            (config.FACE_DETECTOR, config.FACE_DETECT_ON_INPUT, config.FACE_DETECT_MAX_SIDE,
+             config.FACE_DETECT_CONFIDENCE, config.FACE_DETECT_UPSAMPLE) if face_enhance else None,
+        )
+        return result_cache.make_key(image_rgb, params)
+
+    async def _enhance_to_path(
+        self,
+        image_rgb: Image.Image,
+        model_type: ModelType,
+        effective_scale: int,
+        face_enhance: bool,
+        output_width: Optional[int],
+        output_height: Optional[int],
+        enhanced_path: str,
+        extension: str
+    ) -> Tuple[Tuple[int, int], bool, bool, Optional[Tuple[int, int]]]:
+        """Mejora la imagen y la guarda en enhanced_path.
+
+        Si el mismo contenido ya se procesó con los mismos parámetros se
+        reutiliza el archivo de la caché de resultados sin ejecutar inferencia.
+        Retorna ((ancho, alto) de la imagen mejorada, si fue un hit de caché,
+        si se usó GPU, (rostros, ms de GFPGAN) o None si no se ejecutó GFPGAN).
+        """
+        cache_key = None
+        if result_cache.enabled:
+            cache_key = await asyncio.to_thread(
+                self._result_cache_key, image_rgb, model_type, effective_scale,
+                face_enhance, output_width, output_height
+            )
+            cached_size = await asyncio.to_thread(
+                result_cache.lookup, cache_key, extension, enhanced_path
+            )
+            if cached_size is not None:
+                return cached_size, True, False, None
+
+        # Procesar y guardar con Real-ESRGAN y opcionalmente GFPGAN en el pool de inferencia
+        enhanced_size, gpu_used, face_stats = await inference_executor.run(
+            run_image_enhancement,
+            image_rgb,
+            model_type,
+            effective_scale,
+            face_enhance,
+            output_width,
+            output_height,
+            enhanced_path,
+            extension
+        )
+
+        if cache_key is not None:
+            await asyncio.to_thread(result_cache.store, cache_key, extension, enhanced_path)
+
+        return enhanced_size, False, gpu_used, face_stats
+
+    async def enhance_image(
+        self,
+        user_id: str,
+        request: ImageEnhanceParams,
+        upload_path: Optional[str] = None
+    ) -> Tuple[Optional[ImageDetailResponse], Optional[str]]:
+        """Procesa y mejora una imagen, guardando en disco.
+
+        Si se indica upload_path, la imagen se toma de ese archivo subido en
+        binario en lugar de request.image_base64.
+        """
+        self._get_collection()
+
+        # Rechazar si la cola de inferencia está llena
+        if inference_executor.is_full():
+            if upload_path:
+                self._delete_file(upload_path)
+            return None, "Servidor ocupado, intente nuevamente en unos momentos"
+
+        ctx, error = await self._store_original(user_id, request, upload_path)
+        if error:
+            return None, error
+
+        model_type = ctx["model_type"]
+        effective_scale = ctx["scale"]
+        face_enhance = ctx["face_enhance"]
+        enhanced_path = ctx["enhanced_path"]
+
+        # Crear registro en DB (sin datos binarios)
+        image_doc = self._build_image_doc(user_id, ctx, ImageStatus.PROCESSING)
         result = await self.images_collection.insert_one(image_doc)
         db_image_id = str(result.inserted_id)
 
@@ -1085,57 +2089,52 @@ class ImageService:
         start_time = time.time()
 
         try:
-            # Procesar imagen con Real-ESRGAN y opcionalmente GFPGAN
-            enhanced_image = self._process_image_enhancement(
-                image_rgb,
+            # Mejorar (o reutilizar de la caché) y guardar la imagen en disco
+            enhanced_size, cache_hit, gpu_used, face_stats = await self._enhance_to_path(
+                ctx["image_rgb"],
                 model_type,
                 effective_scale,
                 face_enhance,
                 request.output_width,
-                request.output_height
+                request.output_height,
+                enhanced_path,
+                ctx["extension"]
             )
 
-            # Guardar imagen mejorada en disco
-            self._save_image_to_disk(enhanced_image, enhanced_path, extension.upper())
-
             processing_time = int((time.time() - start_time) * 1000)
             completed_at = datetime.utcnow()
 
             # Actualizar registro en DB
-            update_data = {
-                "enhanced_path": enhanced_path,
-                "enhanced_width": enhanced_image.width,
-                "enhanced_height": enhanced_image.height,
-                "status": ImageStatus.COMPLETED.value,
-                "processing_time_ms": processing_time,
-                "gpu_used": self._gpu_used,
-                "completed_at": completed_at,
-            }
-
             await self.images_collection.update_one(
                 {"_id": ObjectId(db_image_id)},
-                {"$set": update_data}
+                {"$set": self._completed_update(
+                    enhanced_path, enhanced_size, processing_time, completed_at, cache_hit, face_stats,
+                    gpu_used
+                )}
             )
 
             # Leer imágenes como base64 para la respuesta
-            original_base64 = self._read_image_base64(original_path)
+            original_base64 = self._read_image_base64(ctx["original_path"])
             enhanced_base64 = self._read_image_base64(enhanced_path)
 
             return ImageDetailResponse(
                 id=db_image_id,
-                original_filename=original_filename,
-                description=description,
-                original_width=img_info["width"],
-                original_height=img_info["height"],
-                enhanced_width=enhanced_image.width,
-                enhanced_height=enhanced_image.height,
+                original_filename=ctx["original_filename"],
+                description=ctx["description"],
+                original_width=ctx["img_info"]["width"],
+                original_height=ctx["img_info"]["height"],
+                enhanced_width=enhanced_size[0],
+                enhanced_height=enhanced_size[1],
                 model_type=model_type.value,
                 scale=effective_scale,
                 face_enhance=face_enhance,
                 status=ImageStatus.COMPLETED.value,
                 processing_time_ms=processing_time,
-                gpu_used=self._gpu_used,
-                created_at=now,
+                gpu_used=gpu_used,
+                cache_hit=cache_hit,
+                faces_detected=face_stats[0] if face_stats else None,
+                gfpgan_time_ms=face_stats[1] if face_stats else None,
+                created_at=ctx["created_at"],
                 completed_at=completed_at,
                 original_base64=original_base64,
                 enhanced_base64=enhanced_base64,
@@ -1152,14 +2151,216 @@ class ImageService:
                     "status": ImageStatus.FAILED.value,
                     "error_message": error_msg,
                     "processing_time_ms": processing_time,
-                    "gpu_used": self._gpu_used,
+                    "gpu_used": self.uses_gpu(),
                 }}
             )
 
             return None, f"Error procesando imagen: {error_msg}"
 
-    async def get_image(self, image_id: str, user_id: str) -> Optional[ImageDetailResponse]:
-        """Obtiene una imagen por su ID, leyendo los archivos desde disco."""
+    async def enqueue_image(
+        self,
+        user_id: str,
+        request: ImageEnhanceParams,
+        upload_path: Optional[str] = None
+    ) -> Tuple[Optional[ImageResponse], Optional[str]]:
+        """Guarda la imagen original y encola su procesamiento (respuesta inmediata)."""
+        self._get_collection()
+
+        ctx, error = await self._store_original(user_id, request, upload_path)
+        if error:
+            return None, error
+
+        # Crear registro en DB con status pending
+        image_doc = self._build_image_doc(user_id, ctx, ImageStatus.PENDING)
+        result = await self.images_collection.insert_one(image_doc)
+        db_image_id = str(result.inserted_id)
+
+        await image_job_queue.enqueue({
+            "image_id": db_image_id,
+            "enhanced_path": ctx["enhanced_path"],
+            "extension": ctx["extension"],
+            "output_width": request.output_width,
+            "output_height": request.output_height
+        }, priority=request.priority or 0)
+
+        return ImageResponse(
+            id=db_image_id,
+            original_filename=ctx["original_filename"],
+            description=ctx["description"],
+            original_width=ctx["img_info"]["width"],
+            original_height=ctx["img_info"]["height"],
+            enhanced_width=None,
+            enhanced_height=None,
+            model_type=ctx["model_type"].value,
+            scale=ctx["scale"],
+            face_enhance=ctx["face_enhance"],
+            status=ImageStatus.PENDING.value,
+            processing_time_ms=None,
+            gpu_used=None,
+            created_at=ctx["created_at"],
+            completed_at=None
+        ), None
+
+    def _load_image_rgb(self, file_path: str) -> Image.Image:
+        """Carga una imagen desde disco en modo RGB."""
+        with Image.open(file_path) as image:
+            return image.convert('RGB')
+
+    async def _renew_job_lease(self, job_id: str, worker_id: str, task: asyncio.Task,
+                               lease_lost: asyncio.Event):
+        """Renueva periódicamente el lease de un trabajo en curso.
+
+        Si el lease se perdió (otro worker tomó el trabajo) cancela task para
+        que este worker no escriba sobre el resultado del otro.
+        """
+        interval = max(image_job_queue.lease_seconds // 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await image_job_queue.renew(job_id, worker_id)
+            except Exception as e:
+                print(f"Error renovando el lease del trabajo {job_id}: {e}")
+                continue
+            if not renewed:
+                lease_lost.set()
+                task.cancel()
+                return
+
+    async def _process_image_job(self, job: dict, worker_id: str):
+        """Procesa un trabajo de la cola de imágenes."""
+        job_id = str(job["_id"])
+        payload = job["payload"]
+        image_id = payload["image_id"]
+
+        image_doc = await self.images_collection.find_one({"_id": ObjectId(image_id)})
+        if not image_doc:
+            # La imagen se eliminó mientras esperaba en la cola
+            await image_job_queue.complete(job_id)
+            return
+
+        await self.images_collection.update_one(
+            {"_id": ObjectId(image_id)},
+            {"$set": {"status": ImageStatus.PROCESSING.value}}
+        )
+
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(
+            self._renew_job_lease(job_id, worker_id, asyncio.current_task(), lease_lost)
+        )
+        start_time = time.time()
+        enhanced_path = payload["enhanced_path"]
+
+        try:
+            image_rgb = await asyncio.to_thread(self._load_image_rgb, image_doc["original_path"])
+            enhanced_size, cache_hit, gpu_used, face_stats = await self._enhance_to_path(
+                image_rgb,
+                ModelType(image_doc["model_type"]),
+                image_doc["scale"],
+                image_doc.get("face_enhance", False),
+                payload.get("output_width"),
+                payload.get("output_height"),
+                enhanced_path,
+                payload["extension"]
+            )
+
+            processing_time = int((time.time() - start_time) * 1000)
+            # Confirmar el lease antes de escribir el resultado
+            if not await image_job_queue.renew(job_id, worker_id):
+                print(f"Imagen {image_id}: {worker_id} perdió el lease, se descarta el resultado")
+                return
+            result = await self.images_collection.update_one(
+                {"_id": ObjectId(image_id)},
+                {"$set": self._completed_update(
+                    enhanced_path, enhanced_size, processing_time, datetime.utcnow(), cache_hit, face_stats,
+                    gpu_used
+                )}
+            )
+            if result.matched_count == 0:
+                # Eliminada durante el procesamiento: no dejar archivos huérfanos
+                self._delete_file(enhanced_path)
+
+            await image_job_queue.complete(job_id, worker_id)
+            print(f"Imagen {image_id} procesada por {worker_id} en {processing_time}ms"
+                  f"{' (caché)' if cache_hit else ''}")
+
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                raise
+            # Cancelado por el heartbeat: el trabajo ahora es de otro worker
+            asyncio.current_task().uncancel()
+            print(f"Imagen {image_id}: {worker_id} perdió el lease, se descarta el resultado")
+
+        except Exception as e:
+            error_msg = str(e)
+            retry = await image_job_queue.fail(job, error_msg)
+            print(f"Error procesando imagen {image_id} (intento {job['attempts']}): {error_msg}")
+            if retry is None:
+                # Otro worker tomó el trabajo: el documento es suyo
+                return
+
+            await self.images_collection.update_one(
+                {"_id": ObjectId(image_id)},
+                {"$set": {
+                    "status": ImageStatus.PENDING.value if retry else ImageStatus.FAILED.value,
+                    "error_message": error_msg,
+                    "processing_time_ms": int((time.time() - start_time) * 1000),
+                    "gpu_used": self.uses_gpu(),
+                }}
+            )
+        finally:
+            heartbeat.cancel()
+
+    async def _fail_abandoned_jobs(self):
+        """Marca como fallidas las imágenes cuyo trabajo agotó sus intentos sin terminar."""
+        for job in await image_job_queue.expire_exhausted():
+            print(f"Imagen {job['payload']['image_id']} fallida: {job['last_error']}")
+            await self.images_collection.update_one(
+                {"_id": ObjectId(job["payload"]["image_id"])},
+                {"$set": {
+                    "status": ImageStatus.FAILED.value,
+                    "error_message": job["last_error"]
+                }}
+            )
+
+    async def _job_worker_loop(self, worker_id: str):
+        """Toma trabajos de la cola de imágenes mientras el servidor esté activo."""
+        self._get_collection()
+        while True:
+            try:
+                await self._fail_abandoned_jobs()
+                job = await image_job_queue.lease(worker_id)
+            except Exception as e:
+                print(f"Error tomando trabajo de la cola ({worker_id}): {e}")
+                job = None
+
+            if job is None:
+                await asyncio.sleep(config.IMAGE_QUEUE_POLL_SECONDS)
+                continue
+
+            await self._process_image_job(job, worker_id)
+
+    def start_job_workers(self, count: int):
+        """Inicia los workers que consumen la cola de imágenes."""
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        for i in range(count):
+            worker_id = f"{prefix}-{i}"
+            self._job_workers.append(asyncio.create_task(self._job_worker_loop(worker_id)))
+        print(f"Workers de cola de imágenes iniciados: {count}")
+
+    async def stop_job_workers(self):
+        """Detiene los workers de la cola; los leases pendientes expiran solos."""
+        for task in self._job_workers:
+            task.cancel()
+        await asyncio.gather(*self._job_workers, return_exceptions=True)
+        self._job_workers = []
+
+    async def get_image(self, image_id: str, user_id: str,
+                        include_media: bool = True) -> Optional[ImageDetailResponse]:
+        """Obtiene una imagen por su ID.
+
+        Con include_media=False solo retorna metadata y las URLs de descarga,
+        sin leer los archivos desde disco.
+        """
         self._get_collection()
 
         try:
@@ -1175,10 +2376,10 @@ class ImageService:
             original_base64 = None
             enhanced_base64 = None
 
-            if image_doc.get("original_path"):
+            if include_media and image_doc.get("original_path"):
                 original_base64 = self._read_image_base64(image_doc["original_path"])
 
-            if image_doc.get("enhanced_path"):
+            if include_media and image_doc.get("enhanced_path"):
                 enhanced_base64 = self._read_image_base64(image_doc["enhanced_path"])
 
             return ImageDetailResponse(
@@ -1195,15 +2396,42 @@ class ImageService:
                 status=image_doc["status"],
                 processing_time_ms=image_doc.get("processing_time_ms"),
                 gpu_used=image_doc.get("gpu_used"),
+                cache_hit=image_doc.get("cache_hit"),
+                faces_detected=image_doc.get("faces_detected"),
+                gfpgan_time_ms=image_doc.get("gfpgan_time_ms"),
                 created_at=image_doc["created_at"],
                 completed_at=image_doc.get("completed_at"),
                 original_base64=original_base64,
                 enhanced_base64=enhanced_base64,
+                original_url=f"/api/images/{image_id}/original" if image_doc.get("original_path") else None,
+                enhanced_url=f"/api/images/{image_id}/enhanced" if image_doc.get("enhanced_path") else None,
                 error_message=image_doc.get("error_message")
             )
         except Exception:
             return None
 
+    async def get_image_file(self, image_id: str, user_id: str,
+                             kind: str) -> Optional[Tuple[str, str]]:
+        """Retorna (ruta en disco, nombre de descarga) del archivo original o mejorado."""
+        self._get_collection()
+
+        try:
+            image_doc = await self.images_collection.find_one(
+                {"_id": ObjectId(image_id), "user_id": user_id},
+                {"original_filename": 1, "original_path": 1, "enhanced_path": 1}
+            )
+        except Exception:
+            return None
+
+        if not image_doc or not image_doc.get(f"{kind}_path"):
+            return None
+
+        file_path = image_doc[f"{kind}_path"]
+        name = os.path.splitext(image_doc.get("original_filename") or "image")[0]
+        extension = os.path.splitext(file_path)[1]
+        download_name = f"{name}{extension}" if kind == "original" else f"{name}_enhanced{extension}"
+        return file_path, download_name
+
     async def list_images(
         self,
         user_id: str,
@@ -1241,6 +2469,9 @@ class ImageService:
                 status=doc["status"],
                 processing_time_ms=doc.get("processing_time_ms"),
                 gpu_used=doc.get("gpu_used"),
+                cache_hit=doc.get("cache_hit"),
+                faces_detected=doc.get("faces_detected"),
+                gfpgan_time_ms=doc.get("gfpgan_time_ms"),
                 created_at=doc["created_at"],
                 completed_at=doc.get("completed_at")
             ))
@@ -1266,6 +2497,9 @@ class ImageService:
             if not image_doc:
                 return False
 
+            # Cancelar el trabajo si aún está en la cola
+            await image_job_queue.cancel_for("image_id", image_id)
+
             # Eliminar archivos del disco
             if image_doc.get("original_path"):
                 self._delete_file(image_doc["original_path"])
@@ -1286,3 +2520,64 @@ class ImageService:
 
 
 image_service = ImageService()
+
+
+def run_image_enhancement(
+    image_rgb: Image.Image,
+    model_type: ModelType,
+    effective_scale: int,
+    face_enhance: bool,
+    output_width: Optional[int],
+    output_height: Optional[int],
+    enhanced_path: str,
+    extension: str
+) -> Tuple[Tuple[int, int], bool, Optional[Tuple[int, int]]]:
+    """Tarea del pool de inferencia: mejora una imagen, la guarda y reporta si usó GPU
+    y las estadísticas de rostros (ver ImageService._restore_faces).
+
+    El guardado ocurre en el worker para no transferir la imagen mejorada al
+    proceso principal (modo process) y para poder escribirla por franjas.
+    """
+    enhanced_size, face_stats = image_service._process_image_to_file(
+        image_rgb, model_type, effective_scale, face_enhance, output_width, output_height,
+        enhanced_path, extension
+    )
+    return enhanced_size, image_service.uses_gpu(), face_stats
+
+
+def run_frame_enhancement(img_array: np.ndarray, model_type: ModelType, scale: int, face_enhance: bool,
+                          face_boxes: Optional[np.ndarray] = None
+                          ) -> Tuple[np.ndarray, Optional[Tuple[int, int]]]:
+    """Tarea del pool de inferencia: mejora un frame de video en memoria.
+
+    Retorna (frame mejorado, (rostros, ms de GFPGAN) o None).
+    """
+    return image_service._enhance_frame(img_array, model_type, scale, face_enhance, face_boxes)
+
+
+def run_frame_enhancement_slot(slot_ref: SlotRef, model_type: ModelType, scale: int, face_enhance: bool,
+                               face_boxes: Optional[np.ndarray] = None) -> Optional[Tuple[int, int]]:
+    """Tarea del pool de inferencia: mejora un frame de un slot del ring de memoria compartida.
+
+    Retorna (rostros, ms de GFPGAN) o None sin face enhancement.
+    """
+    enhanced_array, face_stats = image_service._enhance_frame(
+        slot_ref.input(), model_type, scale, face_enhance, face_boxes
+    )
+    slot_ref.output()[...] = enhanced_array
+    return face_stats
+
+
+def run_frame_regions(img_array: np.ndarray, model_type: ModelType, scale: int,
+                      regions: List[Tuple[int, int, int, int]]) -> List[np.ndarray]:
+    """Tarea del pool de inferencia: mejora solo algunas regiones de un frame."""
+    return image_service._enhance_frame_regions(img_array, model_type, scale, regions)
+
+
+def run_frame_regions_slot(slot_ref: SlotRef, model_type: ModelType, scale: int,
+                           regions: List[Tuple[int, int, int, int]]):
+    """Tarea del pool de inferencia: mejora regiones del frame de un slot escribiéndolas en su salida."""
+    output = slot_ref.output()
+    patches = image_service._enhance_frame_regions(slot_ref.input(), model_type, scale, regions)
+    for (top, left, bottom, right), patch in zip(regions, patches):
+        output[top * scale:bottom * scale, left * scale:right * scale] = patch
@@ -0,0 +1,160 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import threading
+from typing import Callable, Optional
+
+from app.config import config
+from app.services.worker_pool import PinnedWorkerPool
+
+
+def _init_process_worker():
+    """Inicializa un proceso worker precargando los modelos configurados."""
+    from app.services.image_service import image_service
+
+    image_service.preload_models(config.MODEL_PRELOAD)
+    if config.GFPGAN_PRELOAD:
+        image_service._init_face_enhancer(upscale=1)
+
+
+def _preload_models():
+    """Precarga los modelos configurados en el worker que ejecuta la tarea."""
+    from app.services.image_service import image_service
+
+    image_service.preload_models(config.MODEL_PRELOAD)
+    # Toma un perfil calibrado después de que el worker cargó sus modelos
+    image_service.apply_tuning_profile()
+
+
+def _autotune_models():
+    """Calibra los modelos precargados que no tienen perfil para este host."""
+    from app.services.image_service import image_service
+    from app.services.model_registry import parse_model_list
+
+    image_service.autotune_models(parse_model_list(config.MODEL_PRELOAD), only_missing=True)
+
+
+class InferenceExecutor:
+    """Ejecuta la inferencia de los modelos fuera del event loop de Tornado.
+
+    Soporta tres modos:
+    - thread: pool de hilos, las operaciones de torch liberan el GIL
+    - process: pool de procesos, cada uno con sus propios modelos precargados
+    - pinned: procesos fijados a conjuntos de cores disjuntos, con despacho al
+      worker menos cargado y transferencia por memoria compartida
+
+    La concurrencia queda limitada por el número de workers; las tareas
+    adicionales esperan en la cola interna del executor.
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: int = 1, max_queue: int = 0,
+                 cores_per_worker: int = 0):
+        self.mode = mode if mode in ("thread", "process", "pinned") else "thread"
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        # Cores por worker en modo pinned (0 = repartir todos los cores)
+        self.cores_per_worker = max(0, cores_per_worker)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _get_executor(self) -> Executor:
+        """Crea el executor de forma diferida en el primer uso."""
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "pinned":
+                    self._executor = PinnedWorkerPool(
+                        num_workers=self.max_workers,
+                        cores_per_worker=self.cores_per_worker,
+                        initializer=_init_process_worker
+                    )
+                elif self.mode == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_process_worker
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="inference"
+                    )
+                print(f"Executor de inferencia iniciado (mode={self.mode}, workers={self.max_workers})")
+            return self._executor
+
+    def is_full(self) -> bool:
+        """Indica si la cola alcanzó el límite configurado (0 = sin límite)."""
+        if self.max_queue == 0:
+            return False
+        return self.queue_depth() >= self.max_queue
+
+    def queue_depth(self) -> int:
+        """Número de tareas esperando un worker libre."""
+        return max(self._in_flight - self.max_workers, 0)
+
+    async def run(self, fn: Callable, *args):
+        """Ejecuta fn(*args) en el pool y espera su resultado sin bloquear el loop.
+
+        En modo process, fn y sus argumentos deben ser serializables (funciones
+        a nivel de módulo).
+        """
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            result = await loop.run_in_executor(executor, fn, *args)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+    async def warm_up(self):
+        """Precarga los modelos configurados antes de recibir requests.
+
+        En modo process y pinned cada worker los carga en su initializer; aquí se
+        fuerza el arranque de los workers. Con REALESRGAN_AUTOTUNE_ON_STARTUP
+        primero se calibran los modelos sin perfil.
+        """
+        tasks = self.max_workers if self.mode in ("process", "pinned") else 1
+        try:
+            if config.REALESRGAN_AUTOTUNE_ON_STARTUP:
+                # Una sola calibración (en un worker); los demás leen el perfil guardado
+                await self.run(_autotune_models)
+            await asyncio.gather(*(self.run(_preload_models) for _ in range(tasks)))
+        except Exception as e:
+            print(f"Error precargando modelos: {e}")
+
+    def stats(self) -> dict:
+        """Retorna el estado actual del pool para monitoreo."""
+        stats = {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "active": min(self._in_flight, self.max_workers),
+            "queued": self.queue_depth(),
+            "max_queue": self.max_queue,
+            "completed": self._completed,
+            "failed": self._failed
+        }
+        if isinstance(self._executor, PinnedWorkerPool):
+            stats["workers"] = self._executor.stats()
+        return stats
+
+    def shutdown(self):
+        """Detiene el pool esperando las tareas en curso."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+inference_executor = InferenceExecutor(
+    mode=config.INFERENCE_EXECUTOR,
+    max_workers=config.INFERENCE_WORKERS,
+    max_queue=config.INFERENCE_MAX_QUEUE,
+    cores_per_worker=config.INFERENCE_CORES_PER_WORKER
+)
@@ -0,0 +1,223 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from app.config import config
+from app.database import get_collection
+
+
+class JobStatus:
+    """Estados de un trabajo en la cola."""
+    QUEUED = "queued"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobQueue:
+    """Cola persistente de trabajos sobre una colección de MongoDB.
+
+    Los workers toman trabajos con un lease temporal: si el worker muere,
+    el lease expira y el trabajo vuelve a estar disponible para otro worker.
+    Los trabajos fallidos se reintentan con backoff hasta max_attempts; un
+    trabajo cuyo lease venció sin intentos restantes (p. ej. porque tira abajo
+    al worker) no se vuelve a tomar y expire_exhausted() lo marca fallido.
+    complete() y fail() solo actúan si el worker todavía tiene el lease.
+    """
+
+    def __init__(self, collection_name: str, lease_seconds: int = 300,
+                 max_attempts: int = 3, retry_delay_seconds: int = 10,
+                 payload_key: str = "image_id"):
+        self.collection_name = collection_name
+        # Campo del payload que identifica el documento procesado (indexado)
+        self.payload_key = payload_key
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self.jobs_collection = None
+
+    def _get_collection(self):
+        if self.jobs_collection is None:
+            self.jobs_collection = get_collection(self.collection_name)
+
+    async def ensure_indexes(self):
+        """Crea los índices usados para tomar trabajos por prioridad."""
+        self._get_collection()
+        await self.jobs_collection.create_index(
+            [("status", ASCENDING), ("priority", DESCENDING), ("available_at", ASCENDING)]
+        )
+        await self.jobs_collection.create_index([("lease_until", ASCENDING)])
+        await self.jobs_collection.create_index([(f"payload.{self.payload_key}", ASCENDING)])
+
+    async def enqueue(self, payload: dict, priority: int = 0) -> str:
+        """Agrega un trabajo a la cola y retorna su ID."""
+        self._get_collection()
+        now = datetime.utcnow()
+        job_doc = {
+            "payload": payload,
+            "priority": priority,
+            "status": JobStatus.QUEUED,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "available_at": now,
+            "lease_until": None,
+            "worker_id": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        result = await self.jobs_collection.insert_one(job_doc)
+        return str(result.inserted_id)
+
+    async def lease(self, worker_id: str) -> Optional[dict]:
+        """Toma el trabajo disponible de mayor prioridad (o con lease vencido)."""
+        self._get_collection()
+        now = datetime.utcnow()
+        return await self.jobs_collection.find_one_and_update(
+            {"$or": [
+                {"status": JobStatus.QUEUED, "available_at": {"$lte": now}},
+                {"status": JobStatus.LEASED, "lease_until": {"$lt": now},
+                 "$expr": {"$lt": ["$attempts", "$max_attempts"]}}
+            ]},
+            {
+                "$set": {
+                    "status": JobStatus.LEASED,
+                    "worker_id": worker_id,
+                    "lease_until": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("priority", DESCENDING), ("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def renew(self, job_id: str, worker_id: str) -> bool:
+        """Extiende el lease de un trabajo en curso."""
+        self._get_collection()
+        now = datetime.utcnow()
+        result = await self.jobs_collection.update_one(
+            {"_id": ObjectId(job_id), "worker_id": worker_id, "status": JobStatus.LEASED},
+            {"$set": {
+                "lease_until": now + timedelta(seconds=self.lease_seconds),
+                "updated_at": now
+            }}
+        )
+        return result.modified_count > 0
+
+    async def complete(self, job_id: str, worker_id: Optional[str] = None) -> bool:
+        """Marca un trabajo como terminado.
+
+        Con worker_id solo si ese worker todavía tiene el lease; retorna False
+        si otro worker lo tomó.
+        """
+        self._get_collection()
+        query = {"_id": ObjectId(job_id)}
+        if worker_id is not None:
+            query.update({"worker_id": worker_id, "status": JobStatus.LEASED})
+        result = await self.jobs_collection.update_one(
+            query,
+            {"$set": {
+                "status": JobStatus.DONE,
+                "lease_until": None,
+                "updated_at": datetime.utcnow()
+            }}
+        )
+        return result.matched_count > 0
+
+    async def fail(self, job: dict, error_message: str) -> Optional[bool]:
+        """Registra un fallo. Retorna True si el trabajo se volverá a intentar.
+
+        Retorna None sin modificar nada si el worker ya no tiene el lease.
+        """
+        self._get_collection()
+        now = datetime.utcnow()
+        retry = job["attempts"] < job.get("max_attempts", self.max_attempts)
+        update = {
+            "status": JobStatus.QUEUED if retry else JobStatus.FAILED,
+            "lease_until": None,
+            "last_error": error_message,
+            "updated_at": now
+        }
+        if retry:
+            delay = self.retry_delay_seconds * (2 ** (job["attempts"] - 1))
+            update["available_at"] = now + timedelta(seconds=delay)
+
+        result = await self.jobs_collection.update_one(
+            {"_id": job["_id"], "worker_id": job["worker_id"], "status": JobStatus.LEASED},
+            {"$set": update}
+        )
+        if result.matched_count == 0:
+            return None
+        return retry
+
+    async def expire_exhausted(self) -> List[dict]:
+        """Marca como fallidos los trabajos con lease vencido y sin intentos restantes.
+
+        Son trabajos cuyo worker murió en el último intento; retorna los
+        trabajos marcados para que el servicio actualice sus documentos.
+        """
+        self._get_collection()
+        now = datetime.utcnow()
+        expired = []
+        async for job in self.jobs_collection.find({
+            "status": JobStatus.LEASED,
+            "lease_until": {"$lt": now},
+            "$expr": {"$gte": ["$attempts", "$max_attempts"]}
+        }):
+            error_message = f"El worker se detuvo durante el trabajo ({job['attempts']} intentos)"
+            result = await self.jobs_collection.update_one(
+                {"_id": job["_id"], "status": JobStatus.LEASED, "lease_until": job["lease_until"]},
+                {"$set": {
+                    "status": JobStatus.FAILED,
+                    "lease_until": None,
+                    "last_error": error_message,
+                    "updated_at": now
+                }}
+            )
+            if result.modified_count > 0:
+                job["last_error"] = error_message
+                expired.append(job)
+        return expired
+
+    async def cancel_for(self, payload_field: str, value) -> int:
+        """Elimina los trabajos pendientes asociados a un valor del payload."""
+        self._get_collection()
+        result = await self.jobs_collection.delete_many({
+            f"payload.{payload_field}": value,
+            "status": {"$in": [JobStatus.QUEUED, JobStatus.LEASED]}
+        })
+        return result.deleted_count
+
+    async def stats(self) -> dict:
+        """Cuenta los trabajos por estado."""
+        self._get_collection()
+        counts = {
+            JobStatus.QUEUED: 0,
+            JobStatus.LEASED: 0,
+            JobStatus.DONE: 0,
+            JobStatus.FAILED: 0
+        }
+        async for row in self.jobs_collection.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+
+image_job_queue = JobQueue(
+    "image_jobs",
+    lease_seconds=config.IMAGE_JOB_LEASE_SECONDS,
+    max_attempts=config.IMAGE_JOB_MAX_ATTEMPTS,
+    retry_delay_seconds=config.IMAGE_JOB_RETRY_DELAY_SECONDS
+)
+
+video_job_queue = JobQueue(
+    "video_jobs",
+    lease_seconds=config.VIDEO_JOB_LEASE_SECONDS,
+    max_attempts=config.VIDEO_JOB_MAX_ATTEMPTS,
+    retry_delay_seconds=config.VIDEO_JOB_RETRY_DELAY_SECONDS,
+    payload_key="video_id"
+)
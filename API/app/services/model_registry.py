@@ -0,0 +1,189 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import torch
+
+from app.models.image import ModelType, MODEL_CONFIG
+
+
+def parse_model_list(value: str) -> List[Tuple[ModelType, int]]:
+    """Parsea una lista "modelo[:escala],..." (ej. "general_x4,general_v3:2").
+
+    Sin escala se usa la escala nativa del modelo. Las entradas inválidas se
+    ignoran con un aviso.
+    """
+    models = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, scale = item.partition(":")
+        try:
+            model_type = ModelType(name.strip())
+            models.append((model_type, int(scale) if scale else MODEL_CONFIG[model_type]["scale"]))
+        except ValueError:
+            print(f"Modelo inválido en la lista de precarga: '{item}'")
+    return models
+
+
+def module_bytes(module: Optional[torch.nn.Module], seen: Optional[set] = None) -> int:
+    """Bytes ocupados por los pesos y buffers de un módulo.
+
+    Los módulos y tensores ya contados en seen (compartidos entre instancias)
+    no se vuelven a sumar. Se usa el state_dict para incluir los pesos
+    empaquetados de los módulos cuantizados, que no son parámetros.
+    """
+    if module is None:
+        return 0
+    seen = seen if seen is not None else set()
+    if id(module) in seen:
+        return 0
+    seen.add(id(module))
+    total = 0
+    for tensor in module.state_dict(keep_vars=True).values():
+        if not torch.is_tensor(tensor):
+            continue
+        ptr = tensor.data_ptr()
+        if ptr in seen:
+            continue
+        seen.add(ptr)
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ModelRegistry:
+    """Registro de upscalers residentes con presupuesto de memoria y desalojo LRU.
+
+    Cada entrada es un upscaler por (modelo, escala). Las entradas del mismo
+    modelo comparten los pesos (el factory recibe una instancia residente como
+    base), por lo que la memoria se contabiliza y se libera por modelo: al
+    superar el presupuesto se desaloja el modelo usado menos recientemente con
+    todas sus escalas.
+
+    La carga (el factory) corre fuera del lock del registro, así un modelo que
+    tarda en cargarse no bloquea los hits de los demás. Un lock de carga por
+    modelo evita cargar dos veces el mismo modelo y permite que sus otras
+    escalas reutilicen los pesos recién cargados.
+    """
+
+    def __init__(self, factory: Callable[[ModelType, int, Optional[Any]], Any],
+                 memory_budget_mb: int = 0):
+        # factory(model_type, scale, base) crea el upscaler; base es otra
+        # instancia residente del mismo modelo cuyos pesos puede reutilizar
+        self._factory = factory
+        self.memory_budget_bytes = max(0, memory_budget_mb) * 1024 * 1024
+        self._entries: "OrderedDict[Tuple[ModelType, int], Any]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._loading: Dict[ModelType, threading.Lock] = {}
+        self.loads = 0
+        self.shared_loads = 0
+        self.evictions = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model_type: ModelType, scale: int):
+        """Retorna el upscaler para (modelo, escala), cargándolo si no está residente."""
+        key = (model_type, scale)
+        with self._lock:
+            upscaler = self._lookup(key)
+            if upscaler is not None:
+                return upscaler
+            loading = self._loading.setdefault(model_type, threading.Lock())
+
+        with loading:
+            with self._lock:
+                # Otro hilo pudo cargarlo mientras se esperaba el lock de carga
+                upscaler = self._lookup(key)
+                if upscaler is not None:
+                    return upscaler
+                self.misses += 1
+                base = next(
+                    (entry for (entry_model, _), entry in self._entries.items()
+                     if entry_model == model_type and entry.model is not None),
+                    None
+                )
+
+            upscaler = self._factory(model_type, scale, base)
+
+            with self._lock:
+                if base is not None:
+                    self.shared_loads += 1
+                else:
+                    self.loads += 1
+                self._entries[key] = upscaler
+                self._enforce_budget(keep=model_type)
+            return upscaler
+
+    def _lookup(self, key: Tuple[ModelType, int]):
+        """Upscaler residente para key (marcándolo como usado) o None. Requiere el lock."""
+        upscaler = self._entries.get(key)
+        if upscaler is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return upscaler
+
+    def preload(self, models: List[Tuple[ModelType, int]]):
+        """Carga una lista de (modelo, escala) para evitar la latencia del primer request."""
+        for model_type, scale in models:
+            self.get(model_type, scale)
+
+    def resident_bytes(self) -> int:
+        """Memoria ocupada por los pesos residentes (los compartidos se cuentan una vez)."""
+        with self._lock:
+            seen: set = set()
+            return sum(module_bytes(entry.model, seen) for entry in self._entries.values())
+
+    def _enforce_budget(self, keep: ModelType):
+        """Desaloja modelos completos (LRU) hasta quedar dentro del presupuesto."""
+        if self.memory_budget_bytes == 0:
+            return
+
+        evicted = False
+        while self.resident_bytes() > self.memory_budget_bytes:
+            victim = next((m for m, _ in self._entries if m != keep), None)
+            if victim is None:
+                print(f"Aviso: el modelo {keep.value} excede por sí solo el presupuesto de "
+                      f"{self.memory_budget_bytes // (1024 * 1024)}MB")
+                break
+            for key in [k for k in self._entries if k[0] == victim]:
+                del self._entries[key]
+            self.evictions += 1
+            evicted = True
+            print(f"Modelo {victim.value} desalojado del registro (presupuesto de memoria)")
+
+        if evicted and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def entries(self) -> List[Tuple[Tuple[ModelType, int], Any]]:
+        """Copia de los upscalers residentes como ((modelo, escala), upscaler)."""
+        with self._lock:
+            return list(self._entries.items())
+
+    def clear(self):
+        """Descarga todos los modelos."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Métricas del registro para el health check."""
+        with self._lock:
+            resident = {}
+            seen: set = set()
+            for (model_type, scale), entry in self._entries.items():
+                info = resident.setdefault(model_type.value, {
+                    "scales": [], "bytes": 0, "precision": getattr(entry, "precision", "fp32"),
+                    "tile_size": getattr(entry, "tile_size", None)
+                })
+                info["scales"].append(scale)
+                info["bytes"] += module_bytes(entry.model, seen)
+            return {
+                "resident_models": resident,
+                "resident_mb": round(sum(info["bytes"] for info in resident.values()) / (1024 * 1024), 1),
+                "memory_budget_mb": self.memory_budget_bytes // (1024 * 1024),
+                "loads": self.loads,
+                "shared_loads": self.shared_loads,
+                "evictions": self.evictions,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
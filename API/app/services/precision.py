@@ -0,0 +1,138 @@
+import copy
+import math
+import warnings
+from typing import Dict, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+# Modos de precisión soportados por RealESRGANUpscaler
+PRECISION_MODES = ("fp32", "bf16", "fp16", "int8")
+
+
+def parse_precision_overrides(value: str) -> Dict[str, str]:
+    """Parsea una lista "modelo:modo,..." (ej. "general_v3:int8,anime:bf16")."""
+    overrides = {}
+    for item in value.split(","):
+        name, _, mode = item.strip().partition(":")
+        if not name:
+            continue
+        mode = mode.strip().lower()
+        if mode not in PRECISION_MODES:
+            print(f"Modo de precisión inválido para '{name}': '{mode}'")
+            continue
+        overrides[name.strip()] = mode
+    return overrides
+
+
+def resolve_precision(requested: str, device: torch.device, quantizable: bool) -> str:
+    """Retorna el modo efectivo según el soporte del dispositivo (fp32 si no aplica)."""
+    if requested == "bf16":
+        if device.type == "cuda":
+            supported = torch.cuda.is_bf16_supported()
+        else:
+            supported = torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported()
+        reason = "el dispositivo no soporta bfloat16"
+    elif requested == "fp16":
+        supported = device.type == "cuda"
+        reason = "fp16 solo se usa en GPU"
+    elif requested == "int8":
+        supported = device.type == "cpu" and quantizable
+        reason = "int8 solo aplica a modelos SRVGGNetCompact en CPU"
+    else:
+        return "fp32"
+
+    if not supported:
+        print(f"Precisión {requested} no disponible ({reason}), usando fp32")
+        return "fp32"
+    return requested
+
+
+def input_dtype(precision: str) -> torch.dtype:
+    """Tipo de dato de la entrada del modelo para un modo de precisión."""
+    if precision == "bf16":
+        return torch.bfloat16
+    if precision == "fp16":
+        return torch.float16
+    # int8 cuantiza la entrada float32 dentro del grafo
+    return torch.float32
+
+
+def calibration_images(count: int = 8, size: int = 64) -> torch.Tensor:
+    """Imágenes sintéticas deterministas (gradientes, bordes y ruido) en [0, 1]."""
+    generator = np.random.default_rng(0)
+    ramp = np.linspace(0.0, 1.0, size, dtype=np.float32)
+    images = []
+    for i in range(count):
+        gradient = np.stack([np.add.outer(ramp, ramp[::-1]) / 2,
+                             np.tile(ramp, (size, 1)),
+                             np.tile(ramp[:, None], (1, size))])
+        checker = ((np.indices((size, size)).sum(axis=0) // (2 + i)) % 2).astype(np.float32)
+        noise = generator.random((3, size, size), dtype=np.float32)
+        weight = i / max(count - 1, 1)
+        image = (1 - weight) * gradient + weight * noise
+        image[:, : size // 2] = 0.5 * image[:, : size // 2] + 0.5 * checker[: size // 2]
+        images.append(np.clip(image, 0.0, 1.0))
+    return torch.from_numpy(np.stack(images))
+
+
+def quantize_int8(model: nn.Module, calibration: torch.Tensor) -> nn.Module:
+    """Cuantización int8 post-entrenamiento (estática, por canal) del modelo en CPU.
+
+    quantize_dynamic no cubre Conv2d, por lo que se usa el modo FX con
+    observadores calibrados sobre imágenes sintéticas.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    with warnings.catch_warnings():
+        # prepare_fx/convert_fx emiten avisos de deprecación de torch.ao
+        warnings.simplefilter("ignore")
+        prepared = prepare_fx(copy.deepcopy(model).eval(),
+                              get_default_qconfig_mapping("x86"), (calibration[:1],))
+        with torch.no_grad():
+            for image in calibration:
+                prepared(image.unsqueeze(0))
+        return convert_fx(prepared)
+
+
+def compute_psnr(reference: torch.Tensor, candidate: torch.Tensor) -> float:
+    """PSNR (dB) de candidate contra reference, ambos en [0, 1]."""
+    mse = torch.mean((reference.float().clamp(0, 1) - candidate.float().clamp(0, 1)) ** 2).item()
+    if mse == 0:
+        return math.inf
+    return 10 * math.log10(1.0 / mse)
+
+
+def apply_precision(model: nn.Module, precision: str, channels_last: bool,
+                    device: torch.device, min_psnr: Optional[float] = None):
+    """Convierte el modelo fp32 al modo de precisión y formato de memoria indicados.
+
+    Si min_psnr está definido, la salida del modelo convertido se compara con
+    la del modelo fp32 sobre imágenes sintéticas y, si queda por debajo del
+    umbral, se conserva fp32. Retorna (modelo, precisión efectiva, psnr).
+    """
+    memory_format = torch.channels_last if channels_last else torch.contiguous_format
+    if precision == "fp32":
+        return model.to(memory_format=memory_format), "fp32", None
+
+    calibration = calibration_images().to(device)
+    if precision == "int8":
+        converted = quantize_int8(model, calibration)
+    else:
+        converted = copy.deepcopy(model).to(input_dtype(precision))
+    converted = converted.to(memory_format=memory_format)
+
+    psnr = None
+    if min_psnr is not None:
+        sample = calibration[-2:].contiguous(memory_format=memory_format)
+        with torch.no_grad():
+            reference = model(sample)
+            candidate = converted(sample.to(input_dtype(precision)))
+        psnr = compute_psnr(reference, candidate)
+        if psnr < min_psnr:
+            print(f"Precisión {precision} descartada: PSNR {psnr:.1f}dB < {min_psnr:.1f}dB, usando fp32")
+            return model.to(memory_format=memory_format), "fp32", psnr
+
+    return converted, precision, psnr
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from app.config import config
+
+# Sufijo de la marca de último uso de cada entrada
+_USED_SUFFIX = ".used"
+
+
+class ResultCache:
+    """Caché en disco de imágenes mejoradas, direccionada por contenido.
+
+    La clave es un hash de los píxeles decodificados de la original más los
+    parámetros de mejora, por lo que reenviar la misma imagen (aunque el
+    archivo tenga otro nombre o metadata) reutiliza el resultado guardado.
+    Las entradas se enlazan (hardlink) a la ruta de cada registro y se
+    desalojan por antigüedad de uso al superar max_bytes. El último uso se
+    marca en un archivo aparte (<entrada>.used): el mtime de la entrada es el
+    de los archivos de los usuarios enlazados y define su ETag.
+    """
+
+    def __init__(self, cache_dir: str, max_mb: int = 1024, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max(0, max_mb) * 1024 * 1024
+        self.enabled = enabled and self.max_bytes > 0
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def make_key(self, image_rgb: Image.Image, params: Tuple) -> str:
+        """Calcula la clave a partir de los píxeles RGB y los parámetros de mejora."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((image_rgb.mode, image_rgb.size, params)).encode())
+        digest.update(image_rgb.tobytes())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{extension.lower()}")
+
+    @staticmethod
+    def _used_path(entry_path: str) -> str:
+        """Marca de último uso de una entrada (su mtime)."""
+        return f"{entry_path}{_USED_SUFFIX}"
+
+    def lookup(self, key: str, extension: str, target_path: str) -> Optional[Tuple[int, int]]:
+        """Si la clave existe, enlaza el resultado en target_path y retorna (ancho, alto)."""
+        if not self.enabled:
+            return None
+
+        entry_path = self._entry_path(key, extension)
+        try:
+            with Image.open(entry_path) as cached:
+                size = cached.size
+            self._link(entry_path, target_path)
+            # Último uso para el desalojo LRU, sin tocar el inode compartido
+            Path(self._used_path(entry_path)).touch()
+        except (FileNotFoundError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return size
+
+    def store(self, key: str, extension: str, source_path: str):
+        """Agrega a la caché el resultado guardado en source_path."""
+        if not self.enabled:
+            return
+
+        entry_path = self._entry_path(key, extension)
+        try:
+            Path(entry_path).parent.mkdir(parents=True, exist_ok=True)
+            self._link(source_path, entry_path)
+            size = os.path.getsize(entry_path)
+        except OSError as e:
+            print(f"No se pudo guardar en la caché de resultados: {e}")
+            return
+
+        with self._lock:
+            self.stores += 1
+            if self._total_bytes is not None:
+                self._total_bytes += size
+        if self._current_bytes() > self.max_bytes:
+            self._evict()
+
+    @staticmethod
+    def _link(source: str, target: str):
+        """Hardlink de source a target (copia si el sistema de archivos no lo permite)."""
+        tmp_target = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(source, tmp_target)
+        except OSError:
+            shutil.copyfile(source, tmp_target)
+        os.replace(tmp_target, target)
+
+    def _scan(self) -> list:
+        """Lista (último uso, tamaño, ruta) de las entradas en disco."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for bucket in os.scandir(self.cache_dir):
+            if not bucket.is_dir():
+                continue
+            used = {}
+            files = []
+            for entry in os.scandir(bucket.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(_USED_SUFFIX):
+                    used[entry.path[:-len(_USED_SUFFIX)]] = stat.st_mtime
+                elif not entry.name.endswith(".tmp"):
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            # Sin marca de uso (nunca hubo un hit) cuenta la fecha de creación
+            entries.extend((max(mtime, used.get(path, 0)), size, path) for mtime, size, path in files)
+        return entries
+
+    def _current_bytes(self) -> int:
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            return self._total_bytes
+
+    def _evict(self):
+        """Elimina las entradas usadas hace más tiempo hasta quedar bajo el límite."""
+        with self._lock:
+            entries = sorted(self._scan())
+            total = sum(size for _, size, _ in entries)
+            # Desalojar hasta el 90% para no escanear en cada store
+            target = int(self.max_bytes * 0.9)
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    self.evictions += 1
+                except FileNotFoundError:
+                    total -= size
+                try:
+                    os.remove(self._used_path(path))
+                except FileNotFoundError:
+                    pass
+            self._total_bytes = total
+
+    def stats(self) -> dict:
+        """Métricas de la caché para el health check."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size_mb": round(self._current_bytes() / (1024 * 1024), 1) if self.enabled else 0,
+            "max_mb": self.max_bytes // (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+result_cache = ResultCache(
+    cache_dir=config.RESULT_CACHE_DIR,
+    max_mb=config.RESULT_CACHE_MAX_MB,
+    enabled=config.RESULT_CACHE_ENABLED
+)
@@ -1,37 +1,46 @@
 import asyncio
 import base64
+import json
 import os
 import shutil
+import socket
 import subprocess
 import time
 import uuid
+from collections import deque
+from contextlib import aclosing
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Iterable, Optional, Tuple
 from bson import ObjectId
 import numpy as np
 from PIL import Image
 
-
-class VideoProcessingError(Exception):
-    """Excepción personalizada para errores en el procesamiento de video."""
-    pass
-
-
-# Usar ffmpeg del sistema que tiene libx264 en lugar del de Conda
-FFMPEG_PATH = "/usr/bin/ffmpeg"
-FFPROBE_PATH = "/usr/bin/ffprobe"
-
+from app.config import config
 from app.database import get_collection
 from app.models.video import (
     VideoStatus,
-    VideoEnhanceRequest,
+    VideoEnhanceParams,
     VideoResponse,
     VideoDetailResponse,
     VideoListResponse,
 )
 from app.models.image import ModelType, MODEL_CONFIG
-from app.services.image_service import image_service
+from app.services.face_detector import get_face_detector
+from app.services.face_tracker import FaceTracker
+from app.services.image_service import image_service, run_frame_enhancement, run_frame_regions
+from app.services.inference_executor import inference_executor
+from app.services.job_queue import video_job_queue
+from app.services.video_stream import (
+    FFMPEG_PATH,
+    FFPROBE_PATH,
+    FrameReader,
+    FrameWriter,
+    VideoProcessingError,
+    changed_tiles,
+    frames_match,
+    tile_regions,
+)
 
 # Directorio base para almacenar videos
 VIDEO_STORAGE_PATH = "/image_history"
@@ -42,6 +51,7 @@ class VideoService:
 
     def __init__(self):
         self.videos_collection = None
+        self._job_workers: list = []
 
     def _get_collection(self):
         if self.videos_collection is None:
@@ -89,17 +99,31 @@ class VideoService:
                 fps_parts = video_stream.get('r_frame_rate', '30/1').split('/')
                 fps = float(fps_parts[0]) / float(fps_parts[1]) if len(fps_parts) == 2 else 30.0
 
+                # Rotacion de la metadata (videos de celular); ffmpeg la aplica al decodificar
+                rotation = int(float(video_stream.get('tags', {}).get('rotate', 0)))
+                for side_data in video_stream.get('side_data_list', []):
+                    if 'rotation' in side_data:
+                        rotation = int(float(side_data['rotation']))
+
                 return {
                     'width': int(video_stream.get('width', 0)),
                     'height': int(video_stream.get('height', 0)),
                     'fps': fps,
                     'duration': float(info.get('format', {}).get('duration', 0)),
-                    'frame_count': int(video_stream.get('nb_frames', 0)) or int(fps * float(info.get('format', {}).get('duration', 0)))
+                    'frame_count': int(video_stream.get('nb_frames', 0)) or int(fps * float(info.get('format', {}).get('duration', 0))),
+                    'rotation': rotation
                 }
-            return {'width': 0, 'height': 0, 'fps': 30.0, 'duration': 0, 'frame_count': 0}
+            return {'width': 0, 'height': 0, 'fps': 30.0, 'duration': 0, 'frame_count': 0, 'rotation': 0}
         except Exception as e:
             print(f"Error obteniendo info del video: {e}")
-            return {'width': 0, 'height': 0, 'fps': 30.0, 'duration': 0, 'frame_count': 0}
+            return {'width': 0, 'height': 0, 'fps': 30.0, 'duration': 0, 'frame_count': 0, 'rotation': 0}
+
+    def _decoded_frame_size(self, video_info: dict) -> Tuple[int, int]:
+        """Retorna (ancho, alto) de los frames decodificados, considerando la rotacion."""
+        width, height = video_info['width'], video_info['height']
+        if abs(video_info.get('rotation', 0)) % 180 == 90:
+            return height, width
+        return width, height
 
     def _generate_description(self, filename: str, width: int, height: int,
                               model_type: str, now: datetime) -> str:
@@ -119,24 +143,29 @@ class VideoService:
         return audio_path, has_audio
 
     def _extract_frames(self, video_path: str, process_dir: str) -> Tuple[str, list]:
-        """Extrae los frames del video como imágenes PNG."""
+        """Extrae los frames del video como imágenes PNG.
+
+        Al retomar un trabajo se reutilizan los frames de una extraccion
+        completa anterior (marcada con el archivo .complete).
+        """
         frames_dir = os.path.join(process_dir, "frames")
+        complete_marker = os.path.join(frames_dir, ".complete")
         os.makedirs(frames_dir, exist_ok=True)
 
-        cmd_frames = [
-            FFMPEG_PATH, '-i', video_path,
-            '-qscale:v', '2',
-            os.path.join(frames_dir, "frame_%08d.png")
-        ]
-        subprocess.run(cmd_frames, capture_output=True, check=True)
+        if not os.path.exists(complete_marker):
+            cmd_frames = [
+                FFMPEG_PATH, '-i', video_path,
+                '-qscale:v', '2',
+                os.path.join(frames_dir, "frame_%08d.png")
+            ]
+            subprocess.run(cmd_frames, capture_output=True, check=True)
+            Path(complete_marker).touch()
 
         frame_files = sorted([f for f in os.listdir(frames_dir) if f.endswith('.png')])
         return frames_dir, frame_files
 
-    def _create_video_from_frames(self, enhanced_dir: str, fps: float,
-                                   audio_path: str, has_audio: bool,
-                                   enhanced_video_path: str, process_dir: str):
-        """Crea el video final desde los frames procesados."""
+    def _create_video_from_frames(self, enhanced_dir: str, fps: float, video_only_path: str):
+        """Codifica el video (sin audio) desde los frames procesados."""
         fps_str = f"{fps:.2f}"
         enhanced_files = sorted([f for f in os.listdir(enhanced_dir) if f.endswith('.png')])
         print(f"Frames enhanced encontrados: {len(enhanced_files)}")
@@ -144,7 +173,6 @@ class VideoService:
         if len(enhanced_files) == 0:
             raise VideoProcessingError("No se generaron frames enhanced")
 
-        video_only_path = os.path.join(process_dir, "video_only.mkv")
         cmd_video = [
             FFMPEG_PATH, '-framerate', fps_str,
             '-i', os.path.join(enhanced_dir, "frame_%08d.png"),
@@ -158,16 +186,6 @@ class VideoService:
             print(f"Error ffmpeg creando video: {result_video.stderr}")
             raise VideoProcessingError(f"Error creando video desde frames: {result_video.stderr[:500]}")
 
-        if not os.path.exists(video_only_path) or os.path.getsize(video_only_path) == 0:
-            raise VideoProcessingError(f"El video temporal no se creo correctamente: {video_only_path}")
-
-        # Agregar audio si existe
-        self._merge_audio_video(video_only_path, audio_path, has_audio, enhanced_video_path)
-
-        if not os.path.exists(enhanced_video_path):
-            raise VideoProcessingError(f"No se pudo crear el video final: {enhanced_video_path}")
-        print(f"Video enhanced creado: {enhanced_video_path} ({os.path.getsize(enhanced_video_path)} bytes)")
-
     def _merge_audio_video(self, video_only_path: str, audio_path: str,
                            has_audio: bool, enhanced_video_path: str):
         """Combina el video con el audio."""
@@ -188,164 +206,829 @@ class VideoService:
             print("Video sin audio, copiando directamente...")
             shutil.copy2(video_only_path, enhanced_video_path)
 
+    def _dedup_threshold(self) -> Optional[float]:
+        """Umbral para reutilizar el frame mejorado anterior (None = desactivado)."""
+        return config.VIDEO_DEDUP_THRESHOLD if config.VIDEO_DEDUP_FRAMES else None
+
+    def _incremental_tile_size(self, face_enhance: bool) -> int:
+        """Tamaño de tile para recalcular solo las regiones cambiadas (0 = frame completo)."""
+        if not config.VIDEO_INCREMENTAL_TILES or face_enhance:
+            # GFPGAN necesita el rostro completo: con face enhance se mejora el frame entero
+            return 0
+        # Multiplo de los bloques de 16 pixeles con que se comparan los frames
+        return max(16, -(-config.VIDEO_INCREMENTAL_TILE_SIZE // 16) * 16)
+
+    def _face_tracker(self, face_enhance: bool, scale: int) -> Optional[FaceTracker]:
+        """Seguimiento de rostros para los frames de un video (None = detectar en cada frame)."""
+        if not face_enhance or not config.VIDEO_FACE_TRACKING:
+            return None
+        detector = get_face_detector()
+        return FaceTracker(
+            detector,
+            interval=config.VIDEO_FACE_DETECT_INTERVAL,
+            scene_threshold=config.VIDEO_SCENE_CHANGE_THRESHOLD,
+            # Equivalente a 30 px del frame mejorado, sin bajar de la ventana del detector
+            # salvo con FACE_DETECT_UPSAMPLE: las detecciones corren sobre el frame original
+            min_size=detector.min_face_size(30 // max(scale, 1))
+        )
+
+    def _parallel_frames(self) -> int:
+        """Frames en vuelo a la vez (VIDEO_PARALLEL_FRAMES o workers de inferencia + 1)."""
+        return max(1, config.VIDEO_PARALLEL_FRAMES or config.INFERENCE_WORKERS + 1)
+
+    async def _report_progress(self, video_id: str, frames_processed: int, total_frames: int,
+                               start_time: float):
+        """Guarda frames_processed y el throughput (frames/segundo) del video."""
+        processing_fps = round(frames_processed / max(time.time() - start_time, 1e-6), 2)
+        print(f"  Frame {frames_processed}/{total_frames} ({processing_fps} fps)")
+        await self.videos_collection.update_one(
+            {"_id": ObjectId(video_id)},
+            {"$set": {"frames_processed": frames_processed, "processing_fps": processing_fps}}
+        )
+
     async def _process_frames(self, video_id: str, frames_dir: str, enhanced_dir: str,
                                frame_files: list, model_type: ModelType, scale: int,
-                               face_enhance: bool) -> int:
-        """Procesa todos los frames del video con Real-ESRGAN."""
-        import cv2
-
+                               face_enhance: bool) -> Tuple[int, int, Tuple[int, int]]:
+        """Procesa todos los frames del video con Real-ESRGAN en el pool de inferencia.
+
+        Hasta _parallel_frames() frames se procesan a la vez; el progreso
+        cuenta los frames completados en orden. Los frames que ya tienen su
+        version mejorada en enhanced_dir (trabajo retomado) se omiten, y los
+        frames practicamente iguales al anterior reutilizan su resultado. Con
+        face enhance los rostros se siguen entre frames (ver FaceTracker).
+        Retorna (frames totales, frames reutilizados, (rostros, ms de GFPGAN)).
+        """
         total_frames = len(frame_files)
-        upscaler = image_service._init_upscaler(model_type, scale)
-        face_enhancer = image_service._init_face_enhancer(upscale=1) if face_enhance else None
+        start_time = time.time()
+        pending_files = [f for f in frame_files if not os.path.exists(os.path.join(enhanced_dir, f))]
+        if len(pending_files) < total_frames:
+            print(f"Retomando video {video_id}: {total_frames - len(pending_files)} frames ya mejorados")
 
-        print(f"Procesando {total_frames} frames...")
-        for i, frame_file in enumerate(frame_files):
-            frame_path = os.path.join(frames_dir, frame_file)
-            enhanced_frame_path = os.path.join(enhanced_dir, frame_file)
+        def load_frame(item: Tuple[int, str]) -> np.ndarray:
+            with Image.open(os.path.join(frames_dir, item[1])) as img:
+                return np.asarray(img.convert('RGB'))
 
-            # Leer y procesar frame
-            img = Image.open(frame_path).convert('RGB')
-            img_array = np.array(img)
-            enhanced_array = upscaler.enhance(img_array)
-
-            # Aplicar face enhancement si esta habilitado
-            if face_enhance and face_enhancer is not None:
-                enhanced_bgr = cv2.cvtColor(enhanced_array, cv2.COLOR_RGB2BGR)
-                _, _, restored_img = face_enhancer.enhance(
-                    enhanced_bgr, has_aligned=False,
-                    only_center_face=False, paste_back=True
+        async def enhance(group: tuple) -> Tuple[int, Optional[Tuple[int, int]]]:
+            (index, frame_file), repeats, face_boxes = group
+            enhanced_frame_path = os.path.join(enhanced_dir, frame_file)
+            face_stats = await inference_executor.run(
+                enhance_frame_file,
+                os.path.join(frames_dir, frame_file),
+                enhanced_frame_path,
+                model_type, scale, face_enhance, face_boxes
+            )
+            for repeated_file in pending_files[index + 1:index + 1 + repeats]:
+                await asyncio.to_thread(
+                    link_frame_file, enhanced_frame_path, os.path.join(enhanced_dir, repeated_file)
                 )
-                enhanced_array = cv2.cvtColor(restored_img, cv2.COLOR_BGR2RGB)
+            return repeats, face_stats
+
+        print(f"Procesando {len(pending_files)} frames ({self._parallel_frames()} en paralelo)...")
+        frames_processed = total_frames - len(pending_files)
+        frames_skipped = 0
+        faces_detected = gfpgan_time_ms = 0
+        last_reported = frames_processed
+        tracker = self._face_tracker(face_enhance, scale)
+        groups = attach_face_boxes(
+            group_repeated_frames(iterate(enumerate(pending_files)), self._dedup_threshold(), load_frame),
+            tracker, load_frame
+        )
+        async with aclosing(ordered_parallel(groups, enhance, self._parallel_frames())) as results:
+            async for repeats, face_stats in results:
+                frames_processed += 1 + repeats
+                frames_skipped += repeats
+                if face_stats:
+                    faces_detected += face_stats[0]
+                    gfpgan_time_ms += face_stats[1]
+
+                # Actualizar progreso cada 10 frames o en el ultimo
+                if frames_processed - last_reported >= 10 or frames_processed == total_frames:
+                    last_reported = frames_processed
+                    await self._report_progress(video_id, frames_processed, total_frames, start_time)
+
+        if tracker is not None:
+            print(f"Seguimiento de rostros: {tracker.detections} detecciones en {tracker.frames} frames")
+        return total_frames, frames_skipped, (faces_detected, gfpgan_time_ms)
+
+    async def _run_frames_pipeline(self, video_id: str, video_path: str, process_dir: str,
+                                   video_only_path: str, model_type: ModelType, scale: int,
+                                   face_enhance: bool, fps: float) -> dict:
+        """Pipeline con frames PNG intermedios en disco (frames/ y enhanced/).
+
+        Retorna las estadisticas del procesamiento (ver _enhance_stream).
+        """
+        # Extraer frames del video
+        frames_dir, frame_files = await asyncio.to_thread(
+            self._extract_frames, video_path, process_dir
+        )
+        if len(frame_files) == 0:
+            raise VideoProcessingError("No se pudieron extraer frames del video")
 
-            # Guardar frame procesado
-            enhanced_img = Image.fromarray(enhanced_array)
-            enhanced_img.save(enhanced_frame_path, 'PNG')
+        # Crear directorio para frames procesados
+        enhanced_dir = os.path.join(process_dir, "enhanced")
+        os.makedirs(enhanced_dir, exist_ok=True)
 
-            frames_processed = i + 1
+        # Procesar frames
+        frames_processed, frames_skipped, face_stats = await self._process_frames(
+            video_id, frames_dir, enhanced_dir, frame_files,
+            model_type, scale, face_enhance
+        )
 
-            # Actualizar progreso cada 10 frames o en el ultimo
-            if frames_processed % 10 == 0 or frames_processed == total_frames:
-                print(f"  Frame {frames_processed}/{total_frames}")
-                await self.videos_collection.update_one(
-                    {"_id": ObjectId(video_id)},
-                    {"$set": {"frames_processed": frames_processed}}
-                )
+        # Obtener dimensiones del video mejorado
+        with Image.open(os.path.join(enhanced_dir, frame_files[0])) as first_enhanced:
+            enhanced_width, enhanced_height = first_enhanced.size
 
-            # Liberar memoria
-            del img, img_array, enhanced_array, enhanced_img
+        # Crear video desde frames
+        await asyncio.to_thread(
+            self._create_video_from_frames, enhanced_dir, fps, video_only_path
+        )
+        return {
+            "frames_processed": frames_processed,
+            "enhanced_width": enhanced_width,
+            "enhanced_height": enhanced_height,
+            "frames_skipped": frames_skipped,
+            "tiles_total": 0,
+            "tiles_recomputed": 0,
+            "faces_detected": face_stats[0],
+            "gfpgan_time_ms": face_stats[1],
+        }
 
-        return total_frames
+    async def _enhance_stream(self, input_path: str, width: int, height: int, fps: float,
+                              output_path: str, model_type: ModelType, scale: int,
+                              face_enhance: bool, parallel_frames: int,
+                              on_frame: Callable[[], Awaitable], skip_frames: int = 0,
+                              on_chunk: Optional[Callable[[int, dict], Awaitable]] = None,
+                              chunk_frames: int = 0, first_chunk: int = 0) -> dict:
+        """Decodifica input_path, mejora sus frames y los codifica en output_path.
+
+        ffmpeg decodifica frames RGB crudos a un pipe, cada frame se mejora en el
+        pool de inferencia y se envia directamente al stdin del encoder libx264.
+        Los buffers de lectura y escritura estan acotados a VIDEO_STREAM_BUFFER_FRAMES.
+        Con workers en otros procesos, entrada y salida viajan por un ring de slots
+        en memoria compartida en lugar de serializarse. Los frames practicamente
+        iguales al anterior no se mejoran: se reenvia el frame mejorado previo.
+        Con VIDEO_INCREMENTAL_TILES solo se recalculan los tiles que cambiaron y
+        se componen sobre el frame mejorado anterior. Con face enhance los
+        rostros se siguen entre frames (ver FaceTracker) en lugar de detectarse
+        en cada uno.
+        on_frame se llama por cada frame enviado al encoder.
+
+        Con skip_frames se descartan los primeros frames decodificados (ya
+        codificados en un intento anterior). Con on_chunk la salida se reparte
+        en chunks de chunk_frames frames (0 = uno solo): el chunk i, contando
+        desde first_chunk, se escribe en chunk_path(output_path, i) y al cerrarlo
+        se llama on_chunk(i, estadisticas del chunk).
+
+        Retorna frames_processed, enhanced_width, enhanced_height,
+        frames_skipped, tiles_total, tiles_recomputed, faces_detected y
+        gfpgan_time_ms.
+        """
+        buffer_frames = config.VIDEO_STREAM_BUFFER_FRAMES
+        tile_size = self._incremental_tile_size(face_enhance)
+        tracker = self._face_tracker(face_enhance, scale)
+
+        reader = FrameReader(input_path, width, height, buffer_frames)
+        writer = None
+        enhanced_size: Optional[Tuple[int, int]] = None
+        chunk_index = first_chunk
+        stats = {"frames_processed": 0, "frames_skipped": 0, "tiles_total": 0, "tiles_recomputed": 0,
+                 "faces_detected": 0, "gfpgan_time_ms": 0}
+        # Frame mejorado vigente, sobre el que se componen las regiones recalculadas
+        canvas: Optional[np.ndarray] = None
+        # Con workers en otros procesos los frames viajan por slots de memoria compartida
+        ring = image_service.create_frame_ring(
+            height, width, scale,
+            config.VIDEO_FRAME_RING_SLOTS or parallel_frames + 2
+        )
+        if ring is not None:
+            # Cada frame en vuelo retiene un slot hasta que el encoder lo consume
+            parallel_frames = min(parallel_frames, ring.num_slots)
+        # Estadisticas al abrir el chunk actual, para reportar las del chunk al cerrarlo
+        chunk_start = dict(stats)
+
+        async def close_chunk():
+            nonlocal writer, chunk_index
+            await asyncio.to_thread(writer.close)
+            writer = None
+            if on_chunk is not None:
+                chunk_stats = {key: stats[key] - chunk_start[key] for key in stats}
+                chunk_stats["enhanced_width"], chunk_stats["enhanced_height"] = enhanced_size
+                await on_chunk(chunk_index, chunk_stats)
+            chunk_index += 1
+
+        def add_face_stats(face_stats: Optional[Tuple[int, int]]):
+            if face_stats:
+                stats["faces_detected"] += face_stats[0]
+                stats["gfpgan_time_ms"] += face_stats[1]
+
+        async def enhance(group: tuple):
+            """Mejora un frame (o solo sus regiones cambiadas).
+
+            Retorna (frame mejorado o parches de las regiones, callback al
+            terminar de usarlo, repeticiones, regiones, tiles recalculados).
+            """
+            frame, repeats, regions, tiles, face_boxes = group
+            if regions == []:
+                # Ningun tile cambio: se reutiliza el frame mejorado anterior
+                return None, None, repeats, regions, tiles
+            if ring is None:
+                if regions is None:
+                    enhanced, face_stats = await inference_executor.run(
+                        run_frame_enhancement, frame, model_type, scale, face_enhance, face_boxes
+                    )
+                    add_face_stats(face_stats)
+                else:
+                    enhanced = await inference_executor.run(
+                        run_frame_regions, frame, model_type, scale, regions
+                    )
+                return enhanced, None, repeats, regions, tiles
+            slot = await ring.acquire_async()
+            slot.input[...] = frame
+            try:
+                add_face_stats(await image_service.enhance_frame_slot(
+                    slot, model_type, scale, face_enhance, regions, face_boxes
+                ))
+            except BaseException:
+                slot.release()
+                raise
+            if regions is not None:
+                enhanced = [slot.output[top * scale:bottom * scale, left * scale:right * scale]
+                            for top, left, bottom, right in regions]
+                return enhanced, slot.release, repeats, regions, tiles
+            # El slot vuelve al ring cuando el encoder terminó de leer la salida
+            return slot.output, slot.release, repeats, regions, tiles
 
-    async def _process_video_async(self, video_id: str, _user_id: str, process_dir: str,
-                                   video_path: str, model_type: ModelType, scale: int,
-                                   face_enhance: bool, video_info: dict, original_ext: str):
-        """Procesa el video de forma asincrona en background."""
+        try:
+            reader.start()
+            try:
+                frames = drop_frames(read_frames(reader), skip_frames)
+                if tile_size:
+                    groups = plan_changed_regions(
+                        frames, config.VIDEO_DEDUP_THRESHOLD, tile_size,
+                        config.VIDEO_INCREMENTAL_MAX_CHANGED, config.VIDEO_DEDUP_FRAMES
+                    )
+                else:
+                    groups = whole_frame_groups(group_repeated_frames(frames, self._dedup_threshold()))
+                groups = attach_face_boxes(groups, tracker)
+                results = ordered_parallel(groups, enhance, parallel_frames)
+                async with aclosing(results):
+                    async for enhanced, on_written, repeats, regions, tiles in results:
+                        if regions is None:
+                            output = enhanced
+                            if tile_size:
+                                canvas = enhanced.copy()
+                        else:
+                            # Las regiones recalculadas se componen sobre el frame anterior
+                            for (top, left, bottom, right), patch in zip(regions, enhanced or []):
+                                canvas[top * scale:bottom * scale, left * scale:right * scale] = patch
+                            if on_written is not None:
+                                on_written()
+                                on_written = None
+                            output = canvas.copy()
+
+                        # Las repeticiones reenvian el mismo frame; el slot se libera tras la ultima
+                        for repeat in range(repeats + 1):
+                            # El chunk lleno se cierra al llegar el frame siguiente, así el ultimo
+                            # chunk siempre queda abierto hasta el final y recibe todas las estadisticas
+                            if (writer is not None and chunk_frames
+                                    and stats["frames_processed"] - chunk_start["frames_processed"] == chunk_frames):
+                                await close_chunk()
+                            # El encoder se inicia con las dimensiones del primer frame mejorado
+                            if writer is None:
+                                enhanced_height, enhanced_width = output.shape[:2]
+                                enhanced_size = (enhanced_width, enhanced_height)
+                                writer = FrameWriter(
+                                    chunk_path(output_path, chunk_index) if on_chunk else output_path,
+                                    enhanced_width, enhanced_height, fps, buffer_frames
+                                )
+                                writer.start()
+                                chunk_start = dict(stats)
+                            await asyncio.to_thread(
+                                writer.write, output, on_written if repeat == repeats else None
+                            )
+                            stats["frames_processed"] += 1
+                            await on_frame()
+                        stats["frames_skipped"] += repeats
+                        if tile_size:
+                            stats["tiles_total"] += tiles[1] * (repeats + 1)
+                            stats["tiles_recomputed"] += tiles[0]
+            except BaseException:
+                if writer is not None:
+                    await asyncio.to_thread(writer.abort)
+                raise
+            finally:
+                await asyncio.to_thread(reader.close)
+
+            if enhanced_size is None and not skip_frames:
+                raise VideoProcessingError("No se pudieron extraer frames del video")
+
+            if writer is not None:
+                await close_chunk()
+            if tracker is not None:
+                print(f"Seguimiento de rostros: {tracker.detections} detecciones en {tracker.frames} frames")
+            # Sin frames pendientes (todo se codificó en un intento anterior) no hay tamaño
+            stats["enhanced_width"], stats["enhanced_height"] = enhanced_size or (None, None)
+            return stats
+        finally:
+            if ring is not None:
+                ring.close()
+
+    async def _run_streaming_pipeline(self, video_id: str, video_path: str, video_info: dict,
+                                      process_dir: str, video_only_path: str, model_type: ModelType,
+                                      scale: int, face_enhance: bool) -> dict:
+        """Pipeline en memoria sin frames intermedios (ver _enhance_stream).
+
+        La salida se codifica en chunks de ~VIDEO_SEGMENT_SECONDS que se
+        concatenan sin recodificar al final. Los chunks cerrados quedan en
+        stream/checkpoint.json; al retomar el trabajo se decodifican y
+        descartan los frames ya codificados y se continúa desde el primer
+        chunk incompleto.
+        """
+        width, height = self._decoded_frame_size(video_info)
+        total_frames = video_info['frame_count']
+        parallel_frames = self._parallel_frames()
+        stream_dir = os.path.join(process_dir, "stream")
+        checkpoint = await asyncio.to_thread(self._load_checkpoint, stream_dir)
+        if checkpoint is None:
+            if os.path.exists(stream_dir):
+                await asyncio.to_thread(shutil.rmtree, stream_dir)
+            os.makedirs(stream_dir)
+            checkpoint = {"chunks": []}
+        chunks = checkpoint["chunks"]
+        skip_frames = sum(chunk["frames_processed"] for chunk in chunks)
+        if chunks:
+            print(f"Retomando video {video_id}: {len(chunks)} chunks ({skip_frames} frames) ya codificados")
+        chunk_frames = (max(1, round(config.VIDEO_SEGMENT_SECONDS * video_info['fps']))
+                        if config.VIDEO_SEGMENT_SECONDS > 0 else 0)
         start_time = time.time()
-        frames_processed = 0
+        frames_processed = skip_frames
+
+        async def on_frame():
+            nonlocal frames_processed
+            frames_processed += 1
+            # Actualizar progreso cada 10 frames
+            if frames_processed % 10 == 0:
+                await self._report_progress(video_id, frames_processed, total_frames, start_time)
+
+        output_path = os.path.join(stream_dir, "chunk.mkv")
+
+        async def on_chunk(index: int, chunk_stats: dict):
+            chunks.append({"name": os.path.basename(chunk_path(output_path, index)), **chunk_stats})
+            await asyncio.to_thread(self._save_checkpoint, stream_dir, checkpoint)
+
+        print(f"Procesando ~{total_frames - skip_frames} frames en streaming ({parallel_frames} en paralelo)...")
+        await self._enhance_stream(
+            video_path, width, height, video_info['fps'], output_path,
+            model_type, scale, face_enhance, parallel_frames, on_frame,
+            skip_frames=skip_frames, on_chunk=on_chunk, chunk_frames=chunk_frames, first_chunk=len(chunks)
+        )
+        if not chunks:
+            raise VideoProcessingError("No se pudieron extraer frames del video")
 
-        try:
-            # Actualizar status a in_progress
-            await self.videos_collection.update_one(
-                {"_id": ObjectId(video_id)},
-                {"$set": {"status": VideoStatus.IN_PROGRESS.value}}
-            )
+        await asyncio.to_thread(
+            self._concat_segments, [os.path.join(stream_dir, chunk["name"]) for chunk in chunks], video_only_path
+        )
+        stats = {
+            key: sum(chunk[key] for chunk in chunks)
+            for key in ("frames_processed", "frames_skipped", "tiles_total", "tiles_recomputed",
+                        "faces_detected", "gfpgan_time_ms")
+        }
+        stats["enhanced_width"] = chunks[0]["enhanced_width"]
+        stats["enhanced_height"] = chunks[0]["enhanced_height"]
+        await self._report_progress(video_id, stats["frames_processed"], total_frames, start_time)
+        return stats
+
+    def _use_segments(self, video_info: dict) -> bool:
+        """Indica si el video es lo bastante largo para procesarse por segmentos."""
+        segment_seconds = config.VIDEO_SEGMENT_SECONDS
+        # La copia sin recodificar no conserva de forma fiable la rotacion de la metadata
+        return (segment_seconds > 0 and video_info.get('rotation', 0) == 0
+                and video_info['duration'] >= 2 * segment_seconds)
+
+    def _split_segments(self, video_path: str, segments_dir: str) -> list:
+        """Corta el stream de video en segmentos independientes sin recodificar.
+
+        El muxer segment de ffmpeg solo corta en keyframes, por lo que cada
+        segmento empieza en un keyframe y se decodifica por si solo.
+        """
+        os.makedirs(segments_dir, exist_ok=True)
+        cmd = [
+            FFMPEG_PATH, '-v', 'error', '-i', video_path,
+            '-map', '0:v:0', '-c', 'copy',
+            '-f', 'segment', '-segment_time', str(config.VIDEO_SEGMENT_SECONDS),
+            '-reset_timestamps', '1',
+            '-y', os.path.join(segments_dir, "segment_%05d.mkv")
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise VideoProcessingError(f"Error dividiendo el video en segmentos: {result.stderr[:500]}")
+        return sorted(
+            os.path.join(segments_dir, f) for f in os.listdir(segments_dir)
+            if f.startswith("segment_")
+        )
 
-            fps = video_info['fps']
+    def _load_checkpoint(self, segments_dir: str) -> Optional[dict]:
+        """Lee el checkpoint (de segmentos o chunks) de un trabajo anterior, si existe."""
+        try:
+            with open(os.path.join(segments_dir, "checkpoint.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
 
-            # 1. Extraer audio del video
-            audio_path, has_audio = self._extract_audio(video_path, process_dir)
+    def _save_checkpoint(self, segments_dir: str, checkpoint: dict):
+        """Guarda el checkpoint (de segmentos o chunks) de forma atomica."""
+        path = os.path.join(segments_dir, "checkpoint.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _concat_segments(self, segment_paths: list, video_only_path: str):
+        """Une los segmentos codificados con el demuxer concat, sin recodificar."""
+        list_path = os.path.join(os.path.dirname(segment_paths[0]), "concat.txt")
+        with open(list_path, "w") as f:
+            for path in segment_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        cmd = [
+            FFMPEG_PATH, '-v', 'error', '-f', 'concat', '-safe', '0',
+            '-i', list_path, '-c', 'copy', '-y', video_only_path
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise VideoProcessingError(f"Error uniendo los segmentos: {result.stderr[:500]}")
+
+    async def _run_segments_pipeline(self, video_id: str, video_path: str, video_info: dict,
+                                     process_dir: str, video_only_path: str, model_type: ModelType,
+                                     scale: int, face_enhance: bool) -> dict:
+        """Pipeline por segmentos alineados a keyframes para videos largos.
+
+        El video se divide en segmentos de ~VIDEO_SEGMENT_SECONDS, hasta
+        VIDEO_PARALLEL_SEGMENTS segmentos se mejoran a la vez (cada uno con su
+        propio decoder y encoder) y los segmentos codificados se concatenan sin
+        recodificar. Un segmento que falla se reintenta por si solo hasta
+        VIDEO_SEGMENT_MAX_ATTEMPTS veces.
+
+        Los segmentos terminados quedan en segments/checkpoint.json y en
+        segments_completed del video; al retomar el trabajo solo se procesan
+        los segmentos que faltan.
+        """
+        width, height = self._decoded_frame_size(video_info)
+        total_frames = video_info['frame_count']
+        segments_dir = os.path.join(process_dir, "segments")
+        checkpoint = await asyncio.to_thread(self._load_checkpoint, segments_dir)
+        if checkpoint is None:
+            if os.path.exists(segments_dir):
+                # Restos de una division interrumpida
+                await asyncio.to_thread(shutil.rmtree, segments_dir)
+            segment_paths = await asyncio.to_thread(self._split_segments, video_path, segments_dir)
+            if not segment_paths:
+                raise VideoProcessingError("No se pudieron extraer segmentos del video")
+            checkpoint = {"segments": [os.path.basename(p) for p in segment_paths], "completed": {}}
+            await asyncio.to_thread(self._save_checkpoint, segments_dir, checkpoint)
+        else:
+            print(f"Retomando video {video_id}: {len(checkpoint['completed'])}/"
+                  f"{len(checkpoint['segments'])} segmentos ya mejorados")
+        segment_paths = [os.path.join(segments_dir, name) for name in checkpoint["segments"]]
+        completed = checkpoint["completed"]
+        await self.videos_collection.update_one(
+            {"_id": ObjectId(video_id)},
+            {"$set": {
+                "segments_total": len(segment_paths),
+                "segments_completed": sorted(int(index) for index in completed)
+            }}
+        )
 
-            # 2. Extraer frames del video
-            frames_dir, frame_files = self._extract_frames(video_path, process_dir)
-            total_frames = len(frame_files)
+        parallel_segments = max(1, min(
+            config.VIDEO_PARALLEL_SEGMENTS or config.INFERENCE_WORKERS, len(segment_paths)
+        ))
+        # Los frames en vuelo se reparten entre los segmentos activos
+        parallel_frames = max(1, -(-self._parallel_frames() // parallel_segments))
+        semaphore = asyncio.Semaphore(parallel_segments)
+        # Frames enviados al encoder por segmento (se reinicia al reintentar)
+        segment_frames = [completed.get(str(i), {}).get("frames_processed", 0) for i in range(len(segment_paths))]
+        start_time = time.time()
 
-            if total_frames == 0:
-                raise VideoProcessingError("No se pudieron extraer frames del video")
+        async def enhance_segment(index: int) -> Tuple[str, dict]:
+            output_path = os.path.join(segments_dir, f"enhanced_{index:05d}.mkv")
+            if str(index) in completed and os.path.exists(output_path):
+                return output_path, completed[str(index)]
+            partial_path = os.path.join(segments_dir, f"enhanced_{index:05d}.partial.mkv")
+
+            async def on_frame():
+                segment_frames[index] += 1
+                frames_processed = sum(segment_frames)
+                if frames_processed % 10 == 0:
+                    await self._report_progress(video_id, frames_processed, total_frames, start_time)
+
+            async with semaphore:
+                for attempt in range(1, config.VIDEO_SEGMENT_MAX_ATTEMPTS + 1):
+                    segment_frames[index] = 0
+                    try:
+                        stats = await self._enhance_stream(
+                            segment_paths[index], width, height, video_info['fps'], partial_path,
+                            model_type, scale, face_enhance, parallel_frames, on_frame
+                        )
+                        os.replace(partial_path, output_path)
+                        completed[str(index)] = stats
+                        await asyncio.to_thread(self._save_checkpoint, segments_dir, checkpoint)
+                        await self.videos_collection.update_one(
+                            {"_id": ObjectId(video_id)},
+                            {"$addToSet": {"segments_completed": index}}
+                        )
+                        return output_path, stats
+                    except Exception as e:
+                        if attempt >= config.VIDEO_SEGMENT_MAX_ATTEMPTS:
+                            raise VideoProcessingError(
+                                f"Segmento {index} fallo tras {attempt} intentos: {e}"
+                            ) from e
+                        print(f"Segmento {index} fallo (intento {attempt}): {e}; reintentando")
+
+        print(f"Procesando ~{total_frames - sum(segment_frames)} frames en "
+              f"{len(segment_paths) - len(completed)} segmentos "
+              f"({parallel_segments} en paralelo, {parallel_frames} frames por segmento)...")
+        tasks = [asyncio.ensure_future(enhance_segment(i)) for i in range(len(segment_paths))]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        await asyncio.to_thread(self._concat_segments, [path for path, _ in results], video_only_path)
+        stats = {
+            # Los checkpoints anteriores pueden no tener todas las claves
+            key: sum(segment_stats.get(key, 0) for _, segment_stats in results)
+            for key in ("frames_processed", "frames_skipped", "tiles_total", "tiles_recomputed",
+                        "faces_detected", "gfpgan_time_ms")
+        }
+        stats["enhanced_width"] = results[0][1]["enhanced_width"]
+        stats["enhanced_height"] = results[0][1]["enhanced_height"]
+        await self._report_progress(video_id, stats["frames_processed"], total_frames, start_time)
+        return stats
+
+    async def _process_video(self, video_id: str, process_dir: str, video_path: str,
+                             model_type: ModelType, scale: int, face_enhance: bool,
+                             video_info: dict, original_ext: str):
+        """Mejora el video y registra el resultado (los errores se propagan al trabajo)."""
+        start_time = time.time()
+        fps = video_info['fps']
 
-            # 3. Crear directorio para frames procesados
-            enhanced_dir = os.path.join(process_dir, "enhanced")
-            os.makedirs(enhanced_dir, exist_ok=True)
+        # 1. Extraer audio del video
+        audio_path, has_audio = await asyncio.to_thread(
+            self._extract_audio, video_path, process_dir
+        )
 
-            # 4. Procesar frames
-            frames_processed = await self._process_frames(
-                video_id, frames_dir, enhanced_dir, frame_files,
+        # 2. Mejorar los frames y codificar el video sin audio
+        video_only_path = os.path.join(process_dir, "video_only.mkv")
+        if config.VIDEO_PIPELINE == "frames":
+            stats = await self._run_frames_pipeline(
+                video_id, video_path, process_dir, video_only_path,
+                model_type, scale, face_enhance, fps
+            )
+        elif self._use_segments(video_info):
+            stats = await self._run_segments_pipeline(
+                video_id, video_path, video_info, process_dir, video_only_path,
+                model_type, scale, face_enhance
+            )
+        else:
+            stats = await self._run_streaming_pipeline(
+                video_id, video_path, video_info, process_dir, video_only_path,
                 model_type, scale, face_enhance
             )
 
-            # 5. Obtener dimensiones del video mejorado
-            first_enhanced = Image.open(os.path.join(enhanced_dir, frame_files[0]))
-            enhanced_width, enhanced_height = first_enhanced.size
-            first_enhanced.close()
+        if not os.path.exists(video_only_path) or os.path.getsize(video_only_path) == 0:
+            raise VideoProcessingError(f"El video temporal no se creo correctamente: {video_only_path}")
 
-            # 6. Preparar rutas de video
-            enhanced_video_path = os.path.join(VIDEO_STORAGE_PATH, f"{video_id}_enhanced.mkv")
-            original_video_final = os.path.join(VIDEO_STORAGE_PATH, f"{video_id}_original{original_ext}")
+        # 3. Preparar rutas de video
+        enhanced_video_path = os.path.join(VIDEO_STORAGE_PATH, f"{video_id}_enhanced.mkv")
+        original_video_final = os.path.join(VIDEO_STORAGE_PATH, f"{video_id}_original{original_ext}")
 
-            # Copiar video original a su ubicacion final
-            shutil.copy2(video_path, original_video_final)
+        # Copiar video original a su ubicacion final
+        await asyncio.to_thread(shutil.copy2, video_path, original_video_final)
 
-            # 7. Crear video desde frames
-            self._create_video_from_frames(
-                enhanced_dir, fps, audio_path, has_audio,
-                enhanced_video_path, process_dir
-            )
+        # 4. Agregar audio si existe
+        await asyncio.to_thread(
+            self._merge_audio_video, video_only_path, audio_path, has_audio, enhanced_video_path
+        )
 
-            # 8. Limpiar carpeta de procesamiento
-            shutil.rmtree(process_dir)
+        if not os.path.exists(enhanced_video_path):
+            raise VideoProcessingError(f"No se pudo crear el video final: {enhanced_video_path}")
+        print(f"Video enhanced creado: {enhanced_video_path} ({os.path.getsize(enhanced_video_path)} bytes)")
 
-            processing_time = int((time.time() - start_time) * 1000)
-            completed_at = datetime.utcnow()
+        processing_time = int((time.time() - start_time) * 1000)
+        completed_at = datetime.utcnow()
+        tiles_recomputed_pct = (round(100 * stats["tiles_recomputed"] / stats["tiles_total"], 1)
+                                if stats["tiles_total"] else None)
+
+        # 5. Actualizar registro en DB como completado
+        await self.videos_collection.update_one(
+            {"_id": ObjectId(video_id)},
+            {"$set": {
+                "status": VideoStatus.COMPLETED.value,
+                "enhanced_path": enhanced_video_path,
+                "original_path": original_video_final,
+                "enhanced_width": stats["enhanced_width"],
+                "enhanced_height": stats["enhanced_height"],
+                "frames_processed": stats["frames_processed"],
+                "frames_skipped": stats["frames_skipped"],
+                "tiles_recomputed_pct": tiles_recomputed_pct,
+                "faces_detected": stats["faces_detected"] if face_enhance else None,
+                "gfpgan_time_ms": stats["gfpgan_time_ms"] if face_enhance else None,
+                "processing_time_ms": processing_time,
+                "gpu_used": image_service.uses_gpu(),
+                "error_message": None,
+                "completed_at": completed_at
+            }}
+        )
 
-            # 11. Actualizar registro en DB como completado
-            await self.videos_collection.update_one(
-                {"_id": ObjectId(video_id)},
-                {"$set": {
-                    "status": VideoStatus.COMPLETED.value,
-                    "enhanced_path": enhanced_video_path,
-                    "original_path": original_video_final,
-                    "enhanced_width": enhanced_width,
-                    "enhanced_height": enhanced_height,
-                    "frames_processed": frames_processed,
-                    "processing_time_ms": processing_time,
-                    "gpu_used": image_service._gpu_used,
-                    "completed_at": completed_at
-                }}
+        # 6. Limpiar carpeta de procesamiento (checkpoints incluidos)
+        await asyncio.to_thread(shutil.rmtree, process_dir, True)
+
+        print(f"Video {video_id} procesado exitosamente en {processing_time}ms "
+              f"({stats['frames_skipped']} frames repetidos reutilizados"
+              + (f", {tiles_recomputed_pct}% de tiles recalculados)" if tiles_recomputed_pct is not None else ")"))
+        if face_enhance:
+            print(f"  GFPGAN: {stats['faces_detected']} rostros en {stats['gfpgan_time_ms']}ms")
+
+    async def _renew_job_lease(self, job_id: str, worker_id: str, task: asyncio.Task,
+                               lease_lost: asyncio.Event):
+        """Renueva periódicamente el lease de un trabajo de video en curso.
+
+        Si el lease se perdió (otro worker tomó el trabajo) cancela task.
+        """
+        interval = max(video_job_queue.lease_seconds // 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await video_job_queue.renew(job_id, worker_id)
+            except Exception as e:
+                print(f"Error renovando el lease del trabajo de video {job_id}: {e}")
+                continue
+            if not renewed:
+                lease_lost.set()
+                task.cancel()
+                return
+
+    async def _process_video_job(self, job: dict, worker_id: str):
+        """Procesa un trabajo de la cola de videos, retomando desde su checkpoint."""
+        job_id = str(job["_id"])
+        payload = job["payload"]
+        video_id = payload["video_id"]
+        process_dir = payload["process_dir"]
+
+        video_doc = await self.videos_collection.find_one({"_id": ObjectId(video_id)})
+        if not video_doc or video_doc["status"] == VideoStatus.COMPLETED.value:
+            # Video eliminado mientras esperaba, o terminado justo antes de una caida
+            await video_job_queue.complete(job_id)
+            return
+
+        await self.videos_collection.update_one(
+            {"_id": ObjectId(video_id)},
+            {"$set": {"status": VideoStatus.IN_PROGRESS.value}}
+        )
+        if job["attempts"] > 1:
+            print(f"Retomando video {video_id} (intento {job['attempts']})")
+
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(
+            self._renew_job_lease(job_id, worker_id, asyncio.current_task(), lease_lost)
+        )
+        try:
+            await self._process_video(
+                video_id, process_dir, payload["video_path"],
+                ModelType(video_doc["model_type"]), video_doc["scale"],
+                video_doc.get("face_enhance", False), payload["video_info"],
+                payload["original_ext"]
             )
+            await video_job_queue.complete(job_id, worker_id)
 
-            print(f"Video {video_id} procesado exitosamente en {processing_time}ms")
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                raise
+            # Cancelado por el heartbeat: el trabajo ahora es de otro worker
+            asyncio.current_task().uncancel()
+            print(f"Video {video_id}: {worker_id} perdió el lease, se detiene el procesamiento")
 
         except Exception as e:
             error_msg = str(e)
-            print(f"Error procesando video {video_id}: {error_msg}")
-
-            # Limpiar carpeta de procesamiento si existe
-            if os.path.exists(process_dir):
+            retry = await video_job_queue.fail(job, error_msg)
+            print(f"Error procesando video {video_id} (intento {job['attempts']}): {error_msg}")
+            if retry is None:
+                # Otro worker tomó el trabajo y sus checkpoints
+                return
+
+            # Los checkpoints se conservan mientras queden reintentos
+            if not retry and os.path.exists(process_dir):
                 shutil.rmtree(process_dir)
 
+            # frames_processed conserva el ultimo progreso reportado
+            await self.videos_collection.update_one(
+                {"_id": ObjectId(video_id)},
+                {"$set": {
+                    "status": VideoStatus.PENDING.value if retry else VideoStatus.ERROR.value,
+                    "error_message": error_msg
+                }}
+            )
+        finally:
+            heartbeat.cancel()
+
+    async def _fail_abandoned_jobs(self):
+        """Marca con error los videos cuyo trabajo agotó sus intentos sin terminar."""
+        for job in await video_job_queue.expire_exhausted():
+            video_id = job["payload"]["video_id"]
+            print(f"Video {video_id} fallido: {job['last_error']}")
+            if os.path.exists(job["payload"]["process_dir"]):
+                shutil.rmtree(job["payload"]["process_dir"])
             await self.videos_collection.update_one(
                 {"_id": ObjectId(video_id)},
                 {"$set": {
                     "status": VideoStatus.ERROR.value,
-                    "error_message": error_msg,
-                    "frames_processed": frames_processed
+                    "error_message": job["last_error"]
                 }}
             )
 
+    async def _job_worker_loop(self, worker_id: str):
+        """Toma trabajos de la cola de videos mientras el servidor esté activo."""
+        self._get_collection()
+        while True:
+            try:
+                await self._fail_abandoned_jobs()
+                job = await video_job_queue.lease(worker_id)
+            except Exception as e:
+                print(f"Error tomando trabajo de la cola de videos ({worker_id}): {e}")
+                job = None
+
+            if job is None:
+                await asyncio.sleep(config.VIDEO_QUEUE_POLL_SECONDS)
+                continue
+
+            await self._process_video_job(job, worker_id)
+
+    def start_job_workers(self, count: int):
+        """Inicia los workers de la cola de videos.
+
+        Los trabajos que quedaron en curso en un proceso anterior vuelven a
+        tomarse cuando vence su lease y continúan desde su checkpoint.
+        """
+        prefix = f"{socket.gethostname()}-{os.getpid()}-video"
+        for i in range(count):
+            worker_id = f"{prefix}-{i}"
+            self._job_workers.append(asyncio.create_task(self._job_worker_loop(worker_id)))
+        print(f"Workers de cola de videos iniciados: {count}")
+
+    async def stop_job_workers(self):
+        """Detiene los workers de la cola; los trabajos en curso se retoman al reiniciar."""
+        for task in self._job_workers:
+            task.cancel()
+        await asyncio.gather(*self._job_workers, return_exceptions=True)
+        self._job_workers = []
+
+    def create_upload_path(self, filename: str) -> str:
+        """Crea la carpeta de procesamiento y retorna la ruta del video original.
+
+        Las subidas binarias escriben directamente en esta ruta, sin pasar
+        por memoria ni por una copia intermedia.
+        """
+        process_dir = os.path.join(VIDEO_STORAGE_PATH, f"{uuid.uuid4()}_process")
+        os.makedirs(process_dir, exist_ok=True)
+        original_ext = os.path.splitext(filename)[1].lower()
+        return os.path.join(process_dir, f"original{original_ext}")
+
+    def discard_upload(self, upload_path: str):
+        """Elimina la carpeta de procesamiento de una subida no utilizada."""
+        process_dir = os.path.dirname(upload_path)
+        if os.path.exists(process_dir):
+            shutil.rmtree(process_dir, ignore_errors=True)
+
     async def enhance_video(
         self,
         user_id: str,
-        request: VideoEnhanceRequest
+        request: VideoEnhanceParams,
+        upload_path: Optional[str] = None
     ) -> Tuple[Optional[VideoResponse], Optional[str]]:
-        """Inicia el procesamiento de un video."""
-        self._get_collection()
+        """Inicia el procesamiento de un video.
 
-        # Decodificar video
-        video_data, error = self._decode_base64_video(request.video_base64)
-        if error:
-            return None, error
+        Si se indica upload_path (creado con create_upload_path), el video ya
+        esta en la carpeta de procesamiento y no se usa request.video_base64.
+        """
+        self._get_collection()
 
-        # Generar ID unico para el video
-        video_id = str(uuid.uuid4())
+        if upload_path:
+            temp_video_path = upload_path
+        else:
+            # Decodificar video
+            video_data, error = self._decode_base64_video(request.video_base64)
+            if error:
+                return None, error
+
+            # Guardar video original temporalmente en la carpeta de procesamiento
+            temp_video_path = self.create_upload_path(request.filename)
+            with open(temp_video_path, 'wb') as f:
+                f.write(video_data)
+            del video_data
+
+        process_dir = os.path.dirname(temp_video_path)
+        original_ext = os.path.splitext(temp_video_path)[1]
         now = datetime.utcnow()
 
         # Determinar modelo y escala
@@ -353,17 +1036,6 @@ class VideoService:
         model_cfg = MODEL_CONFIG[model_type]
         effective_scale = request.scale if request.scale is not None else model_cfg["scale"]
 
-        # Crear carpeta de procesamiento
-        process_dir = os.path.join(VIDEO_STORAGE_PATH, f"{video_id}_process")
-        os.makedirs(process_dir, exist_ok=True)
-
-        # Guardar video original temporalmente
-        original_ext = os.path.splitext(request.filename)[1].lower()
-        temp_video_path = os.path.join(process_dir, f"original{original_ext}")
-
-        with open(temp_video_path, 'wb') as f:
-            f.write(video_data)
-
         # Obtener info del video
         video_info = self._get_video_info(temp_video_path)
 
@@ -400,6 +1072,12 @@ class VideoService:
             "processing_time_ms": None,
             "gpu_used": None,
             "frames_processed": 0,
+            "processing_fps": None,
+            "frames_skipped": None,
+            "tiles_recomputed_pct": None,
+            "faces_detected": None,
+            "gfpgan_time_ms": None,
+            "process_dir": process_dir,
             "created_at": now,
             "completed_at": None
         }
@@ -407,14 +1085,14 @@ class VideoService:
         result = await self.videos_collection.insert_one(video_doc)
         db_video_id = str(result.inserted_id)
 
-        # Iniciar procesamiento en background
-        asyncio.create_task(
-            self._process_video_async(
-                db_video_id, user_id, process_dir, temp_video_path,
-                model_type, effective_scale, request.face_enhance or False, video_info,
-                original_ext
-            )
-        )
+        # Encolar el procesamiento (sobrevive a reinicios de la API)
+        await video_job_queue.enqueue({
+            "video_id": db_video_id,
+            "process_dir": process_dir,
+            "video_path": temp_video_path,
+            "video_info": video_info,
+            "original_ext": original_ext
+        })
 
         # Retornar respuesta inmediata
         return VideoResponse(
@@ -440,8 +1118,13 @@ class VideoService:
             completed_at=None
         ), None
 
-    async def get_video(self, video_id: str, user_id: str) -> Optional[VideoDetailResponse]:
-        """Obtiene un video por su ID."""
+    async def get_video(self, video_id: str, user_id: str,
+                        include_media: bool = True) -> Optional[VideoDetailResponse]:
+        """Obtiene un video por su ID.
+
+        Con include_media=False solo retorna metadata y las URLs de descarga,
+        sin leer los videos desde disco.
+        """
         self._get_collection()
 
         try:
@@ -456,8 +1139,16 @@ class VideoService:
             # Leer videos desde disco solo si estan completos
             original_base64 = None
             enhanced_base64 = None
+            original_url = None
+            enhanced_url = None
 
             if video_doc["status"] == VideoStatus.COMPLETED.value:
+                if video_doc.get("original_path"):
+                    original_url = f"/api/videos/{video_id}/original"
+                if video_doc.get("enhanced_path"):
+                    enhanced_url = f"/api/videos/{video_id}/enhanced"
+
+            if include_media and video_doc["status"] == VideoStatus.COMPLETED.value:
                 if video_doc.get("original_path"):
                     original_base64 = self._read_file_base64(video_doc["original_path"])
                 if video_doc.get("enhanced_path"):
@@ -482,14 +1173,45 @@ class VideoService:
                 processing_time_ms=video_doc.get("processing_time_ms"),
                 gpu_used=video_doc.get("gpu_used"),
                 frames_processed=video_doc.get("frames_processed"),
+                processing_fps=video_doc.get("processing_fps"),
+                frames_skipped=video_doc.get("frames_skipped"),
+                tiles_recomputed_pct=video_doc.get("tiles_recomputed_pct"),
+                faces_detected=video_doc.get("faces_detected"),
+                gfpgan_time_ms=video_doc.get("gfpgan_time_ms"),
                 created_at=video_doc["created_at"],
                 completed_at=video_doc.get("completed_at"),
                 original_base64=original_base64,
-                enhanced_base64=enhanced_base64
+                enhanced_base64=enhanced_base64,
+                original_url=original_url,
+                enhanced_url=enhanced_url
             )
         except Exception:
             return None
 
+    async def get_video_file(self, video_id: str, user_id: str,
+                             kind: str) -> Optional[Tuple[str, str]]:
+        """Retorna (ruta en disco, nombre de descarga) de un video completado."""
+        self._get_collection()
+
+        try:
+            video_doc = await self.videos_collection.find_one(
+                {"_id": ObjectId(video_id), "user_id": user_id},
+                {"status": 1, "original_filename": 1, "original_path": 1, "enhanced_path": 1}
+            )
+        except Exception:
+            return None
+
+        if not video_doc or video_doc["status"] != VideoStatus.COMPLETED.value:
+            return None
+        if not video_doc.get(f"{kind}_path"):
+            return None
+
+        file_path = video_doc[f"{kind}_path"]
+        name = os.path.splitext(video_doc.get("original_filename") or "video")[0]
+        extension = os.path.splitext(file_path)[1]
+        download_name = f"{name}{extension}" if kind == "original" else f"{name}_enhanced{extension}"
+        return file_path, download_name
+
     async def list_videos(
         self,
         user_id: str,
@@ -532,6 +1254,11 @@ class VideoService:
                 processing_time_ms=doc.get("processing_time_ms"),
                 gpu_used=doc.get("gpu_used"),
                 frames_processed=doc.get("frames_processed"),
+                processing_fps=doc.get("processing_fps"),
+                frames_skipped=doc.get("frames_skipped"),
+                tiles_recomputed_pct=doc.get("tiles_recomputed_pct"),
+                faces_detected=doc.get("faces_detected"),
+                gfpgan_time_ms=doc.get("gfpgan_time_ms"),
                 created_at=doc["created_at"],
                 completed_at=doc.get("completed_at")
             ))
@@ -563,8 +1290,9 @@ class VideoService:
             if video_doc.get("enhanced_path") and os.path.exists(video_doc["enhanced_path"]):
                 os.remove(video_doc["enhanced_path"])
 
-            # Eliminar carpeta de procesamiento si existe
-            process_dir = os.path.join(VIDEO_STORAGE_PATH, f"{video_id}_process")
+            # Descartar el trabajo pendiente y la carpeta de procesamiento (checkpoints)
+            await video_job_queue.cancel_for("video_id", video_id)
+            process_dir = video_doc.get("process_dir") or os.path.join(VIDEO_STORAGE_PATH, f"{video_id}_process")
             if os.path.exists(process_dir):
                 shutil.rmtree(process_dir)
 
@@ -581,3 +1309,175 @@ class VideoService:
 
 
 video_service = VideoService()
+
+
+async def iterate(items: Iterable) -> AsyncIterator:
+    """Adapta un iterable a iterador asíncrono."""
+    for item in items:
+        yield item
+
+
+def chunk_path(output_path: str, index: int) -> str:
+    """Ruta del chunk index de output_path (ej. chunk.mkv -> chunk_00003.mkv)."""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}_{index:05d}{ext}"
+
+
+async def drop_frames(frames: AsyncIterator[np.ndarray], count: int) -> AsyncIterator[np.ndarray]:
+    """Frames de frames salvo los primeros count (ya codificados en un intento anterior)."""
+    async for frame in frames:
+        if count > 0:
+            count -= 1
+            continue
+        yield frame
+
+
+async def read_frames(reader: FrameReader) -> AsyncIterator[np.ndarray]:
+    """Frames decodificados por el reader, leídos sin bloquear el event loop."""
+    while True:
+        frame = await asyncio.to_thread(reader.read)
+        if frame is None:
+            return
+        yield frame
+
+
+async def ordered_parallel(items: AsyncIterator, worker: Callable[[Any], Awaitable],
+                           max_in_flight: int) -> AsyncIterator:
+    """Ejecuta worker(item) con hasta max_in_flight tareas a la vez y entrega los resultados en orden.
+
+    Los resultados que terminan antes que los anteriores esperan en un buffer
+    de reordenamiento acotado por max_in_flight. Si una tarea falla, las
+    pendientes se cancelan.
+    """
+    pending: Deque[asyncio.Task] = deque()
+    try:
+        async for item in items:
+            pending.append(asyncio.ensure_future(worker(item)))
+            if len(pending) >= max_in_flight:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def group_repeated_frames(items: AsyncIterator, threshold: Optional[float],
+                                load: Optional[Callable[[Any], np.ndarray]] = None) -> AsyncIterator[Tuple[Any, int]]:
+    """Agrupa cada frame con los siguientes que son practicamente iguales a el.
+
+    Entrega (frame, repeticiones): el primer frame de cada tramo y cuantos
+    frames consecutivos coinciden con el (frames_match) y pueden reutilizar
+    su resultado. Se compara contra el primer frame del tramo, no contra el
+    anterior, para que un cambio gradual no se acumule. load obtiene los
+    pixeles de un item (por defecto el item es el frame); con threshold None
+    no se agrupa.
+    """
+    reference = reference_pixels = None
+    repeats = 0
+    async for item in items:
+        if threshold is None:
+            yield item, 0
+            continue
+        pixels = item if load is None else await asyncio.to_thread(load, item)
+        if reference is not None and await asyncio.to_thread(frames_match, reference_pixels, pixels, threshold):
+            repeats += 1
+            continue
+        if reference is not None:
+            yield reference, repeats
+        reference, reference_pixels, repeats = item, pixels, 0
+    if reference is not None:
+        yield reference, repeats
+
+
+async def whole_frame_groups(groups: AsyncIterator[Tuple[np.ndarray, int]]) -> AsyncIterator[tuple]:
+    """Adapta los tramos de group_repeated_frames al formato de plan_changed_regions (frame completo)."""
+    async for frame, repeats in groups:
+        yield frame, repeats, None, (0, 0)
+
+
+async def plan_changed_regions(frames: AsyncIterator[np.ndarray], threshold: float, tile_size: int,
+                               max_changed: float, dedup: bool) -> AsyncIterator[tuple]:
+    """Decide que regiones de cada frame hay que recalcular.
+
+    Mantiene una referencia con los pixeles de entrada que corresponden al
+    frame mejorado vigente; cada frame se compara con ella por tiles
+    (changed_tiles) y solo los tiles cambiados se recalculan y actualizan la
+    referencia, de modo que los cambios lentos no se acumulan. Entrega
+    (frame, repeticiones, regiones, (tiles recalculados, tiles del frame)):
+    regiones None significa frame completo (el primero, o si cambio mas de
+    max_changed de los tiles) y [] que no cambio nada. Con dedup los frames
+    sin cambios se agrupan como repeticiones del anterior.
+    """
+    reference: Optional[np.ndarray] = None
+    pending: Optional[list] = None
+    async for frame in frames:
+        height, width = frame.shape[:2]
+        tiles_per_frame = (-(-height // tile_size)) * (-(-width // tile_size))
+        if reference is None or reference.shape != frame.shape:
+            regions, recomputed = None, tiles_per_frame
+        else:
+            mask = await asyncio.to_thread(changed_tiles, reference, frame, tile_size, threshold)
+            recomputed = int(mask.sum())
+            if recomputed == 0 and dedup and pending is not None:
+                pending[1] += 1
+                continue
+            if recomputed > max_changed * tiles_per_frame:
+                regions, recomputed = None, tiles_per_frame
+            else:
+                regions = tile_regions(mask, tile_size, height, width)
+
+        if regions is None:
+            reference = frame.copy()
+        else:
+            for top, left, bottom, right in regions:
+                reference[top:bottom, left:right] = frame[top:bottom, left:right]
+        if pending is not None:
+            yield tuple(pending)
+        pending = [frame, 0, regions, (recomputed, tiles_per_frame)]
+    if pending is not None:
+        yield tuple(pending)
+
+
+async def attach_face_boxes(groups: AsyncIterator[tuple], tracker: Optional[FaceTracker],
+                            load: Optional[Callable] = None) -> AsyncIterator[tuple]:
+    """Agrega a cada tramo las cajas de rostros de su primer frame.
+
+    Los tramos llegan en orden y el tracker avanza con cada uno; load obtiene
+    el frame a partir del primer elemento del tramo (por defecto ya es el
+    frame). Sin tracker las cajas son None y cada worker detecta los rostros.
+    """
+    async for group in groups:
+        face_boxes = None
+        if tracker is not None:
+            item = group[0]
+            face_boxes = await asyncio.to_thread(lambda: tracker.update(load(item) if load else item))
+        yield (*group, face_boxes)
+
+
+def link_frame_file(source_path: str, frame_path: str):
+    """Reutiliza un frame mejorado para un frame repetido (hardlink o copia atomica)."""
+    try:
+        os.link(source_path, frame_path)
+    except OSError:
+        shutil.copyfile(source_path, f"{frame_path}.tmp")
+        os.replace(f"{frame_path}.tmp", frame_path)
+
+
+def enhance_frame_file(frame_path: str, enhanced_frame_path: str, model_type: ModelType, scale: int,
+                       face_enhance: bool, face_boxes: Optional[np.ndarray] = None) -> Optional[Tuple[int, int]]:
+    """Tarea del pool de inferencia: lee un frame, lo mejora y lo guarda en disco.
+
+    Retorna (rostros, ms de GFPGAN) o None sin face enhancement.
+    """
+    with Image.open(frame_path) as img:
+        img_array = np.array(img.convert('RGB'))
+    enhanced_array, face_stats = image_service._enhance_frame(
+        img_array, model_type, scale, face_enhance, face_boxes
+    )
+    # Escritura atomica: un frame existente en disco siempre esta completo (checkpoint)
+    Image.fromarray(enhanced_array).save(f"{enhanced_frame_path}.tmp", 'PNG')
+    os.replace(f"{enhanced_frame_path}.tmp", enhanced_frame_path)
+    return face_stats
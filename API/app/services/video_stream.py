@@ -0,0 +1,272 @@
+import queue
+import subprocess
+import tempfile
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class VideoProcessingError(Exception):
+    """Excepción personalizada para errores en el procesamiento de video."""
+    pass
+
+
+# Usar ffmpeg del sistema que tiene libx264 en lugar del de Conda
+FFMPEG_PATH = "/usr/bin/ffmpeg"
+FFPROBE_PATH = "/usr/bin/ffprobe"
+
+# Marca de fin de stream en los buffers
+_END = object()
+
+
+def _read_stderr(stderr_file) -> str:
+    """Lee la salida de error de ffmpeg guardada en un archivo temporal."""
+    stderr_file.seek(0)
+    return stderr_file.read().decode(errors='replace')
+
+
+def block_differences(reference: np.ndarray, frame: np.ndarray, block: int = 16) -> np.ndarray:
+    """Diferencia absoluta media (0-255) de cada bloque de block x block pixeles.
+
+    Retorna un array (filas, columnas) de bloques con el maximo entre canales.
+    """
+    diff = cv2.absdiff(reference, frame)
+    height, width = diff.shape[:2]
+    block_means = cv2.resize(
+        diff, (-(-width // block), -(-height // block)), interpolation=cv2.INTER_AREA
+    )
+    return block_means.max(axis=2) if block_means.ndim == 3 else block_means
+
+
+def frames_match(reference: np.ndarray, frame: np.ndarray, threshold: float, block: int = 16) -> bool:
+    """Indica si frame es practicamente igual a reference.
+
+    Compara la diferencia absoluta media de cada bloque de block x block
+    pixeles (escala 0-255): basta un bloque por encima de threshold (un cursor,
+    un subtitulo) para considerar distintos los frames.
+    """
+    if reference.shape != frame.shape:
+        return False
+    return float(block_differences(reference, frame, block).max()) <= threshold
+
+
+def changed_tiles(reference: np.ndarray, frame: np.ndarray, tile_size: int, threshold: float,
+                  block: int = 16) -> np.ndarray:
+    """Mascara (filas, columnas) de los tiles de tile_size pixeles que cambiaron.
+
+    Un tile cambia si alguno de sus bloques de block x block supera threshold;
+    tile_size debe ser multiplo de block.
+    """
+    blocks = block_differences(reference, frame, block)
+    per_tile = tile_size // block
+    rows, cols = -(-blocks.shape[0] // per_tile), -(-blocks.shape[1] // per_tile)
+    padded = np.zeros((rows * per_tile, cols * per_tile), dtype=blocks.dtype)
+    padded[:blocks.shape[0], :blocks.shape[1]] = blocks
+    return padded.reshape(rows, per_tile, cols, per_tile).max(axis=(1, 3)) > threshold
+
+
+def tile_regions(mask: np.ndarray, tile_size: int, height: int, width: int) -> List[Tuple[int, int, int, int]]:
+    """Convierte una mascara de tiles en regiones (top, left, bottom, right).
+
+    Los tiles cambiados contiguos de una misma fila se unen en una region.
+    """
+    regions = []
+    for row in range(mask.shape[0]):
+        col = 0
+        while col < mask.shape[1]:
+            if not mask[row, col]:
+                col += 1
+                continue
+            start = col
+            while col < mask.shape[1] and mask[row, col]:
+                col += 1
+            regions.append((
+                row * tile_size, start * tile_size,
+                min((row + 1) * tile_size, height), min(col * tile_size, width)
+            ))
+    return regions
+
+
+class FrameReader:
+    """Decodifica un video a frames RGB crudos leídos desde un pipe de ffmpeg.
+
+    Un hilo lee los frames y los deja en un buffer acotado, de modo que la
+    decodificación se solapa con la inferencia sin acumular el video en memoria.
+    """
+
+    def __init__(self, video_path: str, width: int, height: int, buffer_frames: int = 8):
+        self.video_path = video_path
+        self.width = width
+        self.height = height
+        self.frame_size = width * height * 3
+        self._buffer: queue.Queue = queue.Queue(maxsize=max(1, buffer_frames))
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._error: Optional[str] = None
+
+    def start(self):
+        """Inicia ffmpeg y el hilo de lectura."""
+        cmd = [
+            FFMPEG_PATH, '-v', 'error', '-i', self.video_path,
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1'
+        ]
+        # stderr a archivo temporal para no bloquear ffmpeg si escribe mucho
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=self._stderr,
+            bufsize=self.frame_size
+        )
+        self._thread = threading.Thread(target=self._read_loop, name="frame-reader", daemon=True)
+        self._thread.start()
+
+    def _read_frame(self) -> Optional[np.ndarray]:
+        """Lee un frame completo del pipe; None al final del stream."""
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        view = memoryview(frame).cast('B')
+        read = 0
+        while read < self.frame_size:
+            count = self._process.stdout.readinto(view[read:])
+            if not count:
+                return None
+            read += count
+        return frame
+
+    def _read_loop(self):
+        try:
+            while not self._stopped.is_set():
+                frame = self._read_frame()
+                if frame is None:
+                    break
+                self._buffer.put(frame)
+            if self._process.wait() != 0 and not self._stopped.is_set():
+                self._error = f"Error decodificando video: {_read_stderr(self._stderr)[:500]}"
+        except Exception as e:
+            self._error = f"Error leyendo frames: {e}"
+        finally:
+            self._buffer.put(_END)
+
+    def read(self) -> Optional[np.ndarray]:
+        """Retorna el siguiente frame (bloqueante) o None al terminar el video."""
+        item = self._buffer.get()
+        if item is _END:
+            self._buffer.put(_END)
+            if self._error:
+                raise VideoProcessingError(self._error)
+            return None
+        return item
+
+    def close(self):
+        """Detiene la decodificación y libera el proceso de ffmpeg."""
+        self._stopped.set()
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+        # Vaciar el buffer para desbloquear al hilo lector
+        while self._thread is not None and self._thread.is_alive():
+            try:
+                self._buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        if self._process is not None:
+            self._process.wait()
+            self._process.stdout.close()
+            self._stderr.close()
+
+
+class FrameWriter:
+    """Codifica frames RGB crudos con libx264 escribiendo en el stdin de ffmpeg.
+
+    Los frames se encolan en un buffer acotado y un hilo los envía al encoder;
+    write() bloquea cuando el buffer está lleno (backpressure).
+    """
+
+    def __init__(self, output_path: str, width: int, height: int, fps: float,
+                 buffer_frames: int = 8):
+        self.output_path = output_path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self._buffer: queue.Queue = queue.Queue(maxsize=max(1, buffer_frames))
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[str] = None
+
+    def start(self):
+        """Inicia ffmpeg y el hilo de escritura."""
+        cmd = [
+            FFMPEG_PATH, '-v', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f"{self.width}x{self.height}",
+            '-framerate', f"{self.fps:.2f}",
+            '-i', 'pipe:0',
+            '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+            '-y', self.output_path
+        ]
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stderr=self._stderr
+        )
+        self._thread = threading.Thread(target=self._write_loop, name="frame-writer", daemon=True)
+        self._thread.start()
+
+    def _write_loop(self):
+        while True:
+            item = self._buffer.get()
+            if item is _END:
+                break
+            frame, on_written = item
+            try:
+                if not self._error:
+                    self._process.stdin.write(np.ascontiguousarray(frame).data)
+            except (BrokenPipeError, OSError) as e:
+                self._error = f"El encoder terminó inesperadamente: {e}"
+            finally:
+                if on_written is not None:
+                    on_written()
+
+    def write(self, frame: np.ndarray, on_written: Optional[Callable[[], None]] = None):
+        """Encola un frame para codificar (bloqueante si el buffer está lleno).
+
+        on_written se llama cuando el frame ya se envió al encoder (por ejemplo,
+        para devolver su slot de memoria compartida).
+        """
+        if self._error:
+            raise VideoProcessingError(self._error)
+        self._buffer.put((frame, on_written))
+
+    def close(self):
+        """Termina la codificación y valida el resultado."""
+        self._buffer.put(_END)
+        self._thread.join()
+        self._process.stdin.close()
+        returncode = self._process.wait()
+        stderr = _read_stderr(self._stderr)
+        self._stderr.close()
+        if returncode != 0:
+            raise VideoProcessingError(f"Error creando video desde frames: {stderr[:500]}")
+        if self._error:
+            raise VideoProcessingError(self._error)
+
+    def abort(self):
+        """Cancela la codificación descartando el resultado parcial."""
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+        if self._thread is not None:
+            while self._thread.is_alive():
+                try:
+                    self._buffer.put(_END, timeout=0.1)
+                except queue.Full:
+                    try:
+                        self._buffer.get_nowait()
+                    except queue.Empty:
+                        pass
+                self._thread.join(timeout=0.1)
+        if self._process is not None:
+            self._process.wait()
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+            self._stderr.close()
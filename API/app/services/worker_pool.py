@@ -0,0 +1,294 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+# Arrays desde este tamaño se transfieren por memoria compartida en lugar de por el pipe
+SHARED_MEMORY_MIN_BYTES = 64 * 1024
+
+# Cores asignados a este proceso si es un worker fijado (None en el proceso de la API)
+_worker_cores: Optional[List[int]] = None
+
+
+def current_worker_cores() -> Optional[List[int]]:
+    """Cores del worker fijado que ejecuta este código, o None fuera de un worker."""
+    return _worker_cores
+
+
+def split_cores(num_workers: int, cores_per_worker: int = 0) -> List[List[int]]:
+    """Reparte los cores disponibles en conjuntos disjuntos, uno por worker.
+
+    Con cores_per_worker = 0 se reparten todos los cores en partes iguales;
+    si hay menos cores que workers, varios workers comparten un core.
+    """
+    try:
+        cores = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = list(range(os.cpu_count() or 1))
+    if len(cores) < num_workers:
+        return [[cores[i % len(cores)]] for i in range(num_workers)]
+    size = cores_per_worker or len(cores) // num_workers
+    size = min(size, len(cores) // num_workers)
+    return [cores[i * size:(i + 1) * size] for i in range(num_workers)]
+
+
+class SharedArray:
+    """Referencia serializable a un array en memoria compartida.
+
+    Solo viaja por el pipe el nombre del bloque, la forma y el dtype; el
+    contenido se lee directamente del bloque compartido.
+    """
+
+    def __init__(self, array: np.ndarray, pil_mode: Optional[str] = None):
+        self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.name = self._shm.name
+        self.shape = array.shape
+        self.dtype = array.dtype.str
+        self.pil_mode = pil_mode
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)[...] = array
+
+    def __getstate__(self):
+        return {"name": self.name, "shape": self.shape, "dtype": self.dtype, "pil_mode": self.pil_mode}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+
+    def attach(self):
+        """Abre el bloque y retorna el array (o la imagen PIL) que referencia."""
+        self._shm = shared_memory.SharedMemory(name=self.name)
+        array = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=self._shm.buf)
+        if self.pil_mode is not None:
+            # PIL copia los datos, por lo que el bloque se puede cerrar enseguida
+            image = Image.fromarray(array, mode=self.pil_mode)
+            del array
+            self.close()
+            return image
+        return array
+
+    def read(self) -> np.ndarray:
+        """Copia el contenido a un array propio del proceso y libera el bloque."""
+        self._shm = self._shm or shared_memory.SharedMemory(name=self.name)
+        array = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=self._shm.buf).copy()
+        self.unlink()
+        return array
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    def unlink(self):
+        """Cierra y elimina el bloque (lo hace quien recibe el último uso)."""
+        if self._shm is None:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+
+def _share(value):
+    """Reemplaza arrays e imágenes grandes por referencias en memoria compartida."""
+    if isinstance(value, np.ndarray) and value.nbytes >= SHARED_MEMORY_MIN_BYTES:
+        return SharedArray(np.ascontiguousarray(value))
+    if isinstance(value, Image.Image) and value.mode in ("RGB", "RGBA", "L"):
+        if value.width * value.height * len(value.getbands()) >= SHARED_MEMORY_MIN_BYTES:
+            return SharedArray(np.asarray(value), pil_mode=value.mode)
+    return value
+
+
+def _resolve(value):
+    """Retorna el array o imagen detrás de una referencia compartida."""
+    return value.attach() if isinstance(value, SharedArray) else value
+
+
+def _worker_main(index: int, cores: List[int], task_queue, result_queue,
+                 initializer: Optional[Callable]):
+    """Bucle de un worker: fija sus cores, precarga modelos y ejecuta tareas."""
+    global _worker_cores
+    _worker_cores = cores
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    import torch
+    torch.set_num_threads(len(cores))
+    if initializer is not None:
+        initializer()
+    result_queue.put((None, index, True, None))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, fn, args = task
+        shared = [arg for arg in args if isinstance(arg, SharedArray)]
+        try:
+            result = _share(fn(*[_resolve(arg) for arg in args]))
+            result_queue.put((task_id, index, True, result))
+        except Exception as e:
+            try:
+                result_queue.put((task_id, index, False, e))
+            except Exception:
+                # La excepción no es serializable: se envía su descripción
+                result_queue.put((task_id, index, False, RuntimeError(repr(e))))
+        finally:
+            for arg in shared:
+                arg.close()
+
+
+class PinnedWorkerPool(Executor):
+    """Pool de procesos de inferencia, cada uno fijado a un conjunto de cores.
+
+    Cada worker tiene su propia cola de tareas, sus modelos precargados y
+    tantos threads de torch como cores; las tareas se envían al worker con
+    menos tareas en curso. Los arrays e imágenes grandes (entradas y
+    resultados) viajan por memoria compartida en lugar de serializarse.
+    Si un worker termina inesperadamente sus tareas fallan y se reinicia.
+    """
+
+    def __init__(self, num_workers: int, cores_per_worker: int = 0,
+                 initializer: Optional[Callable] = None):
+        self._context = multiprocessing.get_context("spawn")
+        self._initializer = initializer
+        self._core_sets = split_cores(max(1, num_workers), cores_per_worker)
+        self._result_queue = self._context.Queue()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, tuple] = {}
+        self._load = [0] * len(self._core_sets)
+        self._completed = [0] * len(self._core_sets)
+        self._ready = [False] * len(self._core_sets)
+        self._processes: List = [None] * len(self._core_sets)
+        self._task_queues: List = [None] * len(self._core_sets)
+        self._shutdown = False
+
+        for index in range(len(self._core_sets)):
+            self._start_worker(index)
+        self._collector = threading.Thread(target=self._collect_results, name="pinned-results", daemon=True)
+        self._collector.start()
+
+    def _start_worker(self, index: int):
+        self._task_queues[index] = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self._core_sets[index], self._task_queues[index],
+                  self._result_queue, self._initializer),
+            name=f"inference-{index}",
+            daemon=True
+        )
+        process.start()
+        self._processes[index] = process
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Envía fn(*args) al worker con menos tareas en curso."""
+        if kwargs:
+            raise TypeError("PinnedWorkerPool no soporta argumentos con nombre")
+        if self._shutdown:
+            raise RuntimeError("El pool de workers está detenido")
+        future: Future = Future()
+        # La tarea se despacha enseguida: queda en ejecución y ya no se puede cancelar
+        future.set_running_or_notify_cancel()
+        task_id = uuid.uuid4().hex
+        shared_args = [_share(arg) for arg in args]
+        with self._lock:
+            if self._shutdown:
+                # Detenido mientras se copiaban los argumentos: liberar sus bloques
+                for arg in shared_args:
+                    if isinstance(arg, SharedArray):
+                        arg.unlink()
+                raise RuntimeError("El pool de workers está detenido")
+            index = min(range(len(self._load)), key=lambda i: self._load[i])
+            self._load[index] += 1
+            self._pending[task_id] = (future, index, shared_args)
+        self._task_queues[index].put((task_id, fn, shared_args))
+        return future
+
+    def _finish(self, task_id: str, ok: bool, value):
+        """Resuelve el future de una tarea y libera su memoria compartida."""
+        with self._lock:
+            entry = self._pending.pop(task_id, None)
+            if entry is not None:
+                self._load[entry[1]] -= 1
+                self._completed[entry[1]] += 1
+        if entry is None:
+            # Tarea ya cancelada: solo se libera el resultado
+            if isinstance(value, SharedArray):
+                value.unlink()
+            return
+        future, _, shared_args = entry
+        for arg in shared_args:
+            if isinstance(arg, SharedArray):
+                arg.unlink()
+        if isinstance(value, SharedArray):
+            value = value.read()
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def _collect_results(self):
+        """Recibe los resultados de todos los workers y vigila que sigan vivos."""
+        last_check = time.monotonic()
+        while True:
+            if time.monotonic() - last_check >= 1.0:
+                self._check_workers()
+                last_check = time.monotonic()
+            try:
+                task_id, index, ok, value = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            if task_id is None:
+                self._ready[index] = True
+                if value == "stop":
+                    return
+                continue
+            self._finish(task_id, ok, value)
+
+    def _check_workers(self):
+        """Falla las tareas de los workers caídos y los reinicia."""
+        for index, process in enumerate(self._processes):
+            if self._shutdown or process is None or process.is_alive():
+                continue
+            print(f"Worker de inferencia {index} terminó (exit={process.exitcode}), reiniciando")
+            with self._lock:
+                lost = [task_id for task_id, entry in self._pending.items() if entry[1] == index]
+            for task_id in lost:
+                self._finish(task_id, False, RuntimeError(f"El worker de inferencia {index} terminó"))
+            self._ready[index] = False
+            self._start_worker(index)
+
+    def stats(self) -> List[dict]:
+        """Estado de cada worker para monitoreo."""
+        with self._lock:
+            return [
+                {
+                    "cores": cores,
+                    "ready": self._ready[index],
+                    "active": self._load[index],
+                    "completed": self._completed[index],
+                }
+                for index, cores in enumerate(self._core_sets)
+            ]
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """Detiene los workers (las tareas en curso terminan si wait es True)."""
+        with self._lock:
+            self._shutdown = True
+            pending = list(self._pending) if cancel_futures else []
+        for task_id in pending:
+            self._finish(task_id, False, RuntimeError("Pool de workers detenido"))
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        if wait:
+            for process in self._processes:
+                process.join()
+        self._result_queue.put((None, 0, True, "stop"))
+        self._collector.join(timeout=5)
@@ -0,0 +1,119 @@
+import os
+import struct
+import tempfile
+import zlib
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+
+class PNGStripWriter:
+    """Escribe un PNG RGB por franjas de filas sin mantener la imagen en memoria.
+
+    Cada franja se filtra (filtro Up) y se comprime de forma incremental en
+    chunks IDAT, por lo que la memoria usada es proporcional a la franja.
+    """
+
+    def __init__(self, path: str, width: int, height: int, compress_level: int = 6):
+        self.path = path
+        self.width = width
+        self.height = height
+        self._rows_written = 0
+        self._previous_row = np.zeros((width * 3,), dtype=np.uint8)
+        self._compressor = zlib.compressobj(compress_level)
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(b"\x89PNG\r\n\x1a\n")
+        # IHDR: ancho, alto, 8 bits, color RGB, compresión, filtro y sin entrelazado
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(chunk_type)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type)) & 0xFFFFFFFF))
+
+    def write(self, rows: np.ndarray):
+        """Agrega una franja (filas, ancho, 3) en uint8."""
+        if rows.shape[1:] != (self.width, 3):
+            raise ValueError(f"Franja de forma {rows.shape} no coincide con el ancho {self.width}")
+        flat = np.ascontiguousarray(rows, dtype=np.uint8).reshape(len(rows), -1)
+        previous = np.vstack([self._previous_row[None, :], flat[:-1]])
+        filtered = np.empty((len(rows), flat.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 2  # Filtro Up: diferencia con la fila anterior (módulo 256)
+        np.subtract(flat, previous, out=filtered[:, 1:])
+
+        data = self._compressor.compress(filtered.tobytes())
+        if data:
+            self._write_chunk(b"IDAT", data)
+        self._previous_row = flat[-1].copy()
+        self._rows_written += len(rows)
+
+    def close(self):
+        """Termina el archivo y lo mueve a su ruta final."""
+        if self._rows_written != self.height:
+            raise ValueError(f"Se escribieron {self._rows_written} de {self.height} filas")
+        self._write_chunk(b"IDAT", self._compressor.flush())
+        self._write_chunk(b"IEND", b"")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Descarta el archivo parcial."""
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class MemmapStripWriter:
+    """Acumula las franjas en un array uint8 mapeado a disco y codifica al cerrar.
+
+    Para formatos sin escritura incremental (JPEG, WEBP): la salida no pasa por
+    tensores float de tamaño completo y, hasta la codificación final, las filas
+    viven en el archivo mapeado en lugar de en la memoria del proceso.
+    """
+
+    def __init__(self, path: str, width: int, height: int, img_format: str,
+                 tmp_dir: Optional[str] = None):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.img_format = "JPEG" if img_format.upper() == "JPG" else img_format.upper()
+        self._rows_written = 0
+        handle, self._buffer_path = tempfile.mkstemp(suffix=".raw", dir=tmp_dir or os.path.dirname(path))
+        os.close(handle)
+        self._array = np.memmap(self._buffer_path, dtype=np.uint8, mode="w+", shape=(height, width, 3))
+
+    def write(self, rows: np.ndarray):
+        """Agrega una franja (filas, ancho, 3) en uint8."""
+        self._array[self._rows_written:self._rows_written + len(rows)] = rows
+        self._rows_written += len(rows)
+
+    def close(self):
+        """Codifica la imagen en su formato final y elimina el archivo temporal."""
+        if self._rows_written != self.height:
+            raise ValueError(f"Se escribieron {self._rows_written} de {self.height} filas")
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            Image.fromarray(self._array).save(tmp_path, format=self.img_format)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.abort()
+
+    def abort(self):
+        """Libera el array mapeado y elimina el archivo temporal."""
+        if self._array is not None:
+            del self._array
+            self._array = None
+        if os.path.exists(self._buffer_path):
+            os.remove(self._buffer_path)
+
+
+def open_strip_writer(path: str, width: int, height: int, img_format: str):
+    """Retorna el writer por franjas adecuado para el formato de salida."""
+    if img_format.upper() == "PNG":
+        return PNGStripWriter(path, width, height)
+    return MemmapStripWriter(path, width, height, img_format)
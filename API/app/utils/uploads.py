@@ -0,0 +1,159 @@
+import re
+from typing import BinaryIO, Callable, Dict, Optional
+
+
+class UploadError(Exception):
+    """Error en el formato o contenido de una subida de archivo."""
+    pass
+
+
+_DISPOSITION_PARAM = re.compile(r'(\w+)\*?="?([^";]*)"?')
+
+
+def parse_boundary(content_type: str) -> Optional[bytes]:
+    """Extrae el boundary de un header Content-Type multipart/form-data."""
+    for part in content_type.split(";")[1:]:
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "boundary" and value:
+            return value.strip('"').encode("latin-1")
+    return None
+
+
+class MultipartStreamParser:
+    """Parser incremental de multipart/form-data.
+
+    Recibe el cuerpo por chunks (feed) y escribe las partes con filename
+    directamente en el archivo retornado por open_file, sin acumular el
+    archivo en memoria. Los campos simples se guardan en fields (acotados
+    a max_field_bytes cada uno).
+    """
+
+    _PREAMBLE, _HEADERS, _BODY, _AFTER_DELIMITER, _END = range(5)
+
+    def __init__(self, boundary: bytes, open_file: Callable[[str], BinaryIO],
+                 max_field_bytes: int = 64 * 1024):
+        self._delimiter = b"\r\n--" + boundary
+        self._open_file = open_file
+        self._max_field_bytes = max_field_bytes
+        # El primer delimitador no lleva CRLF previo; se agrega para unificar la búsqueda
+        self._buffer = bytearray(b"\r\n")
+        self._state = self._PREAMBLE
+        self._field_name: Optional[str] = None
+        self._field_value: Optional[bytearray] = None
+        self._file: Optional[BinaryIO] = None
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.file_size = 0
+
+    def feed(self, chunk: bytes):
+        """Procesa un nuevo chunk del cuerpo."""
+        self._buffer.extend(chunk)
+        while self._step():
+            pass
+
+    def _step(self) -> bool:
+        """Avanza la máquina de estados; retorna False si necesita más datos."""
+        if self._state == self._PREAMBLE:
+            index = self._buffer.find(self._delimiter)
+            if index < 0:
+                # Conservar solo lo necesario para detectar un delimitador partido
+                del self._buffer[:max(len(self._buffer) - len(self._delimiter), 0)]
+                return False
+            del self._buffer[:index + len(self._delimiter)]
+            self._state = self._AFTER_DELIMITER
+            return True
+
+        if self._state == self._AFTER_DELIMITER:
+            if len(self._buffer) < 2:
+                return False
+            marker = bytes(self._buffer[:2])
+            del self._buffer[:2]
+            if marker == b"--":
+                self._state = self._END
+                return False
+            if marker != b"\r\n":
+                raise UploadError("Cuerpo multipart mal formado")
+            self._state = self._HEADERS
+            return True
+
+        if self._state == self._HEADERS:
+            index = self._buffer.find(b"\r\n\r\n")
+            if index < 0:
+                if len(self._buffer) > self._max_field_bytes:
+                    raise UploadError("Headers multipart demasiado grandes")
+                return False
+            headers = bytes(self._buffer[:index]).decode("utf-8", errors="replace")
+            del self._buffer[:index + 4]
+            self._start_part(headers)
+            self._state = self._BODY
+            return True
+
+        if self._state == self._BODY:
+            index = self._buffer.find(self._delimiter)
+            if index < 0:
+                safe = len(self._buffer) - len(self._delimiter)
+                if safe > 0:
+                    self._write_part(self._buffer[:safe])
+                    del self._buffer[:safe]
+                return False
+            self._write_part(self._buffer[:index])
+            del self._buffer[:index + len(self._delimiter)]
+            self._end_part()
+            self._state = self._AFTER_DELIMITER
+            return True
+
+        # _END: el epílogo se descarta
+        self._buffer.clear()
+        return False
+
+    def _start_part(self, headers: str):
+        """Inicia una parte a partir de sus headers."""
+        disposition = ""
+        for line in headers.split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-disposition":
+                disposition = value
+        params = {k.lower(): v for k, v in _DISPOSITION_PARAM.findall(disposition)}
+
+        if "filename" in params:
+            if self._file is not None or self.filename is not None:
+                raise UploadError("Solo se admite un archivo por solicitud")
+            self.filename = params["filename"] or "upload.bin"
+            self._file = self._open_file(self.filename)
+        else:
+            self._field_name = params.get("name")
+            self._field_value = bytearray()
+
+    def _write_part(self, data: bytearray):
+        if not data:
+            return
+        if self._file is not None:
+            self._file.write(data)
+            self.file_size += len(data)
+        elif self._field_value is not None:
+            if len(self._field_value) + len(data) > self._max_field_bytes:
+                raise UploadError(f"Campo '{self._field_name}' demasiado grande")
+            self._field_value.extend(data)
+
+    def _end_part(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self._field_name:
+            self.fields[self._field_name] = self._field_value.decode("utf-8", errors="replace")
+        self._field_name = None
+        self._field_value = None
+
+    def abort(self):
+        """Cierra el archivo en curso sin validar el cuerpo."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """Valida que el cuerpo terminó correctamente."""
+        self.abort()
+        if self._state != self._END:
+            raise UploadError("Cuerpo multipart incompleto")
+        if self.filename is None:
+            raise UploadError("No se encontró un archivo en el formulario")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Calibra tamaño de tile, tiles por forward y threads de torch para este host.
+
+Los valores ganadores se guardan en el perfil de autotuning
+(REALESRGAN_AUTOTUNE_PROFILE, por defecto weights/autotune_profile.json) y se
+aplican al crear los upscalers.
+
+Uso:
+    python autotune.py [--models general_x4,general_v3] [--tiles 128,256,512] [--only-missing]
+"""
+
+import argparse
+import os
+
+from app.config import config
+from app.models.image import MODEL_CONFIG
+from app.services.image_service import image_service
+from app.services.model_registry import parse_model_list
+
+
+def parse_int_list(value: str):
+    return [int(v) for v in value.split(",") if v.strip()] if value else None
+
+
+def parse_args():
+    """Lee los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Autotuning de tiles y threads por modelo")
+    parser.add_argument("--models", default=config.MODEL_PRELOAD or ",".join(m.value for m in MODEL_CONFIG),
+                        help="Modelos a calibrar (\"modelo[:escala],...\"; por defecto MODEL_PRELOAD)")
+    parser.add_argument("--tiles", help="Tamaños de tile candidatos, separados por coma")
+    parser.add_argument("--batches", help="Tiles por forward candidatos, separados por coma")
+    parser.add_argument("--threads", help="Threads de torch candidatos (por defecto según los cores)")
+    parser.add_argument("--repeat", type=int, default=3, help="Forwards medidos por combinación")
+    parser.add_argument("--only-missing", action="store_true",
+                        help="Omitir los modelos que ya tienen perfil para este host")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    models = parse_model_list(args.models)
+
+    print("=" * 50)
+    print("Autotuning de Real-ESRGAN")
+    print("=" * 50)
+    print(f"Perfil: {os.path.abspath(image_service.tuning_profile.path)}")
+    print(f"Modelos: {', '.join(f'{m.value}:{s}' for m, s in models)}\n")
+
+    tuned = image_service.autotune_models(
+        models,
+        only_missing=args.only_missing,
+        tile_sizes=parse_int_list(args.tiles),
+        batch_sizes=parse_int_list(args.batches),
+        threads=parse_int_list(args.threads),
+        repeat=args.repeat
+    )
+
+    print("\n" + "=" * 50)
+    print(f"Modelos calibrados: {len(tuned)}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,10 @@ import tornado.ioloop
 
 from app.config import config
 from app.database import connect_to_mongodb, close_mongodb_connection
+from app.services.image_service import image_service
+from app.services.video_service import video_service
+from app.services.inference_executor import inference_executor
+from app.services.job_queue import image_job_queue, video_job_queue
 from app.handlers import (
     RegisterHandler,
     LoginHandler,
@@ -12,11 +16,15 @@ from app.handlers import (
     LogoutHandler,
     MeHandler,
     ImageEnhanceHandler,
+    ImageUploadHandler,
     ImageListHandler,
     ImageDetailHandler,
+    ImageFileHandler,
     VideoEnhanceHandler,
+    VideoUploadHandler,
     VideoListHandler,
     VideoDetailHandler,
+    VideoFileHandler,
     HealthHandler,
     InfoHandler,
     ModelsHandler,
@@ -37,13 +45,17 @@ def make_app() -> tornado.web.Application:
 
         # Image endpoints
         (r"/api/images/enhance", ImageEnhanceHandler),
+        (r"/api/images/upload", ImageUploadHandler),
         (r"/api/images", ImageListHandler),
         (r"/api/images/([a-f0-9]{24})", ImageDetailHandler),
+        (r"/api/images/([a-f0-9]{24})/(original|enhanced)", ImageFileHandler),
 
         # Video endpoints
         (r"/api/videos/enhance", VideoEnhanceHandler),
+        (r"/api/videos/upload", VideoUploadHandler),
         (r"/api/videos", VideoListHandler),
         (r"/api/videos/([a-f0-9]{24})", VideoDetailHandler),
+        (r"/api/videos/([a-f0-9]{24})/(original|enhanced)", VideoFileHandler),
 
         # System endpoints
         (r"/api/health", HealthHandler),
@@ -71,13 +83,28 @@ async def main():
     print("\nConectando a MongoDB...")
     await connect_to_mongodb()
 
+    # Iniciar workers de la cola de imágenes
+    await image_job_queue.ensure_indexes()
+    image_service.start_job_workers(config.IMAGE_QUEUE_WORKERS)
+
+    # Iniciar workers de la cola de videos (retoman los trabajos interrumpidos)
+    await video_job_queue.ensure_indexes()
+    video_service.start_job_workers(config.VIDEO_QUEUE_WORKERS)
+
     # Crear aplicación
     app = make_app()
     app.listen(config.SERVER_PORT)
 
+    # Precargar modelos en segundo plano (el servidor ya acepta requests)
+    warm_up_task = asyncio.create_task(inference_executor.warm_up())
+
     print(f"\nServidor iniciado en http://localhost:{config.SERVER_PORT}")
     print(f"Modo debug: {config.DEBUG}")
     print(f"GPU disponible: {config.REALESRGAN_USE_GPU}")
+    print(f"Executor de inferencia: {config.INFERENCE_EXECUTOR} "
+          f"(workers={config.INFERENCE_WORKERS}, max_queue={config.INFERENCE_MAX_QUEUE})")
+    budget = f"{config.MODEL_MEMORY_BUDGET_MB}MB" if config.MODEL_MEMORY_BUDGET_MB else "sin límite"
+    print(f"Modelos a precargar: {config.MODEL_PRELOAD or '-'} (presupuesto de memoria: {budget})")
     print("\nEndpoints disponibles:")
     print("  Auth:")
     print("    - POST /api/auth/register")
@@ -117,6 +144,12 @@ async def main():
     # Mantener el servidor corriendo
     await shutdown_event.wait()
 
+    # Detener workers de la cola y el pool de inferencia
+    warm_up_task.cancel()
+    await image_service.stop_job_workers()
+    await video_service.stop_job_workers()
+    inference_executor.shutdown()
+
     # Cerrar conexión a MongoDB
     await close_mongodb_connection()
     print("Servidor detenido.")
@@ -12,11 +12,13 @@ export const API_ENDPOINTS = {
     ENHANCE: '/api/images/enhance',
     LIST: '/api/images',
     DETAIL: (id: string) => `/api/images/${id}`,
+    FILE: (id: string, kind: 'original' | 'enhanced') => `/api/images/${id}/${kind}`,
   },
   VIDEOS: {
     ENHANCE: '/api/videos/enhance',
     LIST: '/api/videos',
     DETAIL: (id: string) => `/api/videos/${id}`,
+    FILE: (id: string, kind: 'original' | 'enhanced') => `/api/videos/${id}/${kind}`,
   },
   SYSTEM: {
     HEALTH: '/api/health',
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { ImageHistoryItem, VideoHistoryItem, JobStatus } from '../types/media';
 import mediaService from '../services/mediaService';
+import { API_ENDPOINTS } from '../config/api';
 import '../styles/history.css';
 
 type TabType = 'all' | 'images' | 'videos';
@@ -134,29 +135,14 @@ const History: React.FC = () => {
     setDownloading(`${item.id}-${type}`);
 
     try {
-      let base64: string | null = null;
-      let filename: string;
-
-      if (item.type === 'image') {
-        const detail = await mediaService.getImageDetail(item.id);
-        base64 = type === 'original' ? detail.image.original_base64 : detail.image.enhanced_base64;
-        filename = type === 'original'
-          ? item.original_filename
-          : mediaService.getEnhancedFilename(item.original_filename);
-      } else {
-        const detail = await mediaService.getVideoDetail(item.id);
-        base64 = type === 'original' ? detail.video.original_base64 : detail.video.enhanced_base64;
-        filename = type === 'original'
-          ? item.original_filename
-          : mediaService.getEnhancedFilename(item.original_filename);
-      }
-
-      if (base64) {
-        const mimeType = mediaService.getMimeType(filename);
-        mediaService.downloadBase64File(base64, filename, mimeType);
-      } else {
-        setError('No se pudo obtener el archivo para descargar.');
-      }
+      const url = item.type === 'image'
+        ? API_ENDPOINTS.IMAGES.FILE(item.id, type)
+        : API_ENDPOINTS.VIDEOS.FILE(item.id, type);
+      const filename = type === 'original'
+        ? item.original_filename
+        : mediaService.getEnhancedFilename(item.original_filename);
+
+      await mediaService.downloadFile(url, filename);
     } catch (err) {
       setError('Error al descargar el archivo. Intenta de nuevo.');
       console.error('Error downloading:', err);
@@ -42,20 +42,32 @@ export const mediaService = {
     return response.data;
   },
 
-  async getImageDetail(id: string): Promise<ImageDetailResponse> {
+  async getImageDetail(id: string, includeMedia: boolean = true): Promise<ImageDetailResponse> {
     const response = await api.get<ImageDetailResponse>(
-      API_ENDPOINTS.IMAGES.DETAIL(id)
+      `${API_ENDPOINTS.IMAGES.DETAIL(id)}?include_media=${includeMedia}`
     );
     return response.data;
   },
 
-  async getVideoDetail(id: string): Promise<VideoDetailResponse> {
+  async getVideoDetail(id: string, includeMedia: boolean = true): Promise<VideoDetailResponse> {
     const response = await api.get<VideoDetailResponse>(
-      API_ENDPOINTS.VIDEOS.DETAIL(id)
+      `${API_ENDPOINTS.VIDEOS.DETAIL(id)}?include_media=${includeMedia}`
     );
     return response.data;
   },
 
+  async downloadFile(url: string, filename: string): Promise<void> {
+    const response = await api.get<Blob>(url, { responseType: 'blob' });
+
+    const link = document.createElement('a');
+    link.href = URL.createObjectURL(response.data);
+    link.download = filename;
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+    URL.revokeObjectURL(link.href);
+  },
+
   fileToBase64(file: File): Promise<string> {
     return new Promise((resolve, reject) => {
       const reader = new FileReader();
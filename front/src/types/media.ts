@@ -175,8 +175,10 @@ export interface VideoListResponse {
 
 export interface ImageDetailResponse {
   image: ImageHistoryItem & {
-    original_base64: string;
-    enhanced_base64: string;
+    original_base64: string | null;
+    enhanced_base64: string | null;
+    original_url: string | null;
+    enhanced_url: string | null;
   };
 }
 
@@ -184,5 +186,7 @@ export interface VideoDetailResponse {
   video: VideoHistoryItem & {
     original_base64: string | null;
     enhanced_base64: string | null;
+    original_url: string | null;
+    enhanced_url: string | null;
   };
 }
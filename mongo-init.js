@@ -17,6 +17,7 @@ db.createUser({
 db.createCollection('users');
 db.createCollection('images');
 db.createCollection('refresh_tokens');
+db.createCollection('image_jobs');
 
 // Crear índices para usuarios
 db.users.createIndex({ "email": 1 }, { unique: true });
@@ -27,6 +28,11 @@ db.images.createIndex({ "user_id": 1 });
 db.images.createIndex({ "created_at": -1 });
 db.images.createIndex({ "status": 1 });
 
+// Crear índices para la cola de trabajos de imagen
+db.image_jobs.createIndex({ "status": 1, "priority": -1, "available_at": 1 });
+db.image_jobs.createIndex({ "lease_until": 1 });
+db.image_jobs.createIndex({ "payload.image_id": 1 });
+
 // Crear índices para refresh tokens
 db.refresh_tokens.createIndex({ "user_id": 1 });
 db.refresh_tokens.createIndex({ "token": 1 }, { unique: true });
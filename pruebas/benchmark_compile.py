@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque en frío y latencia por tile: eager vs TorchScript vs torch.compile.
+
+Este script:
+1. Usa los pesos reales de API/weights (o genera pesos aleatorios en un archivo temporal)
+2. Para cada modo de compilación lanza procesos nuevos que cargan el modelo:
+   - primer arranque: sin artefactos (traza/compila y los guarda)
+   - arranque siguiente: reutilizando los artefactos guardados
+3. Mide el tiempo de carga (import de torch excluido) y la latencia media por tile
+
+Uso:
+    python benchmark_compile.py [--model general_v3] [--tile 256] [--modes none,torchscript,inductor]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import torch
+
+API_DIR = Path(__file__).resolve().parent.parent / "API"
+sys.path.insert(0, str(API_DIR))
+
+from app.models.image import ModelType, MODEL_CONFIG  # noqa: E402
+from app.services.image_service import RealESRGANUpscaler  # noqa: E402
+from app.services.precision import input_dtype  # noqa: E402
+
+
+def parse_args():
+    """Lee los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmark de modelos compilados")
+    parser.add_argument("--model", default=ModelType.GENERAL_V3.value,
+                        choices=[m.value for m in ModelType])
+    parser.add_argument("--tile", type=int, default=256, help="Tamaño de tile")
+    parser.add_argument("--modes", default="none,torchscript,inductor",
+                        help="Modos de compilación a comparar, separados por coma")
+    parser.add_argument("--precision", default="fp32", help="Precisión del modelo")
+    parser.add_argument("--iterations", type=int, default=5, help="Tiles medidos por modo")
+    parser.add_argument("--compiled-dir", help="Directorio de artefactos (por defecto uno temporal)")
+    # Uso interno: ejecución de una medición en un proceso nuevo
+    parser.add_argument("--child", nargs=2, metavar=("MODO", "PESOS"), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def run_child(args):
+    """Carga el modelo en este proceso y reporta los tiempos como JSON."""
+    mode, weights_path = args.child
+    model_type = ModelType(args.model)
+
+    start = time.perf_counter()
+    upscaler = RealESRGANUpscaler(
+        model_type=model_type,
+        tile_size=args.tile,
+        device=torch.device("cpu"),
+        use_gpu=False,
+        precision=args.precision,
+        compile_mode=mode,
+        compiled_dir=args.compiled_dir
+    )
+    upscaler.load_model(weights_path)
+    load_seconds = time.perf_counter() - start
+
+    size = args.tile + 2 * upscaler.tile_pad
+    memory_format = torch.channels_last if upscaler.channels_last else torch.contiguous_format
+    tile = torch.rand(1, 3, size, size).to(dtype=input_dtype(upscaler.precision), memory_format=memory_format)
+    with torch.no_grad():
+        start = time.perf_counter()
+        upscaler.model(tile)
+        first_tile = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            upscaler.model(tile)
+        tile_seconds = (time.perf_counter() - start) / args.iterations
+
+    print(json.dumps({"load": load_seconds, "first_tile": first_tile, "tile": tile_seconds}))
+
+
+def measure(args, mode: str, weights_path: str) -> dict:
+    """Ejecuta una medición en un proceso nuevo (arranque en frío real)."""
+    cmd = [sys.executable, __file__, "--model", args.model, "--tile", str(args.tile),
+           "--precision", args.precision, "--iterations", str(args.iterations),
+           "--compiled-dir", args.compiled_dir, "--child", mode, weights_path]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def random_weights(model_type: ModelType, directory: str) -> str:
+    """Guarda pesos aleatorios con la arquitectura del modelo (mismo costo de cómputo)."""
+    upscaler = RealESRGANUpscaler(model_type=model_type, device=torch.device("cpu"), use_gpu=False)
+    path = str(Path(directory) / MODEL_CONFIG[model_type]["filename"])
+    torch.save({"params_ema": upscaler._create_model().state_dict()}, path)
+    return path
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    model_type = ModelType(args.model)
+    tmp_dir = tempfile.TemporaryDirectory()
+    args.compiled_dir = args.compiled_dir or str(Path(tmp_dir.name) / "compiled")
+
+    weights_path = API_DIR / "weights" / MODEL_CONFIG[model_type]["filename"]
+    if weights_path.exists():
+        weights_path = str(weights_path)
+    else:
+        print("Aviso: pesos no encontrados, se usan pesos aleatorios")
+        weights_path = random_weights(model_type, tmp_dir.name)
+
+    print("=" * 72)
+    print("Benchmark de compilación - RealESRGANUpscaler")
+    print("=" * 72)
+    print(f"Modelo: {model_type.value}  Tile: {args.tile}  Precisión: {args.precision}  "
+          f"Threads torch: {torch.get_num_threads()}")
+    print(f"\n{'modo':<12} {'arranque':<10} {'carga':>9} {'1er tile':>10} {'por tile':>10}")
+
+    baseline = None
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        runs = [("primero", measure(args, mode, weights_path))]
+        if mode != "none":
+            runs.append(("siguiente", measure(args, mode, weights_path)))
+        for label, result in runs:
+            baseline = baseline or result["tile"]
+            print(f"{mode:<12} {label:<10} {result['load']:8.2f}s {result['first_tile'] * 1000:8.0f}ms "
+                  f"{result['tile'] * 1000:8.0f}ms  (x{baseline / result['tile']:.2f})")
+
+    print("=" * 72)
+    tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
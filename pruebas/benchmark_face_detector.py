@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark de recall y latencia de los detectores de rostros.
+
+Este script:
+1. Carga las imágenes de prueba (por defecto las *_original.png de image_history),
+   opcionalmente ampliadas con --upscale para simular la detección sobre la
+   imagen mejorada
+2. Toma como referencia las cajas de --annotations (JSON {archivo: [[x, y, ancho, alto], ...]})
+   o, sin anotaciones, las del backend --reference sobre la imagen completa
+3. Para cada backend y cada lado máximo de la pirámide mide la latencia
+   (mediana de --repeat corridas, con el detector ya cargado), el recall
+   (IoU >= --iou contra la referencia) y las detecciones sin pareja
+4. Los backends sin pesos (p. ej. retinaface sin detection_Resnet50_Final.pth)
+   se omiten
+
+Uso:
+    python benchmark_face_detector.py [--backends haar,retinaface] [--max-sides 0,1280,640] [--upscale 4]
+"""
+
+import argparse
+import glob
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+API_DIR = Path(__file__).resolve().parent.parent / "API"
+sys.path.insert(0, str(API_DIR))
+
+from app.services.face_detector import (  # noqa: E402
+    FACE_DETECTOR_BACKENDS, create_face_detector, pyramid_level
+)
+from app.services.face_tracker import box_iou  # noqa: E402
+
+
+def parse_args():
+    """Lee los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmark de detectores de rostros")
+    parser.add_argument("--images", default=str(API_DIR.parent / "image_history" / "*_original.png"),
+                        help="Patrón glob de las imágenes de prueba")
+    parser.add_argument("--annotations", help="JSON con las cajas reales por nombre de archivo")
+    parser.add_argument("--reference", default="retinaface", choices=FACE_DETECTOR_BACKENDS,
+                        help="Backend de referencia sin anotaciones (si no carga se usa haar)")
+    parser.add_argument("--backends", default=",".join(FACE_DETECTOR_BACKENDS),
+                        help="Backends a medir, separados por coma")
+    parser.add_argument("--max-sides", default="0,1280,640",
+                        help="Lados máximos de la pirámide, separados por coma (0 = sin límite)")
+    parser.add_argument("--upscale", type=float, default=1.0, help="Factor de ampliación de las imágenes")
+    parser.add_argument("--min-size", type=int, default=30, help="Rostro mínimo buscado (pixeles)")
+    parser.add_argument("--iou", type=float, default=0.4, help="IoU mínimo para contar un acierto")
+    parser.add_argument("--repeat", type=int, default=3, help="Corridas por imagen")
+    return parser.parse_args()
+
+
+def load_images(pattern: str, upscale: float):
+    """Retorna [(nombre, imagen BGR)] ampliadas por upscale."""
+    images = []
+    for path in sorted(glob.glob(pattern)):
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        if upscale != 1:
+            img = cv2.resize(img, None, fx=upscale, fy=upscale, interpolation=cv2.INTER_CUBIC)
+        images.append((Path(path).name, img))
+    return images
+
+
+def match(detected: np.ndarray, truth: np.ndarray, threshold: float):
+    """Cuenta (aciertos, detecciones sin pareja) emparejando cada caja real una sola vez."""
+    used = set()
+    hits = 0
+    for box in truth:
+        best, best_iou = None, threshold
+        for index, candidate in enumerate(detected):
+            iou = box_iou(box, candidate)
+            if index not in used and iou >= best_iou:
+                best, best_iou = index, iou
+        if best is not None:
+            used.add(best)
+            hits += 1
+    return hits, len(detected) - len(used)
+
+
+def main():
+    args = parse_args()
+    images = load_images(args.images, args.upscale)
+    if not images:
+        print(f"No hay imágenes en {args.images}")
+        return 1
+
+    if args.annotations:
+        with open(args.annotations) as f:
+            annotations = json.load(f)
+        truth = {name: np.array(annotations.get(name, []), dtype=np.float32).reshape(-1, 4)
+                 for name, _ in images}
+        # Las anotaciones son de la imagen sin ampliar
+        truth = {name: boxes * args.upscale for name, boxes in truth.items()}
+        source = args.annotations
+    else:
+        reference = create_face_detector(args.reference, max_side=0)
+        truth = {name: reference.detect(img, min_size=args.min_size).astype(np.float32)
+                 for name, img in images}
+        source = f"{reference.name} a resolución completa"
+    total_faces = sum(len(boxes) for boxes in truth.values())
+
+    print("=" * 78)
+    print(f"Imágenes: {len(images)} (x{args.upscale:g}) | rostros de referencia: {total_faces} ({source})")
+    print("=" * 78)
+    print(f"{'Backend':<12}{'Lado max':>10}{'Nivel':>8}{'Latencia ms':>14}{'Recall':>10}{'Extra':>8}")
+    print("-" * 78)
+
+    for backend in args.backends.split(","):
+        for max_side in (int(v) for v in args.max_sides.split(",")):
+            detector = create_face_detector(backend.strip(), max_side=max_side)
+            if detector.name != backend.strip():
+                print(f"{backend:<12}{'-':>10}  (sin pesos, omitido)")
+                break
+            latencies, levels, hits, extra = [], [], 0, 0
+            for name, img in images:
+                detector.detect(img, min_size=args.min_size)  # calentamiento
+                runs = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    boxes = detector.detect(img, min_size=args.min_size)
+                    runs.append((time.perf_counter() - start) * 1000)
+                latencies.append(statistics.median(runs))
+                levels.append(pyramid_level(img.shape[1], img.shape[0], args.min_size,
+                                            detector.native_min_size, max_side))
+                image_hits, image_extra = match(boxes, truth[name], args.iou)
+                hits += image_hits
+                extra += image_extra
+            recall = hits / total_faces if total_faces else float("nan")
+            print(f"{backend:<12}{max_side or '-':>10}{statistics.mean(levels):>8.1f}"
+                  f"{statistics.mean(latencies):>14.1f}{recall:>10.2f}{extra:>8}")
+
+    print("=" * 78)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
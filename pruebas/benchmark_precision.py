@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los modos de precisión de RealESRGANUpscaler.
+
+Este script:
+1. Carga una imagen (o crea una sintética con gradientes, bordes y ruido)
+2. Ejecuta el modelo seleccionado en cada modo de precisión (fp32, bf16, fp16, int8)
+   con y sin channels_last
+3. Compara cada salida contra fp32 NCHW (PSNR) y mide el throughput
+4. Recomienda el modo más rápido cuyo PSNR supera el umbral
+
+Los modos no soportados por el dispositivo se reportan y se omiten.
+
+Uso:
+    python benchmark_precision.py [--model general_v3] [--image foto.png] [--min-psnr 40]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+API_DIR = Path(__file__).resolve().parent.parent / "API"
+sys.path.insert(0, str(API_DIR))
+
+from app.models.image import ModelType, MODEL_CONFIG  # noqa: E402
+from app.services.image_service import RealESRGANUpscaler  # noqa: E402
+from app.services.precision import PRECISION_MODES, compute_psnr  # noqa: E402
+
+
+def parse_args():
+    """Lee los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmark de modos de precisión")
+    parser.add_argument("--model", default=ModelType.GENERAL_V3.value,
+                        choices=[m.value for m in ModelType])
+    parser.add_argument("--image", help="Imagen de prueba (por defecto una sintética)")
+    parser.add_argument("--size", default="640x360",
+                        help="Tamaño de la imagen sintética (ANCHOxALTO)")
+    parser.add_argument("--modes", default=",".join(PRECISION_MODES),
+                        help="Modos a comparar, separados por coma")
+    parser.add_argument("--tile", type=int, default=256, help="Tamaño de tile")
+    parser.add_argument("--min-psnr", type=float, default=40.0,
+                        help="PSNR mínimo contra fp32 para considerar un modo idéntico")
+    parser.add_argument("--repeat", type=int, default=2, help="Repeticiones por medición")
+    parser.add_argument("--gpu", action="store_true", help="Usar GPU si está disponible")
+    return parser.parse_args()
+
+
+def synthetic_image(width: int, height: int) -> np.ndarray:
+    """Imagen sintética con gradientes suaves, bordes nítidos y textura con ruido."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    img = np.stack([x / width, y / height, 1 - (x + y) / (width + height)], axis=-1)
+    stripes = ((x // 12 + y // 12) % 2)[..., None]
+    img[: height // 2, : width // 2] = stripes[: height // 2, : width // 2]
+    img[height // 2:, width // 2:] += rng.normal(0, 0.15, (height - height // 2, width - width // 2, 3))
+    return (np.clip(img, 0, 1) * 255).astype(np.uint8)
+
+
+def build_upscaler(model_type: ModelType, device: torch.device, tile: int,
+                   precision: str, channels_last: bool) -> RealESRGANUpscaler:
+    """Crea un upscaler con el modo indicado (pesos reales si existen en API/weights)."""
+    torch.manual_seed(0)
+    upscaler = RealESRGANUpscaler(
+        model_type=model_type,
+        tile_size=tile,
+        device=device,
+        use_gpu=device.type == "cuda",
+        precision=precision,
+        channels_last=channels_last
+    )
+    model_path = API_DIR / "weights" / MODEL_CONFIG[model_type]["filename"]
+    upscaler.load_model(str(model_path) if model_path.exists() else None)
+    # Sin pesos se usan pesos aleatorios (misma semilla en todos los modos)
+    upscaler._model_loaded = upscaler.model is not None
+    return upscaler
+
+
+def measure(upscaler: RealESRGANUpscaler, img: np.ndarray, repeat: int):
+    """Retorna (mejor tiempo en segundos, salida) de varias ejecuciones."""
+    output = upscaler.enhance(img)  # calentamiento
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = upscaler.enhance(img)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def to_tensor(img: np.ndarray) -> torch.Tensor:
+    return torch.from_numpy(img).float() / 255.0
+
+
+def main():
+    args = parse_args()
+    model_type = ModelType(args.model)
+    device = torch.device("cuda" if args.gpu and torch.cuda.is_available() else "cpu")
+
+    if args.image:
+        img = np.array(Image.open(args.image).convert("RGB"))
+    else:
+        width, height = (int(v) for v in args.size.lower().split("x"))
+        img = synthetic_image(width, height)
+    megapixels = img.shape[0] * img.shape[1] / 1e6
+
+    print("=" * 70)
+    print("Benchmark de precisión - RealESRGANUpscaler")
+    print("=" * 70)
+    print(f"Modelo: {model_type.value}  Imagen: {img.shape[1]}x{img.shape[0]}  "
+          f"Device: {device}  Threads torch: {torch.get_num_threads()}")
+    if not (API_DIR / "weights" / MODEL_CONFIG[model_type]["filename"]).exists():
+        print("Aviso: pesos no encontrados, se usan pesos aleatorios (el PSNR es solo orientativo)")
+
+    baseline_time, reference = measure(build_upscaler(model_type, device, args.tile, "fp32", False),
+                                       img, args.repeat)
+    reference = to_tensor(reference)
+
+    print(f"\n{'modo':<6} {'channels_last':<14} {'tiempo':>8} {'MP/s':>8} {'speedup':>8} {'PSNR':>9}")
+    results = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        for channels_last in (False, True):
+            upscaler = build_upscaler(model_type, device, args.tile, mode, channels_last)
+            if upscaler.precision != mode:
+                print(f"{mode:<6} {str(channels_last):<14} {'no soportado':>36}")
+                break
+            if mode == "fp32" and not channels_last:
+                elapsed, output = baseline_time, reference
+            else:
+                elapsed, output = measure(upscaler, img, args.repeat)
+                output = to_tensor(output)
+            psnr = compute_psnr(reference, output)
+            results.append((elapsed, mode, channels_last, psnr))
+            print(f"{mode:<6} {str(channels_last):<14} {elapsed:7.2f}s {megapixels / elapsed:8.3f} "
+                  f"{baseline_time / elapsed:7.2f}x {psnr:8.1f}dB")
+
+    accepted = [r for r in results if r[3] >= args.min_psnr]
+    if accepted:
+        elapsed, mode, channels_last, psnr = min(accepted)
+        print(f"\nRecomendado (PSNR >= {args.min_psnr:.0f}dB): precision=\"{mode}\", "
+              f"channels_last={channels_last} ({baseline_time / elapsed:.2f}x sobre fp32)")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark de tamaño de tile y mezcla de solapamiento en RealESRGANUpscaler.
+
+Este script:
+1. Crea una imagen sintética (o usa una dada) y la procesa sin tiles como referencia
+2. Para cada tamaño de tile procesa la imagen con tiles sin mezcla (overlap 0)
+   y con tiles solapados mezclados
+3. Cada medición corre en un proceso nuevo para medir el pico de memoria (RSS)
+4. Reporta tiempo, throughput, pico de memoria (sobre el proceso con torch
+   cargado) y PSNR contra la referencia (un PSNR bajo indica costuras)
+
+El pico de memoria se mide con /proc y ru_maxrss (Linux).
+
+Uso:
+    python benchmark_tile_blend.py [--model general_v3] [--tiles 64,128,256,512] [--overlap 16]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+API_DIR = Path(__file__).resolve().parent.parent / "API"
+sys.path.insert(0, str(API_DIR))
+
+from app.models.image import ModelType, MODEL_CONFIG  # noqa: E402
+from app.services.image_service import RealESRGANUpscaler  # noqa: E402
+from app.services.precision import compute_psnr  # noqa: E402
+
+
+def parse_args():
+    """Lee los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmark de tiles con mezcla de solapamiento")
+    parser.add_argument("--model", default=ModelType.GENERAL_V3.value,
+                        choices=[m.value for m in ModelType])
+    parser.add_argument("--image", help="Imagen de prueba (por defecto una sintética)")
+    parser.add_argument("--size", default="512x384", help="Tamaño de la imagen sintética (ANCHOxALTO)")
+    parser.add_argument("--tiles", default="64,128,256,512", help="Tamaños de tile, separados por coma")
+    parser.add_argument("--overlap", type=int, default=16, help="Solapamiento de los tiles mezclados")
+    parser.add_argument("--pad", type=int, default=10, help="Contexto descartado por tile")
+    parser.add_argument("--batch", type=int, default=1, help="Tiles por forward")
+    # Uso interno: ejecución de una medición en un proceso nuevo
+    parser.add_argument("--child", nargs=4, metavar=("TILE", "OVERLAP", "ENTRADA", "SALIDA"),
+                        help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def synthetic_image(width: int, height: int) -> np.ndarray:
+    """Imagen sintética con gradientes, bordes y textura."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    img = np.stack([x / width, y / height, 0.5 + 0.5 * np.sin((x + y) / 17)], axis=-1)
+    img[(x // 24 + y // 24) % 3 == 0] *= 0.5
+    img += rng.normal(0, 0.05, img.shape)
+    return (np.clip(img, 0, 1) * 255).astype(np.uint8)
+
+
+def peak_rss_mb() -> float:
+    """Pico de memoria residente del proceso en MB (ru_maxrss está en KB en Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mb() -> float:
+    """Memoria residente actual del proceso en MB."""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+
+
+def run_child(args):
+    """Procesa la imagen con un tamaño de tile y reporta tiempo y memoria como JSON."""
+    tile, overlap, input_path, output_path = args.child
+    model_type = ModelType(args.model)
+    img = np.load(input_path)
+    # Base: torch importado, antes de cargar el modelo (el pico incluye los pesos)
+    baseline_mb = current_rss_mb()
+
+    torch.manual_seed(0)
+    upscaler = RealESRGANUpscaler(
+        model_type=model_type,
+        tile_size=int(tile),
+        device=torch.device("cpu"),
+        use_gpu=False,
+        tile_batch_size=args.batch,
+        tile_overlap=int(overlap),
+        tile_pad=args.pad
+    )
+    model_path = API_DIR / "weights" / MODEL_CONFIG[model_type]["filename"]
+    upscaler.load_model(str(model_path) if model_path.exists() else None)
+    # Sin pesos se usan pesos aleatorios (misma semilla en todas las mediciones)
+    upscaler._model_loaded = upscaler.model is not None
+
+    start = time.perf_counter()
+    output = upscaler.enhance(img)
+    elapsed = time.perf_counter() - start
+
+    np.save(output_path, output)
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_rss_mb() - baseline_mb}))
+
+
+def measure(args, tile: int, overlap: int, input_path: str, output_path: str) -> dict:
+    """Ejecuta una medición en un proceso nuevo."""
+    cmd = [sys.executable, __file__, "--model", args.model, "--pad", str(args.pad),
+           "--batch", str(args.batch), "--child", str(tile), str(overlap), input_path, output_path]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    if args.image:
+        img = np.array(Image.open(args.image).convert("RGB"))
+    else:
+        width, height = (int(v) for v in args.size.lower().split("x"))
+        img = synthetic_image(width, height)
+    height, width = img.shape[:2]
+    megapixels = width * height / 1e6
+
+    print("=" * 74)
+    print("Benchmark de tiles con mezcla - RealESRGANUpscaler")
+    print("=" * 74)
+    print(f"Modelo: {args.model}  Imagen: {width}x{height}  Overlap: {args.overlap}  "
+          f"Pad: {args.pad}  Threads torch: {torch.get_num_threads()}")
+    if not (API_DIR / "weights" / MODEL_CONFIG[ModelType(args.model)]["filename"]).exists():
+        print("Aviso: pesos no encontrados, se usan pesos aleatorios (las costuras son solo orientativas)")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = str(Path(tmp_dir) / "input.npy")
+        np.save(input_path, img)
+
+        reference_path = str(Path(tmp_dir) / "reference.npy")
+        result = measure(args, max(width, height), 0, input_path, reference_path)
+        reference = torch.from_numpy(np.load(reference_path)).float() / 255
+        print(f"\n{'tile':>6} {'overlap':>8} {'tiempo':>8} {'MP/s':>7} {'pico RAM':>10} {'PSNR':>9}")
+        print(f"{'sin tiles':>15} {result['seconds']:7.2f}s {megapixels / result['seconds']:7.3f} "
+              f"{result['peak_mb']:8.0f}MB {'ref':>9}")
+
+        for tile in [int(t) for t in args.tiles.split(",") if t]:
+            if tile >= max(width, height):
+                continue
+            for overlap in (0, args.overlap):
+                output_path = str(Path(tmp_dir) / f"tile_{tile}_{overlap}.npy")
+                result = measure(args, tile, overlap, input_path, output_path)
+                output = torch.from_numpy(np.load(output_path)).float() / 255
+                psnr = compute_psnr(reference, output)
+                print(f"{tile:>6} {overlap:>8} {result['seconds']:7.2f}s "
+                      f"{megapixels / result['seconds']:7.3f} {result['peak_mb']:8.0f}MB {psnr:8.1f}dB")
+
+    print("=" * 74)
+
+
+if __name__ == "__main__":
+    main()
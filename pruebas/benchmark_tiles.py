@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark del procesamiento por tiles de RealESRGANUpscaler.
+
+Este script:
+1. Crea imágenes sintéticas 1080p y 4K
+2. Carga el modelo seleccionado (pesos reales si existen en API/weights)
+3. Mide el tiempo del tiling tile a tile (actual) contra el tiling por lotes
+4. Muestra el throughput en megapíxeles de entrada por segundo
+
+Uso:
+    python benchmark_tiles.py [--model general_x4] [--tile 256] [--batch-sizes 2,4,8]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+API_DIR = Path(__file__).resolve().parent.parent / "API"
+sys.path.insert(0, str(API_DIR))
+
+from app.models.image import ModelType, MODEL_CONFIG  # noqa: E402
+from app.services.image_service import RealESRGANUpscaler  # noqa: E402
+
+# Resoluciones de prueba (ancho, alto)
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+}
+
+
+def parse_args():
+    """Lee los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmark de tiling por lotes")
+    parser.add_argument("--model", default=ModelType.GENERAL_X4.value,
+                        choices=[m.value for m in ModelType])
+    parser.add_argument("--tile", type=int, default=256, help="Tamaño de tile")
+    parser.add_argument("--batch-sizes", default="2,4,8",
+                        help="Tamaños de lote a comparar, separados por coma")
+    parser.add_argument("--resolutions", default="1080p,4K",
+                        help="Resoluciones a probar: " + ",".join(RESOLUTIONS))
+    parser.add_argument("--repeat", type=int, default=1, help="Repeticiones por medición")
+    return parser.parse_args()
+
+
+def build_upscaler(model_type: ModelType, tile: int, batch_size: int) -> RealESRGANUpscaler:
+    """Crea un upscaler en CPU con el modelo seleccionado."""
+    upscaler = RealESRGANUpscaler(
+        model_type=model_type,
+        tile_size=tile,
+        device=torch.device("cpu"),
+        use_gpu=False,
+        tile_batch_size=batch_size
+    )
+    model_path = API_DIR / "weights" / MODEL_CONFIG[model_type]["filename"]
+    upscaler.load_model(str(model_path) if model_path.exists() else None)
+    # Sin pesos se usan los pesos aleatorios: el costo de cómputo es el mismo
+    upscaler._model_loaded = upscaler.model is not None
+    return upscaler
+
+
+def measure(upscaler: RealESRGANUpscaler, img: np.ndarray, repeat: int) -> float:
+    """Retorna el mejor tiempo (segundos) de varias ejecuciones."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        upscaler.enhance(img)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    args = parse_args()
+    model_type = ModelType(args.model)
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",") if b]
+
+    print("=" * 60)
+    print("Benchmark de tiling por lotes - RealESRGANUpscaler")
+    print("=" * 60)
+    print(f"Modelo: {model_type.value}  Tile: {args.tile}  Threads torch: {torch.get_num_threads()}")
+
+    for name in args.resolutions.split(","):
+        width, height = RESOLUTIONS[name]
+        img = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+        megapixels = width * height / 1e6
+        print(f"\n{name} ({width}x{height})")
+
+        baseline = measure(build_upscaler(model_type, args.tile, 1), img, args.repeat)
+        print(f"  tile a tile:      {baseline:8.2f}s  {megapixels / baseline:6.3f} MP/s")
+
+        for batch_size in batch_sizes:
+            elapsed = measure(build_upscaler(model_type, args.tile, batch_size), img, args.repeat)
+            speedup = baseline / elapsed
+            print(f"  lote de {batch_size:<2} tiles: {elapsed:8.2f}s  "
+                  f"{megapixels / elapsed:6.3f} MP/s  (x{speedup:.2f})")
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    main()
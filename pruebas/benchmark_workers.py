@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark de throughput agregado de los modos del executor de inferencia.
+
+Este script:
+1. Crea un executor por configuración (thread con 1 worker y pinned con
+   1, 2, 4... workers, cada uno fijado a su conjunto de cores)
+2. Precarga el modelo en los workers (no se mide)
+3. Envía N imágenes concurrentes y mide imágenes/segundo
+4. Reporta el speedup contra un único worker
+
+Sin pesos en API/weights los workers usan el upscaling básico (modo
+simulación) y el resultado solo refleja el overhead del pool.
+
+Uso:
+    python benchmark_workers.py [--model general_v3] [--workers 1,2,4] [--images 16]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+API_DIR = Path(__file__).resolve().parent.parent / "API"
+sys.path.insert(0, str(API_DIR))
+
+from app.config import config  # noqa: E402
+from app.models.image import ModelType, MODEL_CONFIG  # noqa: E402
+from app.services.inference_executor import InferenceExecutor  # noqa: E402
+from app.services.image_service import run_frame_enhancement  # noqa: E402
+
+
+def parse_args():
+    """Lee los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmark de workers de inferencia")
+    parser.add_argument("--model", default=ModelType.GENERAL_V3.value,
+                        choices=[m.value for m in ModelType])
+    parser.add_argument("--workers", default="1,2,4", help="Workers pinned a comparar, separados por coma")
+    parser.add_argument("--images", type=int, default=16, help="Imágenes por medición")
+    parser.add_argument("--size", default="256x256", help="Tamaño de las imágenes (ANCHOxALTO)")
+    return parser.parse_args()
+
+
+async def measure(mode: str, workers: int, model_type: ModelType, images: list) -> float:
+    """Retorna imágenes/segundo procesando todas las imágenes concurrentemente."""
+    executor = InferenceExecutor(mode=mode, max_workers=workers)
+    try:
+        await executor.warm_up()
+        await executor.run(run_frame_enhancement, images[0], model_type, MODEL_CONFIG[model_type]["scale"], False)
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            executor.run(run_frame_enhancement, img, model_type, MODEL_CONFIG[model_type]["scale"], False)
+            for img in images
+        ))
+        return len(images) / (time.perf_counter() - start)
+    finally:
+        executor.shutdown()
+
+
+async def run(args):
+    model_type = ModelType(args.model)
+    # Los workers precargan el modelo a medir (los procesos nuevos leen el entorno)
+    config.MODEL_PRELOAD = os.environ["MODEL_PRELOAD"] = model_type.value
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(args.images)]
+
+    print("=" * 60)
+    print("Benchmark de workers de inferencia")
+    print("=" * 60)
+    print(f"Modelo: {model_type.value}  Imágenes: {args.images} de {width}x{height}  "
+          f"Cores: {len(os.sched_getaffinity(0))}")
+    if not (API_DIR / "weights" / MODEL_CONFIG[model_type]["filename"]).exists():
+        print("Aviso: pesos no encontrados, los workers usan upscaling básico")
+
+    baseline = await measure("thread", 1, model_type, images)
+    print(f"\n{'modo':<8} {'workers':>8} {'img/s':>9} {'speedup':>9}")
+    print(f"{'thread':<8} {1:>8} {baseline:9.2f} {1.0:8.2f}x")
+    for workers in [int(w) for w in args.workers.split(",") if w]:
+        throughput = await measure("pinned", workers, model_type, images)
+        print(f"{'pinned':<8} {workers:>8} {throughput:9.2f} {throughput / baseline:8.2f}x")
+    print("=" * 60)
+
+
+def main():
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()